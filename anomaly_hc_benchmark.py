@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+다중 엔티티(high-cardinality) 이상 탐지기 벤치마크
+================================================
+
+create_anomaly_detectors 의 탐지기는 단일 시계열이지만 실제 거래 데이터는 customer_id /
+merchant_type / location 차원을 가집니다. 이 모듈은 category_field 를 지정한 다중 엔티티 탐지기를
+만들고, 수만 명 고객의 과거 거래를 적재한 뒤 실시간 탐지를 시작해 다음을 측정합니다.
+
+- 콜드 스타트: 시작 → 엔티티 모델 초기화(init_progress 100% / RUNNING)까지 걸린 시간
+- 모델 메모리: 프로파일의 total_size_in_bytes / 활성 엔티티 수 → 엔티티당 바이트
+- 노드당 수용량: 힙 × plugins.anomaly_detection.model_max_size_percent / 엔티티당 바이트
+- 구간 처리량: 결과 인덱스의 탐지 구간별 엔티티 결과 수 / 실행 시간
+
+관찰 중에는 구간 경계마다 방금 끝난 구간의 거래를 적재해 실시간 데이터 유입을 흉내 냅니다.
+
+사용 예:
+    python anomaly_hc_benchmark.py --entities 10000 --category customer
+    python anomaly_hc_benchmark.py --entities 20000 --category merchant_location --observe-intervals 5 --keep
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import sys
+import json
+import time
+import argparse
+import datetime
+from opensearch_client import get_client
+from index_helpers import stream_bulk, print_bulk_errors
+from anomaly_historical import AD_BASE, find_detector_id, format_millis
+import synthetic_data
+
+HC_INDEX = "financial-hc-transactions"
+HC_MAPPING = {
+    "settings": {"number_of_replicas": 0},
+    "mappings": {
+        "properties": {
+            "@timestamp": {"type": "date"},
+            "transaction_id": {"type": "keyword"},
+            "customer_id": {"type": "keyword"},
+            "amount": {"type": "double"},
+            "merchant_type": {"type": "keyword"},
+            "location": {"type": "keyword"},
+            "is_weekend": {"type": "boolean"},
+            "hour_of_day": {"type": "integer"},
+            "anomaly_score": {"type": "double"}
+        }
+    }
+}
+# 카테고리 필드 조합 (플러그인은 최대 2개 필드 지원)
+CATEGORY_PRESETS = {
+    "customer": ["customer_id"],
+    "merchant_location": ["merchant_type", "location"],
+    "customer_location": ["customer_id", "location"]
+}
+DEFAULT_ENTITIES = 10000
+DEFAULT_HISTORY_INTERVALS = 64  # 콜드 스타트에 필요한 표본(shingle + 32) 이상
+DEFAULT_INTERVAL_MINUTES = 1
+DEFAULT_SHINGLE_SIZE = 8
+DEFAULT_MODEL_MAX_SIZE_PERCENT = 0.1
+MODEL_SIZE_SETTING = "plugins.anomaly_detection.model_max_size_percent"
+PROFILE_TYPES = "state,init_progress,total_size_in_bytes,active_entities"
+
+
+def hc_detector_config(name, index_name, category_fields, interval_minutes=DEFAULT_INTERVAL_MINUTES,
+                       shingle_size=DEFAULT_SHINGLE_SIZE):
+    """category_field 다중 엔티티 탐지기 설정 (엔티티별 거래 건수 / 합계 / 최대 금액)"""
+    return {
+        "name": name,
+        "description": f"다중 엔티티 거래 이상 탐지 ({', '.join(category_fields)})",
+        "time_field": "@timestamp",
+        "indices": [index_name],
+        "category_field": category_fields,
+        "detection_interval": {"period": {"interval": interval_minutes, "unit": "Minutes"}},
+        "window_delay": {"period": {"interval": 1, "unit": "Minutes"}},
+        "shingle_size": shingle_size,
+        "feature_attributes": [
+            {
+                "feature_id": "transaction_volume",
+                "feature_name": "entity_transaction_count",
+                "feature_enabled": True,
+                "aggregation_query": {"transaction_volume": {"value_count": {"field": "transaction_id"}}}
+            },
+            {
+                "feature_id": "total_amount",
+                "feature_name": "entity_total_amount",
+                "feature_enabled": True,
+                "aggregation_query": {"total_amount": {"sum": {"field": "amount"}}}
+            },
+            {
+                "feature_id": "max_amount",
+                "feature_name": "entity_max_amount",
+                "feature_enabled": True,
+                "aggregation_query": {"max_amount": {"max": {"field": "amount"}}}
+            }
+        ]
+    }
+
+
+def parse_percentage(value):
+    """init_progress 의 "70%" 같은 문자열 → 70.0"""
+    if value is None:
+        return 0.0
+    return float(str(value).rstrip("%"))
+
+
+class HCDetectorBenchmark:
+    def __init__(self, client=None, index_name=HC_INDEX):
+        """OpenSearch 클라이언트 설정"""
+        self.client = client or get_client()
+        self.index_name = index_name
+
+    def setup_data(self, entities=DEFAULT_ENTITIES, intervals=DEFAULT_HISTORY_INTERVALS,
+                   interval_minutes=DEFAULT_INTERVAL_MINUTES, rate=0.5, seed=42):
+        """인덱스 재생성 후 현재 시각 직전 intervals 개 구간의 엔티티별 거래 적재"""
+        if self.client.indices.exists(index=self.index_name):
+            self.client.indices.delete(index=self.index_name)
+        self.client.indices.create(index=self.index_name, body=HC_MAPPING)
+        
+        result = stream_bulk(
+            self.client, self.index_name,
+            synthetic_data.generate_entity_transactions(entities, intervals, interval_minutes, rate, seed=seed),
+            progress_every=100000
+        )
+        print_bulk_errors(result, "다중 엔티티 거래")
+        return result
+
+    def ingest_interval(self, entities, interval_end, interval_minutes=DEFAULT_INTERVAL_MINUTES, rate=0.5, seed=42):
+        """interval_end 에 끝난 구간 하나의 거래 적재 (실시간 유입 흉내)"""
+        return stream_bulk(
+            self.client, self.index_name,
+            synthetic_data.generate_entity_transactions(entities, 1, interval_minutes, rate, interval_end, seed=seed)
+        )
+
+    def create_detector(self, config):
+        """같은 이름의 탐지기가 있으면 중지 / 삭제 후 새로 생성 → 탐지기 ID"""
+        existing = find_detector_id(self.client, config["name"])
+        if existing:
+            self.delete_detector(existing)
+        response = self.client.transport.perform_request("POST", AD_BASE, body=config)
+        return response["_id"]
+
+    def delete_detector(self, detector_id):
+        """실시간 탐지 중지 후 탐지기 삭제"""
+        try:
+            self.client.transport.perform_request("POST", f"{AD_BASE}/{detector_id}/_stop")
+        except Exception:
+            pass  # 이미 중지된 탐지기
+        self.client.transport.perform_request("DELETE", f"{AD_BASE}/{detector_id}")
+
+    def start_detector(self, detector_id):
+        """실시간 탐지 시작"""
+        return self.client.transport.perform_request("POST", f"{AD_BASE}/{detector_id}/_start")
+
+    def profile(self, detector_id, types=PROFILE_TYPES):
+        """탐지기 프로파일 (state / init_progress / 모델 메모리 / 활성 엔티티)"""
+        return self.client.transport.perform_request("GET", f"{AD_BASE}/{detector_id}/_profile/{types}")
+
+    def total_entities(self, detector_id):
+        """탐지기가 본 전체 엔티티 수 (카디널리티 조회라 비용이 커서 마지막에 한 번만 호출)"""
+        return self.profile(detector_id, "total_entities").get("total_entities")
+
+    def wait_for_init(self, detector_id, timeout=1800, poll_interval=10):
+        """모델 초기화(콜드 스타트) 완료 대기
+        
+        반환값: {"cold_start_seconds" (완료 못 하면 None), "state", "timeline": [{"elapsed", "state", "init", ...}]}
+        """
+        start_time = time.time()
+        timeline = []
+        while True:
+            elapsed = time.time() - start_time
+            profile = self.profile(detector_id)
+            init = parse_percentage(profile.get("init_progress", {}).get("percentage"))
+            state = profile.get("state")
+            timeline.append({
+                "elapsed": round(elapsed, 1),
+                "state": state,
+                "init": init,
+                "active_entities": profile.get("active_entities"),
+                "model_bytes": profile.get("total_size_in_bytes")
+            })
+            print(f"   ⏳ {elapsed:6.0f}초: {state} (초기화 {init:.0f}%, 활성 엔티티 {profile.get('active_entities') or 0:,})")
+            
+            if state == "RUNNING" and init >= 100:
+                return {"cold_start_seconds": elapsed, "state": state, "timeline": timeline}
+            if elapsed >= timeout:
+                return {"cold_start_seconds": None, "state": state, "timeline": timeline}
+            time.sleep(poll_interval)
+
+    def node_capacity(self):
+        """노드별 모델 메모리 한도 {노드 이름: {"heap_max_bytes", "model_limit_bytes"}}"""
+        settings = self.client.cluster.get_settings(include_defaults=True, flat_settings=True)
+        percent = float(
+            settings.get("transient", {}).get(MODEL_SIZE_SETTING)
+            or settings.get("persistent", {}).get(MODEL_SIZE_SETTING)
+            or settings.get("defaults", {}).get(MODEL_SIZE_SETTING)
+            or DEFAULT_MODEL_MAX_SIZE_PERCENT
+        )
+        nodes = self.client.nodes.stats(metric="jvm")["nodes"]
+        return {
+            node["name"]: {
+                "heap_max_bytes": node["jvm"]["mem"]["heap_max_in_bytes"],
+                "heap_used_bytes": node["jvm"]["mem"]["heap_used_in_bytes"],
+                "model_limit_bytes": node["jvm"]["mem"]["heap_max_in_bytes"] * percent,
+                "model_max_size_percent": percent
+            }
+            for node in nodes.values()
+        }
+
+    def plugin_stats(self):
+        """AD 플러그인 노드 통계 합계 (모델 수, HC 실행 요청 / 실패 수)"""
+        response = self.client.transport.perform_request("GET", "/_plugins/_anomaly_detection/stats")
+        totals = {"model_count": 0, "ad_hc_execute_request_count": 0, "ad_hc_execute_failure_count": 0}
+        for node in response.get("nodes", {}).values():
+            for key in totals:
+                totals[key] += node.get(key, 0) or 0
+        return totals
+
+    def interval_throughput(self, detector_id, since_ms, interval_minutes=DEFAULT_INTERVAL_MINUTES):
+        """결과 인덱스에서 탐지 구간별 엔티티 결과 수 / 이상 수 / 실행 시간
+        
+        반환값: [{"start", "entities", "anomalies", "execution_avg_ms", "execution_max_ms"}]
+        """
+        response = self.client.transport.perform_request("POST", f"{AD_BASE}/results/_search", body={
+            "size": 0,
+            "query": {"bool": {"filter": [
+                {"term": {"detector_id": detector_id}},
+                {"range": {"data_start_time": {"gte": since_ms, "format": "epoch_millis"}}}
+            ]}},
+            "aggs": {
+                "intervals": {
+                    "date_histogram": {"field": "data_start_time", "fixed_interval": f"{interval_minutes}m", "min_doc_count": 1},
+                    "aggs": {
+                        "anomalies": {"filter": {"range": {"anomaly_grade": {"gt": 0}}}},
+                        "execution_ms": {"stats": {"script": {
+                            "source": "doc['execution_end_time'].value.toInstant().toEpochMilli()"
+                                      " - doc['execution_start_time'].value.toInstant().toEpochMilli()"
+                        }}}
+                    }
+                }
+            }
+        })
+        return [
+            {
+                "start": bucket["key"],
+                "entities": bucket["doc_count"],
+                "anomalies": bucket["anomalies"]["doc_count"],
+                "execution_avg_ms": bucket["execution_ms"]["avg"],
+                "execution_max_ms": bucket["execution_ms"]["max"]
+            }
+            for bucket in response.get("aggregations", {}).get("intervals", {}).get("buckets", [])
+        ]
+
+    def observe(self, detector_id, entities, intervals, interval_minutes=DEFAULT_INTERVAL_MINUTES, rate=0.5, seed=42):
+        """구간 경계마다 끝난 구간의 거래를 적재하고 프로파일 스냅숏 기록"""
+        interval_seconds = interval_minutes * 60
+        snapshots = []
+        for i in range(intervals):
+            next_boundary = (int(time.time()) // interval_seconds + 1) * interval_seconds
+            time.sleep(max(0, next_boundary - time.time()) + 1)
+            interval_end = datetime.datetime.fromtimestamp(next_boundary, datetime.timezone.utc).replace(tzinfo=None)
+            
+            ingest = self.ingest_interval(entities, interval_end, interval_minutes, rate, seed)
+            profile = self.profile(detector_id)
+            snapshots.append({
+                "interval_end": next_boundary * 1000,
+                "ingested": ingest["success"],
+                "active_entities": profile.get("active_entities"),
+                "model_bytes": profile.get("total_size_in_bytes")
+            })
+            print(f"   📥 구간 {i + 1}/{intervals} ({format_millis(next_boundary * 1000)}): 거래 {ingest['success']:,}건 적재, "
+                  f"활성 엔티티 {profile.get('active_entities') or 0:,}, 모델 {(profile.get('total_size_in_bytes') or 0) / 1024 ** 2:,.1f}MB")
+        # 마지막 구간이 window_delay 뒤에 실행될 때까지 대기
+        time.sleep(interval_seconds + 60)
+        return snapshots
+
+    def run(self, entities=DEFAULT_ENTITIES, category_fields=None, history_intervals=DEFAULT_HISTORY_INTERVALS,
+            interval_minutes=DEFAULT_INTERVAL_MINUTES, rate=0.5, shingle_size=DEFAULT_SHINGLE_SIZE,
+            observe_intervals=3, init_timeout=1800, keep=False, seed=42):
+        """데이터 적재 → 탐지기 생성 / 시작 → 콜드 스타트 → 관찰 → 메모리 / 처리량 보고서"""
+        category_fields = category_fields or CATEGORY_PRESETS["customer"]
+        report = {
+            "entities": entities, "category_fields": category_fields, "history_intervals": history_intervals,
+            "interval_minutes": interval_minutes, "shingle_size": shingle_size, "rate": rate
+        }
+        
+        print(f"📊 다중 엔티티 거래 적재: 고객 {entities:,}명 × {history_intervals}개 구간 ({interval_minutes}분)")
+        load = self.setup_data(entities, history_intervals, interval_minutes, rate, seed)
+        report["load"] = {key: load[key] for key in ("success", "failed", "elapsed", "docs_per_sec")}
+        print(f"✅ {load['success']:,}건 적재 ({load['docs_per_sec']:,.0f}건/초)")
+        
+        config = hc_detector_config(f"hc_{'_'.join(category_fields)}_detector", self.index_name, category_fields,
+                                    interval_minutes, shingle_size)
+        detector_id = self.create_detector(config)
+        report["detector_id"] = detector_id
+        print(f"✅ 다중 엔티티 탐지기 생성 (ID: {detector_id}, category_field: {category_fields})")
+        
+        try:
+            stats_before = self.plugin_stats()
+            started_at = int(time.time() * 1000)
+            self.start_detector(detector_id)
+            print("\n🧊 콜드 스타트 대기")
+            report["cold_start"] = self.wait_for_init(detector_id, init_timeout)
+            
+            print("\n⏱️ 실시간 구간 관찰")
+            report["observations"] = self.observe(detector_id, entities, observe_intervals, interval_minutes, rate, seed)
+            
+            profile = self.profile(detector_id)
+            stats_after = self.plugin_stats()
+            active = profile.get("active_entities") or 0
+            model_bytes = profile.get("total_size_in_bytes") or 0
+            bytes_per_entity = model_bytes / active if active else None
+            capacity = self.node_capacity()
+            for node in capacity.values():
+                node["estimated_entities"] = int(node["model_limit_bytes"] / bytes_per_entity) if bytes_per_entity else None
+            
+            report["memory"] = {
+                "total_entities": self.total_entities(detector_id),
+                "active_entities": active,
+                "model_bytes": model_bytes,
+                "bytes_per_entity": bytes_per_entity,
+                "model_count": stats_after["model_count"],
+                "nodes": capacity
+            }
+            report["throughput"] = self.interval_throughput(detector_id, started_at, interval_minutes)
+            report["hc_execute"] = {
+                key: stats_after[key] - stats_before[key]
+                for key in ("ad_hc_execute_request_count", "ad_hc_execute_failure_count")
+            }
+        finally:
+            if not keep:
+                try:
+                    self.delete_detector(detector_id)
+                except Exception as e:
+                    print(f"⚠️ 탐지기 정리 실패: {e}")
+        
+        return report
+
+
+def print_hc_report(report):
+    """다중 엔티티 탐지기 벤치마크 요약 출력"""
+    print("\n" + "=" * 65)
+    print(f"📋 다중 엔티티 탐지기 벤치마크 (category_field: {report['category_fields']}, 고객 {report['entities']:,}명)")
+    print("=" * 65)
+    
+    cold_start = report.get("cold_start", {})
+    if cold_start.get("cold_start_seconds") is not None:
+        print(f"   🧊 콜드 스타트: {cold_start['cold_start_seconds']:.0f}초")
+    else:
+        print(f"   🧊 콜드 스타트: 제한 시간 내 미완료 (상태: {cold_start.get('state')})")
+    
+    memory = report.get("memory")
+    if memory:
+        print(f"   🧠 모델 메모리: {memory['model_bytes'] / 1024 ** 2:,.1f}MB, 활성 엔티티 {memory['active_entities']:,}"
+              f" / 전체 {memory['total_entities'] or 0:,}")
+        if memory["bytes_per_entity"]:
+            print(f"      엔티티당 {memory['bytes_per_entity'] / 1024:,.1f}KB")
+        for name, node in memory["nodes"].items():
+            estimate = f"{node['estimated_entities']:,}개" if node["estimated_entities"] else "추정 불가"
+            print(f"      {name}: 힙 {node['heap_max_bytes'] / 1024 ** 3:,.1f}GB × {node['model_max_size_percent']:.0%}"
+                  f" = {node['model_limit_bytes'] / 1024 ** 2:,.0f}MB → 수용 가능 엔티티 약 {estimate}")
+    
+    throughput = report.get("throughput") or []
+    if throughput:
+        print("   ⚙️ 구간별 처리량:")
+        for interval in throughput:
+            print(f"      {format_millis(interval['start'])}: 엔티티 {interval['entities']:,}개, 이상 {interval['anomalies']:,}개, "
+                  f"실행 평균 {interval['execution_avg_ms'] or 0:,.0f}ms / 최대 {interval['execution_max_ms'] or 0:,.0f}ms")
+    hc_execute = report.get("hc_execute")
+    if hc_execute:
+        print(f"   📨 HC 실행 요청 {hc_execute['ad_hc_execute_request_count']:,}회 "
+              f"(실패 {hc_execute['ad_hc_execute_failure_count']:,}회)")
+
+
+def parse_args(argv):
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="다중 엔티티(category_field) 이상 탐지기 벤치마크")
+    parser.add_argument("--entities", type=int, default=DEFAULT_ENTITIES, help="고객(엔티티) 수")
+    parser.add_argument("--category", choices=sorted(CATEGORY_PRESETS), default="customer", help="category_field 조합")
+    parser.add_argument("--history-intervals", type=int, default=DEFAULT_HISTORY_INTERVALS, help="콜드 스타트용 과거 구간 수")
+    parser.add_argument("--interval-minutes", type=int, default=DEFAULT_INTERVAL_MINUTES)
+    parser.add_argument("--rate", type=float, default=0.5, help="엔티티당 구간 평균 거래 수")
+    parser.add_argument("--shingle-size", type=int, default=DEFAULT_SHINGLE_SIZE)
+    parser.add_argument("--observe-intervals", type=int, default=3, help="콜드 스타트 후 관찰할 구간 수")
+    parser.add_argument("--init-timeout", type=int, default=1800, help="콜드 스타트 대기 한도 (초)")
+    parser.add_argument("--keep", action="store_true", help="끝난 뒤 탐지기를 삭제하지 않음")
+    parser.add_argument("--report-path", default="hc_benchmark_report.json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """다중 엔티티 탐지기 벤치마크 실행"""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    benchmark = HCDetectorBenchmark()
+    try:
+        report = benchmark.run(
+            args.entities, CATEGORY_PRESETS[args.category], args.history_intervals, args.interval_minutes,
+            args.rate, args.shingle_size, args.observe_intervals, args.init_timeout, args.keep
+        )
+    except Exception as e:
+        print(f"❌ 다중 엔티티 탐지기 벤치마크 실패: {e}")
+        return 1
+    
+    print_hc_report(report)
+    with open(args.report_path, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, ensure_ascii=False, indent=2)
+    print(f"\n💾 보고서 저장: {args.report_path}")
+    return 0 if report.get("cold_start", {}).get("cold_start_seconds") is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Anomaly Detection 과거 구간 일괄 분석 (historical analysis)
+=========================================================
+
+실시간 탐지는 detection_interval 이 실제로 흘러가야 결과가 쌓이므로, 이미 적재된 수개월치
+데이터는 점수가 매겨지지 않습니다. 이 모듈은 탐지기별로 과거 구간 분석 작업을 시작하고,
+작업 진행률을 적응형 주기로 폴링한 뒤, 결과 인덱스의 anomaly_grade 를 페이지 단위로 스트리밍합니다.
+
+- 시작: POST _plugins/_anomaly_detection/detectors/<id>/_start {"start_time", "end_time"}
+- 진행률: GET _plugins/_anomaly_detection/detectors/<id>?task=true → historical_analysis_task
+- 결과: POST _plugins/_anomaly_detection/detectors/results/_search (task_id 필터)
+
+사용 예:
+    python anomaly_historical.py --detector-name realtime_transaction_anomaly_detector --days 30
+    python anomaly_historical.py --detector-id abc123 --start 2025-07-13 --end 2025-08-12 --min-grade 0.1 --output grades.jsonl
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import sys
+import json
+import time
+import argparse
+import datetime
+from opensearch_client import get_client
+
+AD_BASE = "/_plugins/_anomaly_detection/detectors"
+TERMINAL_STATES = {"FINISHED", "FAILED", "STOPPED"}
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_TIMEOUT = 3600
+MIN_POLL_INTERVAL = 1.0
+MAX_POLL_INTERVAL = 30.0
+
+
+def to_epoch_millis(value):
+    """datetime / 'YYYY-MM-DD[THH:MM:SS]' 문자열 / epoch ms → epoch ms"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def format_millis(millis):
+    """epoch ms → 'YYYY-MM-DD HH:MM' (UTC)"""
+    return datetime.datetime.fromtimestamp(millis / 1000, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+
+def index_time_range(client, index_name, time_field="@timestamp"):
+    """인덱스 시간 필드의 (최소, 최대) epoch ms - 데이터가 없으면 (None, None)"""
+    response = client.search(index=index_name, body={
+        "size": 0,
+        "aggs": {"min_time": {"min": {"field": time_field}}, "max_time": {"max": {"field": time_field}}}
+    })
+    aggregations = response["aggregations"]
+    if aggregations["min_time"]["value"] is None:
+        return None, None
+    return int(aggregations["min_time"]["value"]), int(aggregations["max_time"]["value"])
+
+
+def find_detector_id(client, name):
+    """이름으로 탐지기 ID 조회 (없으면 None)"""
+    response = client.transport.perform_request(
+        "POST", f"{AD_BASE}/_search", body={"query": {"term": {"name.keyword": name}}}
+    )
+    hits = response.get("hits", {}).get("hits", [])
+    return hits[0]["_id"] if hits else None
+
+
+def _result_record(source):
+    """결과 문서 → {"start", "end", "grade", "confidence", "score", "features", "entity"}"""
+    return {
+        "start": source.get("data_start_time"),
+        "end": source.get("data_end_time"),
+        "grade": source.get("anomaly_grade", 0.0) or 0.0,
+        "confidence": source.get("confidence"),
+        "score": source.get("anomaly_score"),
+        "features": {
+            feature.get("feature_name", feature.get("feature_id")): feature.get("data")
+            for feature in source.get("feature_data", [])
+        },
+        "entity": {item["name"]: item["value"] for item in source.get("entity", [])} or None,
+        "error": source.get("error")
+    }
+
+
+class HistoricalAnalysisRunner:
+    def __init__(self, client=None):
+        """OpenSearch 클라이언트 설정"""
+        self.client = client or get_client()
+
+    def start(self, detector_id, start_time, end_time):
+        """과거 구간 분석 작업 시작 → 작업 ID"""
+        response = self.client.transport.perform_request(
+            "POST", f"{AD_BASE}/{detector_id}/_start",
+            body={"start_time": to_epoch_millis(start_time), "end_time": to_epoch_millis(end_time)}
+        )
+        return response.get("_id")
+
+    def stop(self, detector_id):
+        """진행 중인 과거 구간 분석 중지"""
+        return self.client.transport.perform_request(
+            "POST", f"{AD_BASE}/{detector_id}/_stop", params={"historical": "true"}
+        )
+
+    def task(self, detector_id):
+        """탐지기의 최신 과거 구간 분석 작업 상태 (없으면 None)"""
+        response = self.client.transport.perform_request(
+            "GET", f"{AD_BASE}/{detector_id}", params={"task": "true"}
+        )
+        return response.get("historical_analysis_task")
+
+    def wait(self, detector_ids, timeout=DEFAULT_TIMEOUT, min_interval=MIN_POLL_INTERVAL,
+             max_interval=MAX_POLL_INTERVAL):
+        """모든 작업이 종료 상태가 될 때까지 폴링 → {탐지기 ID: 마지막 작업 상태}
+        
+        진행률 증가 속도로 남은 시간을 추정해 그 1/4 만큼 (min_interval ~ max_interval) 기다리고,
+        진행률이 아직 0 이면 min_interval 부터 두 배씩 늘려 기다립니다. 진행률이 바뀔 때만 출력하며,
+        여러 탐지기는 한 루프에서 함께 확인합니다. 시간 초과 시 TimeoutError 의 pending 에 미완료 탐지기 목록을 담습니다.
+        """
+        deadline = time.time() + timeout
+        started_at = time.time()
+        idle_interval = min_interval
+        states = {}
+        last_progress = {}
+        pending = list(detector_ids)
+        
+        while pending:
+            for detector_id in list(pending):
+                task = self.task(detector_id) or {}
+                states[detector_id] = task
+                progress = task.get("task_progress") or 0.0
+                if progress != last_progress.get(detector_id):
+                    last_progress[detector_id] = progress
+                    print(f"   ⏳ {detector_id}: {task.get('state', '?')} {progress * 100:.0f}%")
+                if task.get("state") in TERMINAL_STATES:
+                    pending.remove(detector_id)
+            
+            if not pending:
+                break
+            if time.time() >= deadline:
+                error = TimeoutError(f"과거 구간 분석 대기 시간 초과 ({timeout}초): {pending}")
+                error.pending = pending
+                raise error
+            
+            slowest = min(last_progress.get(detector_id, 0.0) for detector_id in pending)
+            if slowest > 0:
+                elapsed = time.time() - started_at
+                remaining = elapsed * (1 - slowest) / slowest
+                time.sleep(min(max_interval, max(min_interval, remaining / 4)))
+            else:
+                time.sleep(idle_interval)
+                idle_interval = min(max_interval, idle_interval * 2)
+        
+        return states
+
+    def iter_results(self, detector_id, task_id=None, min_grade=0.0, page_size=DEFAULT_PAGE_SIZE):
+        """결과 인덱스의 이상 점수를 data_start_time 순으로 페이지 단위 스트리밍
+        
+        같은 구간에 여러 결과(다중 엔티티)가 있을 수 있어 search_after 대신 마지막 시각부터
+        다시 조회하고, 그 시각에 이미 반환한 문서는 건너뜁니다. 한 시각의 결과가 페이지보다
+        많으면 페이지 크기를 늘려 다시 조회합니다.
+        """
+        filters = [{"term": {"detector_id": detector_id}}]
+        if task_id:
+            filters.append({"term": {"task_id": task_id}})
+        if min_grade > 0:
+            filters.append({"range": {"anomaly_grade": {"gt": min_grade}}})
+        
+        last_time = None
+        seen_at_last = set()
+        while True:
+            query_filters = filters + ([{"range": {"data_start_time": {"gte": last_time}}}] if last_time is not None else [])
+            response = self.client.transport.perform_request(
+                "POST", f"{AD_BASE}/results/_search",
+                body={
+                    "size": page_size,
+                    "query": {"bool": {"filter": query_filters}},
+                    "sort": [{"data_start_time": "asc"}]
+                }
+            )
+            hits = response.get("hits", {}).get("hits", [])
+            new_hits = [
+                hit for hit in hits
+                if not (hit["_source"].get("data_start_time") == last_time and hit["_id"] in seen_at_last)
+            ]
+            
+            if not new_hits:
+                if len(hits) == page_size:
+                    page_size *= 2
+                    continue
+                return
+            
+            for hit in new_hits:
+                yield _result_record(hit["_source"])
+            
+            page_last_time = hits[-1]["_source"].get("data_start_time")
+            at_last = {hit["_id"] for hit in hits if hit["_source"].get("data_start_time") == page_last_time}
+            seen_at_last = seen_at_last | at_last if page_last_time == last_time else at_last
+            last_time = page_last_time
+            if len(hits) < page_size:
+                return
+
+    def backfill(self, detector_ids, start_time, end_time, timeout=DEFAULT_TIMEOUT, min_grade=0.0,
+                 on_result=None):
+        """여러 탐지기의 과거 구간 분석 시작 → 완료 대기 → 결과 스트리밍 요약
+        
+        on_result(detector_id, record) 를 주면 결과마다 호출합니다 (파일 기록 등).
+        반환값: {탐지기 ID: {"task_id", "state", "error", "results", "anomalies", "max_grade", "top"}}
+        """
+        summary = {}
+        task_ids = {}
+        for detector_id in detector_ids:
+            try:
+                task_ids[detector_id] = self.start(detector_id, start_time, end_time)
+                print(f"✅ 과거 구간 분석 시작: {detector_id} (작업 ID: {task_ids[detector_id]})")
+            except Exception as e:
+                print(f"❌ 과거 구간 분석 시작 실패: {detector_id}: {e}")
+                summary[detector_id] = {"task_id": None, "state": "NOT_STARTED", "error": str(e)}
+        
+        try:
+            states = self.wait(list(task_ids), timeout) if task_ids else {}
+        except TimeoutError as e:
+            # 남겨 두면 같은 탐지기의 다음 start 가 "already running" 으로 실패하므로 중지 후 다시 발생
+            for detector_id in getattr(e, "pending", list(task_ids)):
+                try:
+                    self.stop(detector_id)
+                    print(f"⏹️ 시간 초과로 과거 구간 분석 중지: {detector_id}")
+                except Exception as stop_error:
+                    print(f"⚠️ 과거 구간 분석 중지 실패: {detector_id}: {stop_error}")
+            raise
+        
+        for detector_id, task_id in task_ids.items():
+            task = states.get(detector_id, {})
+            task_id = task.get("task_id") or task_id
+            result = {"task_id": task_id, "state": task.get("state"), "error": task.get("error"),
+                      "results": 0, "anomalies": 0, "max_grade": 0.0, "top": []}
+            
+            for record in self.iter_results(detector_id, task_id, min_grade):
+                result["results"] += 1
+                if record["grade"] > 0:
+                    result["anomalies"] += 1
+                    result["top"].append(record)
+                    result["top"] = sorted(result["top"], key=lambda item: item["grade"], reverse=True)[:10]
+                result["max_grade"] = max(result["max_grade"], record["grade"])
+                if on_result:
+                    on_result(detector_id, record)
+            summary[detector_id] = result
+        
+        return summary
+
+
+def print_backfill_summary(summary):
+    """탐지기별 과거 구간 분석 결과 요약 출력"""
+    print("\n📋 과거 구간 분석 결과")
+    for detector_id, result in summary.items():
+        if result.get("state") != "FINISHED":
+            print(f"   ❌ {detector_id}: {result.get('state')} {result.get('error') or ''}")
+            continue
+        print(f"   ✅ {detector_id}: 결과 {result['results']:,}건, 이상 {result['anomalies']:,}건, "
+              f"최대 등급 {result['max_grade']:.3f}")
+        for record in result["top"][:5]:
+            entity = f" {record['entity']}" if record["entity"] else ""
+            print(f"      - {format_millis(record['start'])}{entity}: 등급 {record['grade']:.3f} "
+                  f"(신뢰도 {record['confidence'] or 0:.2f})")
+
+
+def parse_args(argv):
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="Anomaly Detection 과거 구간 일괄 분석")
+    parser.add_argument("--detector-id", action="append", default=[], help="탐지기 ID (여러 번 지정 가능)")
+    parser.add_argument("--detector-name", action="append", default=[], help="탐지기 이름 (여러 번 지정 가능)")
+    parser.add_argument("--start", help="분석 시작 (YYYY-MM-DD[THH:MM:SS], 기본: --days 전)")
+    parser.add_argument("--end", help="분석 끝 (기본: 현재)")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--min-grade", type=float, default=0.0, help="이 등급 초과 결과만 조회")
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT)
+    parser.add_argument("--output", help="결과를 JSONL 로 기록할 경로")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """탐지기 과거 구간 분석 실행"""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    runner = HistoricalAnalysisRunner()
+    
+    end_time = args.end or datetime.datetime.now(datetime.timezone.utc)
+    start_time = args.start or datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=args.days)
+    
+    detector_ids = list(args.detector_id)
+    for name in args.detector_name:
+        detector_id = find_detector_id(runner.client, name)
+        if detector_id is None:
+            print(f"❌ 탐지기를 찾을 수 없습니다: {name}")
+            return 1
+        detector_ids.append(detector_id)
+    if not detector_ids:
+        print("❌ --detector-id 또는 --detector-name 을 지정하세요")
+        return 1
+    
+    print(f"🕰️ 과거 구간 분석: {format_millis(to_epoch_millis(start_time))} ~ {format_millis(to_epoch_millis(end_time))}")
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        on_result = None
+        if output:
+            on_result = lambda detector_id, record: output.write(
+                json.dumps(dict(record, detector_id=detector_id), ensure_ascii=False) + "\n"
+            )
+        summary = runner.backfill(detector_ids, start_time, end_time, args.timeout, args.min_grade, on_result)
+    except Exception as e:
+        print(f"❌ 과거 구간 분석 실패: {e}")
+        return 1
+    finally:
+        if output:
+            output.close()
+    
+    print_backfill_summary(summary)
+    return 0 if all(result.get("state") == "FINISHED" for result in summary.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
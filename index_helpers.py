@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+OpenSearch 인덱싱 공용 헬퍼
+벌크 삽입, 스트리밍 벌크 적재 및 검색 가능 시점(refresh) 대기 기능
+"""
+
+import time
+from opensearchpy import helpers
+
+# 청크 기본값 (http.max_content_length 기본 100MB 보다 충분히 작게 유지)
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_MAX_CHUNK_BYTES = 10 * 1024 * 1024
+DEFAULT_THREAD_COUNT = 4
+
+
+def wait_for_doc_count(client, index_name, expected_count, timeout=30, max_interval=2.0):
+    """명시적 _refresh 후 문서 수가 기대값에 도달할 때까지 대기"""
+    deadline = time.time() + timeout
+    interval = 0.1
+    
+    while True:
+        client.indices.refresh(index=index_name)
+        count = client.count(index=index_name)['count']
+        if count >= expected_count:
+            return count
+        
+        if time.time() >= deadline:
+            raise TimeoutError(
+                f"'{index_name}' 문서 수 대기 시간 초과: {count}/{expected_count}건 ({timeout}초)"
+            )
+        
+        time.sleep(interval)
+        interval = min(interval * 2, max_interval)
+
+
+def index_documents(client, index_name, documents, start_id=1, timeout=30):
+    """문서를 한 번의 벌크 요청으로 삽입하고 검색 가능해질 때까지 대기"""
+    bulk_body = []
+    for i, doc in enumerate(documents):
+        bulk_body.extend([
+            {"index": {"_index": index_name, "_id": i + start_id}},
+            doc
+        ])
+    
+    # refresh=wait_for: 다음 주기적 refresh 까지 응답을 보류 (강제 refresh 없음)
+    response = client.bulk(body=bulk_body, refresh="wait_for", request_timeout=timeout)
+    
+    if response.get('errors'):
+        failed = [item['index'] for item in response['items'] if 'error' in item['index']]
+        raise RuntimeError(
+            f"'{index_name}' 벌크 삽입 실패 {len(failed)}건: {failed[0]['error']}"
+        )
+    
+    # 최종 문서 수 확인
+    return wait_for_doc_count(client, index_name, len(documents), timeout=timeout)
+
+
+def stream_bulk(client, index_name, documents, chunk_size=DEFAULT_CHUNK_SIZE,
+                max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES, thread_count=DEFAULT_THREAD_COUNT,
+                max_errors=10, refresh=True, progress_every=None, start_id=None):
+    """문서 이터러블(제너레이터)을 청크 단위 병렬 벌크로 적재
+    
+    문서 수(chunk_size)와 바이트 크기(max_chunk_bytes) 중 먼저 도달하는 기준으로
+    청크를 나누고, thread_count 개의 청크를 동시에 전송합니다. 전체 문서를
+    메모리에 올리지 않으므로 수백만 건도 일정한 메모리로 적재할 수 있습니다.
+    start_id 를 지정하면 순번(i + start_id)을 문서 _id 로 사용합니다.
+    
+    반환값: {"success": 성공 건수, "failed": 실패 건수, "errors": 실패 항목 (최대 max_errors건),
+             "elapsed": 소요 시간(초), "docs_per_sec": 처리량}
+    """
+    result = {"success": 0, "failed": 0, "errors": []}
+    start_time = time.time()
+    
+    if start_id is None:
+        actions = ({"_index": index_name, "_source": doc} for doc in documents)
+    else:
+        actions = (
+            {"_index": index_name, "_id": i + start_id, "_source": doc}
+            for i, doc in enumerate(documents)
+        )
+    
+    for ok, item in helpers.parallel_bulk(
+        client,
+        actions,
+        thread_count=thread_count,
+        chunk_size=chunk_size,
+        max_chunk_bytes=max_chunk_bytes,
+        queue_size=thread_count,
+        raise_on_error=False,
+        raise_on_exception=False
+    ):
+        if ok:
+            result["success"] += 1
+        else:
+            result["failed"] += 1
+            if len(result["errors"]) < max_errors:
+                op_type, detail = next(iter(item.items()))
+                result["errors"].append({
+                    "op": op_type,
+                    "status": detail.get("status"),
+                    "error": detail.get("error") or detail.get("exception")
+                })
+        
+        processed = result["success"] + result["failed"]
+        if progress_every and processed % progress_every == 0:
+            print(f"   ⏳ {index_name}: {processed:,}건 처리")
+    
+    if refresh:
+        client.indices.refresh(index=index_name)
+    
+    result["elapsed"] = time.time() - start_time
+    result["docs_per_sec"] = result["success"] / result["elapsed"] if result["elapsed"] > 0 else 0
+    return result
+
+
+def print_bulk_errors(result, label):
+    """stream_bulk 결과의 실패 항목 출력"""
+    if not result["failed"]:
+        return
+    
+    print(f"   ⚠️ {label} 적재 실패: {result['failed']:,}건")
+    for error in result["errors"]:
+        print(f"      - [{error['status']}] {error['op']}: {str(error['error'])[:120]}")
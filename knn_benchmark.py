@@ -0,0 +1,1203 @@
+#!/usr/bin/env python3
+"""
+OpenSearch KNN 벤치마크
+======================
+
+대용량 벡터 코퍼스를 대상으로 다음 항목을 측정합니다:
+1. 벌크 적재 처리량 (docs/sec)
+2. 쿼리 지연 시간 분포 (p50/p95/p99)
+3. 동시성 단계별 처리량 (QPS)
+4. 정확 탐색 오라클(knn_oracle) 정답 대비 recall@k
+
+결과는 JSON 리포트로 저장됩니다.
+--dataset 을 지정하면 무작위 벡터 대신 표준 ANN 벤치마크 파일(knn_datasets)을 메모리 매핑으로 사용합니다.
+
+quant 모드는 float 기준 인덱스와 byte 벡터, faiss SQfp16, faiss PQ 인덱스를 나란히 만들어
+디스크/네이티브 메모리 사용량, 적재 속도, 지연 시간, recall 을 비교합니다.
+filter 모드는 필터 선택도별로 post-filter, knn filter 파라미터, script_score 정확 탐색의
+지연 시간 / 결과 수 / recall 을 비교합니다.
+hybrid 모드는 normalization-processor 검색 파이프라인(min_max / l2 정규화 x 산술 / 조화 평균 결합)을
+만들어 match + knn hybrid 쿼리를 어휘 전용 / 벡터 전용 검색과 지연 시간 / 관련성(nDCG@k) 으로 비교합니다.
+sweep 모드는 m / ef_construction / ef_search 그리드 전체를 측정하여
+recall-지연 파레토 프런티어와 목표 recall 을 만족하는 권장 매핑을 출력합니다.
+
+사용 예:
+    python knn_benchmark.py run --corpus-size 100000 --dimension 128 --engine faiss
+    python knn_benchmark.py run --space-type cosinesimil --m 32 --ef-construction 256 --ef-search 200
+    python knn_benchmark.py run --dataset sift-128-euclidean.hdf5 --engine faiss --query-count 1000
+    python knn_benchmark.py quant --engine faiss --dimension 128 --pq-m 16
+    python knn_benchmark.py filter --engine lucene --selectivity 0.01 0.05 0.2 0.5 0.9
+    python knn_benchmark.py hybrid --engine lucene --weights 0.3 0.7 --normalizations min_max l2
+    python knn_benchmark.py sweep --engine nmslib --m 8 16 32 --ef-construction 64 128 256 \\
+        --ef-search 32 64 128 256 --target-recall 0.95
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import sys
+import json
+import time
+import argparse
+import datetime
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from opensearch_client import get_client
+from index_helpers import print_bulk_errors
+from knn_vectors import bulk_ingest_vectors
+from knn_oracle import ExactKNN, SPACE_TYPES, recall_at_k, relevance_at_k
+from knn_datasets import load_dataset, sample_queries
+from knn_search import (
+    FILTER_STRATEGIES, HYBRID_NORMALIZATIONS, HYBRID_COMBINATIONS,
+    build_filtered_knn_body, build_hybrid_body, build_normalization_pipeline,
+    put_search_pipeline, delete_search_pipeline
+)
+
+ENGINES = ["lucene", "nmslib", "faiss"]
+
+DEFAULT_CONFIG = {
+    "index_name": "knn-benchmark",
+    "corpus_size": 10000,
+    "dimension": 128,
+    "space_type": "l2",
+    "engine": "lucene",
+    "m": 16,
+    "ef_construction": 128,
+    "ef_search": 100,
+    "k": 10,
+    "query_count": 200,
+    "warmup_queries": 20,
+    "concurrency": [1, 4, 8],
+    "shards": 1,
+    "chunk_size": 500,
+    "force_merge": True,
+    "seed": 42,
+    "dataset": None,
+    "dataset_queries": None,
+    "dataset_ground_truth": None,
+    "dataset_limit": None,
+    "report_path": "knn_benchmark_report.json"
+}
+
+DEFAULT_FILTER = {
+    "selectivities": [0.01, 0.05, 0.2, 0.5, 0.9],
+    "strategies": FILTER_STRATEGIES,
+    "target_recall": 0.95,
+    "report_path": "knn_filter_report.json"
+}
+
+DEFAULT_HYBRID = {
+    "normalizations": HYBRID_NORMALIZATIONS,
+    "combinations": HYBRID_COMBINATIONS,
+    # hybrid 하위 쿼리 순서 (어휘, 벡터) 의 결합 가중치
+    "weights": [0.3, 0.7],
+    "topics": 50,
+    "word_leakage": 0.3,
+    "query_noise": 3.0,
+    "report_path": "knn_hybrid_report.json"
+}
+
+# 합성 토픽 코퍼스 어휘 크기 (토픽별 전용 단어 / 공통 배경 단어)
+TOPIC_VOCABULARY = 20
+BACKGROUND_VOCABULARY = 2000
+
+QUANT_VARIANTS = ["float", "byte", "sq_fp16", "pq"]
+
+DEFAULT_QUANT = {
+    "variants": QUANT_VARIANTS,
+    "pq_m": 16,
+    "pq_code_size": 8,
+    "pq_training_size": 10000,
+    "projection_vectors": 100_000_000,
+    "report_path": "knn_quant_report.json"
+}
+
+# 벡터 차원당 저장 바이트 (HNSW 그래프 메모리 추정용)
+BYTES_PER_DIMENSION = {"float": 4, "byte": 1, "sq_fp16": 2}
+
+# variant 별 고정 엔진 (float 은 설정된 engine 사용)
+VARIANT_ENGINES = {"byte": "lucene", "sq_fp16": "faiss", "pq": "faiss"}
+
+DEFAULT_SWEEP = {
+    "m": [8, 16, 32],
+    "ef_construction": [64, 128, 256],
+    "ef_search": [32, 64, 128, 256],
+    "target_recall": 0.95,
+    "report_path": "knn_sweep_report.json"
+}
+
+
+def ef_search_mode(engine):
+    """엔진별 ef_search 적용 방식"""
+    if engine == "nmslib":
+        return "index_setting"  # knn.algo_param.ef_search (동적 변경 가능)
+    if engine == "faiss":
+        return "method_parameter"  # 매핑 method.parameters (변경 시 재색인 필요)
+    return "query_k"  # lucene: 쿼리의 k 가 후보 수(ef_search) 역할
+
+
+def build_knn_mapping(config, bulk_load=True):
+    """엔진별 HNSW 파라미터가 반영된 knn_vector 인덱스 매핑 생성
+    
+    bulk_load=False 이면 벤치마크 적재용 설정(refresh 비활성화, 레플리카 0)을 제외합니다.
+    """
+    engine = config["engine"]
+    parameters = {
+        "m": config["m"],
+        "ef_construction": config["ef_construction"]
+    }
+    index_settings = {
+        "knn": True,
+        "number_of_shards": config["shards"]
+    }
+    if bulk_load:
+        # 적재 중에는 주기적 refresh 를 끄고 종료 후 한 번만 수행
+        index_settings["number_of_replicas"] = 0
+        index_settings["refresh_interval"] = "-1"
+    
+    # ef_search 적용 위치가 엔진마다 다름
+    if ef_search_mode(engine) == "index_setting":
+        index_settings["knn.algo_param.ef_search"] = config["ef_search"]
+    elif ef_search_mode(engine) == "method_parameter":
+        parameters["ef_search"] = config["ef_search"]
+    
+    return {
+        "settings": {"index": index_settings},
+        "mappings": {
+            "properties": {
+                "vector": {
+                    "type": "knn_vector",
+                    "dimension": config["dimension"],
+                    "method": {
+                        "name": "hnsw",
+                        "space_type": config["space_type"],
+                        "engine": engine,
+                        "parameters": parameters
+                    }
+                }
+            }
+        }
+    }
+
+
+def generate_vectors(count, dimension, seed):
+    """재현 가능한 float32 가우시안 벡터 생성"""
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((count, dimension), dtype=np.float32)
+
+
+def percentile_summary(latencies_ms):
+    """지연 시간 목록의 백분위 요약"""
+    values = np.asarray(latencies_ms)
+    return {
+        "count": int(len(values)),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max())
+    }
+
+
+class KNNBenchmark:
+    def __init__(self, config=None, client=None):
+        """벤치마크 설정 및 클라이언트 초기화"""
+        self.config = dict(DEFAULT_CONFIG, **(config or {}))
+        # 최대 동시성만큼 커넥션 풀 확보
+        self.client = client or get_client(pool_size=max(self.config["concurrency"]) + 2)
+        self.corpus = None
+        self.queries = None
+        self.truth = None
+
+    def prepare_data(self):
+        """코퍼스, 쿼리 벡터 및 정답 top-k 생성 (한 번만 계산하여 재사용)"""
+        cfg = self.config
+        if self.corpus is None and cfg["dataset"]:
+            self.load_dataset()
+        elif self.corpus is None:
+            self.corpus = generate_vectors(cfg["corpus_size"], cfg["dimension"], cfg["seed"])
+            self.queries = generate_vectors(cfg["query_count"], cfg["dimension"], cfg["seed"] + 1)
+            self.truth, _ = ExactKNN(self.corpus, cfg["space_type"]).search(self.queries, cfg["k"])
+
+    def load_dataset(self):
+        """파일 데이터셋(.fvecs/.bvecs/.npy/.hdf5)을 메모리 매핑으로 열고 크기/차원/space_type 을 설정에 반영
+        
+        정답은 파일의 이웃 목록을 우선 사용하고, 없거나 k 보다 짧으면 코퍼스를 블록 단위로 읽어 계산합니다.
+        """
+        cfg = self.config
+        dataset = load_dataset(cfg["dataset"], cfg["dataset_queries"], cfg["dataset_ground_truth"], cfg["dataset_limit"])
+        if dataset["space_type"] and dataset["space_type"] != cfg["space_type"]:
+            print(f"   ℹ️ 데이터셋 거리 척도에 맞춰 space_type 을 {dataset['space_type']} 로 변경")
+            cfg["space_type"] = dataset["space_type"]
+        
+        self.corpus = dataset["corpus"]
+        queries = dataset["queries"] if dataset["queries"] is not None else sample_queries(self.corpus, cfg["query_count"], cfg["seed"] + 1)
+        self.queries = queries[:cfg["query_count"]]
+        cfg.update(corpus_size=len(self.corpus), dimension=dataset["dimension"], query_count=len(self.queries))
+        
+        neighbors = dataset["neighbors"]
+        if neighbors is not None and neighbors.shape[1] >= cfg["k"]:
+            self.truth, truth_source = neighbors[:len(self.queries), :cfg["k"]], "파일"
+        else:
+            self.truth, _ = ExactKNN(self.corpus, cfg["space_type"]).search(self.queries, cfg["k"])
+            truth_source = "정확 탐색 오라클"
+        print(f"📂 데이터셋 '{dataset['name']}': {cfg['corpus_size']:,}건 x {cfg['dimension']}차원, "
+              f"쿼리 {cfg['query_count']:,}건 (정답: {truth_source})")
+
+    def knn_query(self, vector):
+        """단일 벡터 KNN 쿼리 본문"""
+        k = self.config["k"]
+        # lucene 은 k 를 후보 수로 사용하므로 ef_search 만큼 후보를 찾고 상위 size 개만 반환
+        candidates = max(k, self.config["ef_search"]) if ef_search_mode(self.config["engine"]) == "query_k" else k
+        return {
+            "size": k,
+            "_source": False,
+            "query": {
+                "knn": {
+                    "vector": {
+                        "vector": vector.tolist(),
+                        "k": candidates
+                    }
+                }
+            }
+        }
+
+    def apply_ef_search(self, ef_search):
+        """기존 인덱스에 ef_search 적용 (faiss 는 재색인이 필요하므로 False 반환)"""
+        mode = ef_search_mode(self.config["engine"])
+        if mode == "method_parameter" and ef_search != self.config["ef_search"]:
+            return False
+        
+        self.config["ef_search"] = ef_search
+        if mode == "index_setting":
+            self.client.indices.put_settings(
+                index=self.config["index_name"],
+                body={"index": {"knn.algo_param.ef_search": ef_search}}
+            )
+        return True
+
+    def index_size_bytes(self):
+        """인덱스 프라이머리 저장 용량 (bytes)"""
+        stats = self.client.indices.stats(index=self.config["index_name"], metric="store")
+        return stats["_all"]["primaries"]["store"]["size_in_bytes"]
+
+    def search(self, vector, body=None, params=None):
+        """KNN 검색 1회 실행 → (문서 순번 목록, 클라이언트 지연 ms, 서버 took ms)
+        
+        body 를 지정하면 기본 KNN 쿼리 대신 해당 검색 본문을 그대로 실행합니다.
+        params: URL 파라미터 (예: {"search_pipeline": 파이프라인 ID})
+        """
+        body = body or self.knn_query(vector)
+        start_time = time.perf_counter()
+        response = self.client.search(index=self.config["index_name"], body=body, params=params)
+        latency = (time.perf_counter() - start_time) * 1000
+        ids = [int(hit["_id"]) for hit in response["hits"]["hits"]]
+        return ids, latency, response.get("took", 0)
+
+    def build_mapping(self):
+        """벤치마크 인덱스 매핑"""
+        return build_knn_mapping(self.config)
+
+    def ingest_vectors(self):
+        """적재할 벡터 배열 (_id 는 행 순번)"""
+        return self.corpus
+
+    def extra_fields(self):
+        """벡터 외에 함께 적재할 컬럼 {필드명: 값 배열}"""
+        return None
+
+    def create_index(self):
+        """벤치마크 인덱스 재생성 (매핑 차원을 확정하기 위해 데이터 먼저 준비)"""
+        self.prepare_data()
+        index_name = self.config["index_name"]
+        if self.client.indices.exists(index=index_name):
+            self.client.indices.delete(index=index_name)
+        
+        self.client.indices.create(index=index_name, body=self.build_mapping())
+        print(f"✅ 인덱스 '{index_name}' 생성 ({self.config['engine']}, {self.config['space_type']}, "
+              f"m={self.config['m']}, ef_construction={self.config['ef_construction']})")
+
+    def ingest(self):
+        """코퍼스 벌크 적재 및 처리량 측정"""
+        cfg = self.config
+        self.prepare_data()
+        print(f"\n📥 벡터 적재: {cfg['corpus_size']:,}건 x {cfg['dimension']}차원")
+        
+        vectors = self.ingest_vectors()
+        result = bulk_ingest_vectors(
+            self.client, cfg["index_name"], vectors,
+            batch_size=cfg["chunk_size"],
+            dtype=vectors.dtype,
+            extra_fields=self.extra_fields()
+        )
+        print_bulk_errors(result, "벡터")
+        
+        # 적재 완료 후 refresh 복원 및 세그먼트 병합 (검색 성능 안정화)
+        self.client.indices.put_settings(index=cfg["index_name"], body={"index": {"refresh_interval": "1s"}})
+        merge_elapsed = 0.0
+        if cfg["force_merge"]:
+            start_time = time.time()
+            self.client.indices.forcemerge(index=cfg["index_name"], max_num_segments=1, request_timeout=3600)
+            merge_elapsed = time.time() - start_time
+        self.client.indices.refresh(index=cfg["index_name"])
+        
+        print(f"   ✅ 적재 {result['success']:,}건, {result['elapsed']:.1f}초 ({result['docs_per_sec']:,.0f}건/초, "
+              f"{result['bytes'] / 1024 ** 2 / max(result['elapsed'], 1e-9):,.1f}MB/초)")
+        if cfg["force_merge"]:
+            print(f"   ✅ 세그먼트 병합 {merge_elapsed:.1f}초")
+        
+        return {
+            "docs": result["success"],
+            "failed": result["failed"],
+            "elapsed_sec": result["elapsed"],
+            "docs_per_sec": result["docs_per_sec"],
+            "bytes_sent": result["bytes"],
+            "force_merge_sec": merge_elapsed
+        }
+
+    def measure_latency(self):
+        """순차 실행 기준 쿼리 지연 시간 및 recall@k 측정"""
+        cfg = self.config
+        print(f"\n⏱️ 지연 시간 측정: 쿼리 {cfg['query_count']}건 (워밍업 {cfg['warmup_queries']}건)")
+        
+        self.prepare_data()
+        for vector in self.queries[:cfg["warmup_queries"]]:
+            self.search(vector)
+        
+        retrieved, latencies, took = [], [], []
+        for vector in self.queries:
+            ids, latency, server_took = self.search(vector)
+            retrieved.append(ids)
+            latencies.append(latency)
+            took.append(server_took)
+        
+        recall = recall_at_k(retrieved, self.truth, cfg["k"])
+        
+        summary = percentile_summary(latencies)
+        summary["server_took_p50_ms"] = float(np.percentile(took, 50))
+        print(f"   ✅ p50 {summary['p50_ms']:.2f}ms / p95 {summary['p95_ms']:.2f}ms / p99 {summary['p99_ms']:.2f}ms")
+        print(f"   🎯 recall@{cfg['k']}: {recall:.4f}")
+        
+        return summary, recall
+
+    def measure_throughput(self, concurrency):
+        """지정 동시성에서 전체 쿼리 세트를 실행하여 QPS 측정"""
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(self.search, self.queries))
+        elapsed = time.perf_counter() - start_time
+        
+        summary = percentile_summary([latency for _, latency, _ in results])
+        summary["concurrency"] = concurrency
+        summary["qps"] = len(results) / elapsed
+        print(f"   ✅ 동시성 {concurrency:>3}: {summary['qps']:,.1f} QPS (p99 {summary['p99_ms']:.2f}ms)")
+        return summary
+
+    def run(self):
+        """전체 벤치마크 실행 후 리포트 반환"""
+        cfg = self.config
+        print("🏁 OpenSearch KNN 벤치마크")
+        print("=" * 60)
+        
+        self.create_index()
+        ingest = self.ingest()
+        latency, recall = self.measure_latency()
+        
+        print(f"\n🚀 동시성별 처리량 측정: {cfg['concurrency']}")
+        throughput = [self.measure_throughput(level) for level in cfg["concurrency"]]
+        
+        report = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "config": cfg,
+            "ef_search_mode": ef_search_mode(cfg["engine"]),
+            "ingest": ingest,
+            "latency": latency,
+            f"recall@{cfg['k']}": recall,
+            "throughput": throughput
+        }
+        return report
+
+
+def save_report(report, path):
+    """벤치마크 리포트를 JSON 파일로 저장"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 리포트 저장: {path}")
+
+
+def pareto_frontier(points, maximize="recall", minimize="p95_ms"):
+    """recall 은 높고 지연은 낮은 지배되지 않는(non-dominated) 측정점 목록"""
+    frontier = []
+    best = -np.inf
+    for point in sorted(points, key=lambda p: (p[minimize], -p[maximize])):
+        if point[maximize] > best:
+            frontier.append(point)
+            best = point[maximize]
+    return frontier
+
+
+def recommend_point(points, target_recall):
+    """목표 recall 을 만족하는 측정점 중 지연 → 인덱스 크기 → 빌드 시간 순으로 최적 선택"""
+    candidates = [point for point in points if point["recall"] >= target_recall]
+    if candidates:
+        best = min(candidates, key=lambda p: (p["p95_ms"], p["index_size_bytes"], p["build_sec"]))
+        return best, True
+    # 목표 미달 시 recall 이 가장 높은 설정
+    return max(points, key=lambda p: (p["recall"], -p["p95_ms"])), False
+
+
+def run_sweep(config, m_values, ef_construction_values, ef_search_values, target_recall, keep_indices=False):
+    """HNSW 파라미터 그리드 측정 후 파레토 프런티어와 권장 매핑 리포트 반환"""
+    benchmark = KNNBenchmark(config)
+    cfg = benchmark.config
+    base_index = cfg["index_name"]
+    # faiss 는 ef_search 가 매핑에 고정되므로 ef_search 별로 인덱스를 새로 생성
+    rebuild_per_ef = ef_search_mode(cfg["engine"]) == "method_parameter"
+    
+    print("🧭 OpenSearch KNN HNSW 파라미터 스윕")
+    print("=" * 60)
+    print(f"   m={m_values}, ef_construction={ef_construction_values}, ef_search={ef_search_values}")
+    print(f"   엔진: {cfg['engine']} (ef_search 적용: {ef_search_mode(cfg['engine'])}), 목표 recall@{cfg['k']}: {target_recall}")
+    
+    benchmark.prepare_data()
+    builds = itertools.product(m_values, ef_construction_values, ef_search_values if rebuild_per_ef else [None])
+    points = []
+    
+    for m, ef_construction, build_ef_search in builds:
+        cfg.update(m=m, ef_construction=ef_construction)
+        cfg["index_name"] = f"{base_index}-m{m}-efc{ef_construction}"
+        if build_ef_search is not None:
+            cfg["ef_search"] = build_ef_search
+            cfg["index_name"] += f"-efs{build_ef_search}"
+        
+        print(f"\n{'-' * 60}")
+        benchmark.create_index()
+        ingest = benchmark.ingest()
+        index_size = benchmark.index_size_bytes()
+        
+        for ef_search in ([build_ef_search] if rebuild_per_ef else ef_search_values):
+            benchmark.apply_ef_search(ef_search)
+            print(f"\n🔧 ef_search={ef_search}")
+            latency, recall = benchmark.measure_latency()
+            points.append({
+                "m": m,
+                "ef_construction": ef_construction,
+                "ef_search": ef_search,
+                "recall": recall,
+                "p50_ms": latency["p50_ms"],
+                "p95_ms": latency["p95_ms"],
+                "p99_ms": latency["p99_ms"],
+                "build_sec": ingest["elapsed_sec"] + ingest["force_merge_sec"],
+                "docs_per_sec": ingest["docs_per_sec"],
+                "index_size_bytes": index_size
+            })
+        
+        if not keep_indices:
+            benchmark.client.indices.delete(index=cfg["index_name"])
+    
+    frontier = pareto_frontier(points)
+    best, met_target = recommend_point(points, target_recall)
+    recommended_config = dict(cfg, m=best["m"], ef_construction=best["ef_construction"], ef_search=best["ef_search"])
+    
+    print_sweep_summary(points, frontier, best, met_target, target_recall)
+    
+    return {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "config": dict(cfg, index_name=base_index),
+        "grid": {
+            "m": m_values,
+            "ef_construction": ef_construction_values,
+            "ef_search": ef_search_values
+        },
+        "target_recall": target_recall,
+        "points": points,
+        "pareto_frontier": frontier,
+        "recommendation": {
+            "met_target": met_target,
+            "point": best,
+            "ef_search_mode": ef_search_mode(cfg["engine"]),
+            "mapping": build_knn_mapping(recommended_config, bulk_load=False)
+        }
+    }
+
+
+def print_sweep_summary(points, frontier, best, met_target, target_recall):
+    """스윕 결과 표 및 권장 설정 출력"""
+    print("\n" + "=" * 70)
+    print("📊 HNSW 파라미터 스윕 결과")
+    print("=" * 70)
+    print(f"   {'m':>4} {'ef_c':>6} {'ef_s':>6} {'recall':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'빌드(초)':>9} {'크기(MB)':>9}")
+    
+    frontier_keys = {(p["m"], p["ef_construction"], p["ef_search"]) for p in frontier}
+    for point in sorted(points, key=lambda p: (p["m"], p["ef_construction"], p["ef_search"])):
+        marker = "⭐" if (point["m"], point["ef_construction"], point["ef_search"]) in frontier_keys else "  "
+        print(f" {marker}{point['m']:>4} {point['ef_construction']:>6} {point['ef_search']:>6} "
+              f"{point['recall']:>8.4f} {point['p50_ms']:>9.2f} {point['p95_ms']:>9.2f} "
+              f"{point['build_sec']:>9.1f} {point['index_size_bytes'] / 1024 / 1024:>9.1f}")
+    
+    print(f"\n⭐ 파레토 프런티어: {len(frontier)}개 설정 (recall ↑, p95 지연 ↓)")
+    status = "✅ 목표 달성" if met_target else f"⚠️ 목표 recall {target_recall} 미달 - 최고 recall 설정"
+    print(f"\n💡 권장 설정 ({status}): m={best['m']}, ef_construction={best['ef_construction']}, "
+          f"ef_search={best['ef_search']} → recall {best['recall']:.4f}, p95 {best['p95_ms']:.2f}ms")
+
+
+class FilteredKNNBenchmark(KNNBenchmark):
+    """필터 선택도별 필터링 KNN 전략 비교 벤치마크
+    
+    문서마다 0~BUCKET_COUNT-1 균등 분포 정수 bucket 을 부여하고 bucket < 선택도xBUCKET_COUNT 조건으로
+    필터 통과 비율을 조절합니다. 결과에는 실제 필터 통과 비율(matched_fraction)을 함께 기록합니다.
+    """
+
+    # 선택도 해상도 (0.01% 단위 - 100 구간이면 0.1% 같은 작은 선택도가 1% 로 반올림됨)
+    BUCKET_COUNT = 10000
+
+    def __init__(self, config=None, client=None):
+        """필터 컬럼 및 필터 정답용 오라클 초기화"""
+        super().__init__(config, client)
+        self.buckets = None
+        self.oracle = None
+
+    def prepare_data(self):
+        """코퍼스와 함께 필터 컬럼(bucket) 생성"""
+        super().prepare_data()
+        if self.buckets is None:
+            rng = np.random.default_rng(self.config["seed"] + 2)
+            self.buckets = rng.integers(0, self.BUCKET_COUNT, self.config["corpus_size"])
+            self.oracle = ExactKNN(self.corpus, self.config["space_type"])
+
+    def build_mapping(self):
+        """knn_vector 매핑에 필터 필드 추가"""
+        mapping = super().build_mapping()
+        mapping["mappings"]["properties"]["bucket"] = {"type": "integer"}
+        return mapping
+
+    def extra_fields(self):
+        """필터용 bucket 컬럼"""
+        return {"bucket": self.buckets}
+
+    def measure_strategy(self, strategy, selectivity):
+        """단일 전략 x 선택도 조합의 지연 시간, 결과 수, recall 측정"""
+        cfg = self.config
+        threshold = max(1, round(selectivity * self.BUCKET_COUNT))
+        knn_filter = {"range": {"bucket": {"lt": threshold}}}
+        mask = self.buckets < threshold
+        matched_fraction = float(mask.mean())
+        truth, _ = self.oracle.search(self.queries, cfg["k"], mask=mask)
+        
+        bodies = [
+            build_filtered_knn_body(strategy, "vector", vector, cfg["k"], knn_filter, cfg["space_type"])
+            for vector in self.queries
+        ]
+        
+        try:
+            for body in bodies[:cfg["warmup_queries"]]:
+                self.search(None, body)
+            
+            retrieved, latencies = [], []
+            for body in bodies:
+                ids, latency, _ = self.search(None, body)
+                retrieved.append(ids)
+                latencies.append(latency)
+        except Exception as e:
+            print(f"   ❌ {strategy:<17} 선택도 {selectivity:>6.2%}: {str(e)[:100]}")
+            return {"strategy": strategy, "selectivity": selectivity, "matched_fraction": matched_fraction,
+                    "error": str(e)}
+        
+        expected_counts = [len(expected) for expected in truth]
+        recalls = [
+            len(set(ids) & set(expected.tolist())) / max(len(expected), 1)
+            for ids, expected in zip(retrieved, truth)
+        ]
+        summary = percentile_summary(latencies)
+        result = {
+            "strategy": strategy,
+            "selectivity": selectivity,
+            "matched_fraction": matched_fraction,
+            "recall": float(np.mean(recalls)),
+            "mean_hits": float(np.mean([len(ids) for ids in retrieved])),
+            # 필터 통과 문서가 충분한데도 k 개 미만을 반환한 쿼리 비율 (post-filter 손실)
+            "short_result_ratio": float(np.mean([
+                len(ids) < expected for ids, expected in zip(retrieved, expected_counts)
+            ])),
+            "p50_ms": summary["p50_ms"],
+            "p95_ms": summary["p95_ms"],
+            "p99_ms": summary["p99_ms"]
+        }
+        print(f"   ✅ {strategy:<17} 선택도 {selectivity:>6.2%} (실제 {matched_fraction:.2%}): recall {result['recall']:.4f}, "
+              f"평균 결과 {result['mean_hits']:.1f}건, p95 {result['p95_ms']:.2f}ms")
+        return result
+
+
+def run_filter_comparison(config, selectivities, strategies, target_recall):
+    """선택도별 post-filter / efficient filter / script_score 비교 리포트 반환"""
+    benchmark = FilteredKNNBenchmark(config)
+    cfg = benchmark.config
+    
+    print("🧪 OpenSearch 필터링 KNN 전략 비교")
+    print("=" * 60)
+    benchmark.create_index()
+    ingest = benchmark.ingest()
+    
+    results = []
+    recommendations = {}
+    for selectivity in selectivities:
+        print(f"\n🔎 필터 선택도 {selectivity:.2%} (k={cfg['k']})")
+        measured = [benchmark.measure_strategy(strategy, selectivity) for strategy in strategies]
+        results.extend(measured)
+        
+        valid = [result for result in measured if "error" not in result]
+        if valid:
+            accurate = [result for result in valid if result["recall"] >= target_recall]
+            best = min(accurate, key=lambda r: r["p95_ms"]) if accurate else max(valid, key=lambda r: r["recall"])
+            recommendations[str(selectivity)] = best["strategy"]
+    
+    print_filter_summary(results, recommendations)
+    
+    return {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "config": cfg,
+        "ingest": ingest,
+        "target_recall": target_recall,
+        "results": results,
+        "recommendations": recommendations
+    }
+
+
+def print_filter_summary(results, recommendations):
+    """필터 전략 비교 표 및 선택도별 권장 전략 출력"""
+    print("\n" + "=" * 70)
+    print("📊 필터링 KNN 전략 비교 결과")
+    print("=" * 70)
+    print(f"   {'선택도':>7} {'실제':>7} {'전략':<17} {'recall':>8} {'평균결과':>8} {'k미만':>7} "
+          f"{'p50(ms)':>9} {'p95(ms)':>9}")
+    for result in results:
+        if "error" in result:
+            print(f"   {result['selectivity']:>7.2%} {result['matched_fraction']:>7.2%} {result['strategy']:<17} {'오류':>8}")
+            continue
+        print(f"   {result['selectivity']:>7.2%} {result['matched_fraction']:>7.2%} {result['strategy']:<17} "
+              f"{result['recall']:>8.4f} "
+              f"{result['mean_hits']:>8.1f} {result['short_result_ratio']:>7.0%} "
+              f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}")
+    
+    print("\n💡 선택도별 권장 전략:")
+    for selectivity, strategy in recommendations.items():
+        print(f"   • 선택도 {float(selectivity):.2%}: {strategy}")
+
+
+def generate_topic_texts(rng, topics, topic_count, topic_words, background_words, leakage):
+    """토픽 전용 단어 + 공통 배경 단어로 이루어진 합성 텍스트 생성
+    
+    토픽 단어마다 leakage 확률로 다른 토픽의 단어를 섞어 어휘 검색만으로는 구분이 흐려지게 합니다.
+    """
+    count = len(topics)
+    word_topics = np.where(
+        rng.random((count, topic_words)) < leakage,
+        rng.integers(0, topic_count, (count, topic_words)),
+        topics[:, None]
+    )
+    word_ids = rng.integers(0, TOPIC_VOCABULARY, (count, topic_words))
+    background = rng.integers(0, BACKGROUND_VOCABULARY, (count, background_words))
+    
+    return [
+        " ".join([f"t{topic}w{word}" for topic, word in zip(row_topics, row_words)] + [f"w{word}" for word in row_background])
+        for row_topics, row_words, row_background in zip(word_topics.tolist(), word_ids.tolist(), background.tolist())
+    ]
+
+
+class HybridKNNBenchmark(KNNBenchmark):
+    """어휘(match) / 벡터(knn) / hybrid 검색의 지연 시간과 관련성 비교 벤치마크
+    
+    토픽 중심 벡터 + 잡음으로 만든 벡터와 토픽 단어가 섞인 텍스트를 함께 적재하고,
+    쿼리와 같은 토픽의 문서를 정답(관련 문서)으로 보아 precision@k / nDCG@k / MRR 을 계산합니다.
+    """
+
+    def __init__(self, config=None, client=None):
+        """토픽 라벨 및 텍스트 컬럼 초기화"""
+        super().__init__(dict(DEFAULT_HYBRID, **(config or {})), client)
+        self.topics = None
+        self.texts = None
+        self.query_topics = None
+        self.query_texts = None
+
+    def prepare_data(self):
+        """토픽 구조를 가진 합성 코퍼스(벡터 + 텍스트)와 쿼리 생성"""
+        if self.corpus is not None:
+            return
+        
+        cfg = self.config
+        rng = np.random.default_rng(cfg["seed"])
+        centroids = rng.standard_normal((cfg["topics"], cfg["dimension"]), dtype=np.float32)
+        
+        self.topics = rng.integers(0, cfg["topics"], cfg["corpus_size"])
+        self.corpus = centroids[self.topics] + rng.standard_normal((cfg["corpus_size"], cfg["dimension"]), dtype=np.float32)
+        self.texts = generate_topic_texts(rng, self.topics, cfg["topics"], 3, 12, cfg["word_leakage"])
+        
+        self.query_topics = rng.integers(0, cfg["topics"], cfg["query_count"])
+        noise = rng.standard_normal((cfg["query_count"], cfg["dimension"]), dtype=np.float32)
+        self.queries = centroids[self.query_topics] + cfg["query_noise"] * noise
+        self.query_texts = generate_topic_texts(rng, self.query_topics, cfg["topics"], 2, 2, cfg["word_leakage"])
+
+    def build_mapping(self):
+        """knn_vector 매핑에 텍스트 / 토픽 필드 추가"""
+        mapping = super().build_mapping()
+        mapping["mappings"]["properties"]["text"] = {"type": "text"}
+        mapping["mappings"]["properties"]["topic"] = {"type": "integer"}
+        return mapping
+
+    def extra_fields(self):
+        """텍스트 및 토픽 라벨 컬럼"""
+        return {"text": self.texts, "topic": self.topics}
+
+    def query_bodies(self, mode):
+        """검색 방식별 쿼리 본문 목록 (lexical / vector / hybrid)"""
+        k = self.config["k"]
+        if mode == "lexical":
+            return [{"size": k, "_source": False, "query": {"match": {"text": text}}} for text in self.query_texts]
+        if mode == "vector":
+            return [self.knn_query(vector) for vector in self.queries]
+        return [
+            build_hybrid_body("text", text, "vector", vector, k)
+            for text, vector in zip(self.query_texts, self.queries)
+        ]
+
+    def measure_mode(self, label, bodies, params=None):
+        """단일 검색 방식의 지연 시간 및 관련성 측정"""
+        cfg = self.config
+        try:
+            for body in bodies[:cfg["warmup_queries"]]:
+                self.search(None, body, params)
+            
+            retrieved, latencies = [], []
+            for body in bodies:
+                ids, latency, _ = self.search(None, body, params)
+                retrieved.append(ids)
+                latencies.append(latency)
+        except Exception as e:
+            print(f"   ❌ {label:<32}: {str(e)[:100]}")
+            return {"mode": label, "error": str(e)}
+        
+        judgements = [
+            (self.topics[ids] == topic).tolist() if ids else []
+            for ids, topic in zip(retrieved, self.query_topics)
+        ]
+        topic_sizes = np.bincount(self.topics, minlength=cfg["topics"])
+        relevance = relevance_at_k(judgements, cfg["k"], topic_sizes[self.query_topics])
+        summary = percentile_summary(latencies)
+        
+        result = dict(relevance, mode=label, p50_ms=summary["p50_ms"], p95_ms=summary["p95_ms"], p99_ms=summary["p99_ms"])
+        ndcg = result[f"ndcg@{cfg['k']}"]
+        print(f"   ✅ {label:<32}: nDCG@{cfg['k']} {ndcg:.4f}, p95 {result['p95_ms']:.2f}ms")
+        return result
+
+
+def run_hybrid_comparison(config, normalizations, combinations, weights):
+    """어휘 전용 / 벡터 전용 / 정규화 x 결합 방식별 hybrid 검색 비교 리포트 반환"""
+    benchmark = HybridKNNBenchmark(config)
+    cfg = benchmark.config
+    
+    print("🔀 OpenSearch 하이브리드(어휘 + 벡터) 검색 비교")
+    print("=" * 60)
+    print(f"   토픽 {cfg['topics']}개, 단어 누수 {cfg['word_leakage']:.0%}, 쿼리 벡터 잡음 {cfg['query_noise']}, "
+          f"가중치 (어휘, 벡터) = {weights}")
+    benchmark.create_index()
+    ingest = benchmark.ingest()
+    
+    print(f"\n🔎 검색 방식별 측정 (쿼리 {cfg['query_count']}건, k={cfg['k']})")
+    results = [
+        benchmark.measure_mode("lexical (match)", benchmark.query_bodies("lexical")),
+        benchmark.measure_mode("vector (knn)", benchmark.query_bodies("vector"))
+    ]
+    
+    hybrid_bodies = benchmark.query_bodies("hybrid")
+    for normalization, combination in itertools.product(normalizations, combinations):
+        label = f"hybrid {normalization} + {combination}"
+        pipeline_id = f"{cfg['index_name']}-{normalization}-{combination}".replace("_", "-")
+        try:
+            put_search_pipeline(
+                benchmark.client, pipeline_id,
+                build_normalization_pipeline(normalization, combination, weights)
+            )
+        except Exception as e:
+            print(f"   ❌ {label:<32}: 검색 파이프라인 생성 실패 (neural-search 플러그인 확인) {str(e)[:80]}")
+            results.append({"mode": label, "error": str(e)})
+            continue
+        
+        try:
+            result = benchmark.measure_mode(label, hybrid_bodies, {"search_pipeline": pipeline_id})
+            result.update(normalization=normalization, combination=combination)
+            results.append(result)
+        finally:
+            delete_search_pipeline(benchmark.client, pipeline_id)
+    
+    metric = f"ndcg@{cfg['k']}"
+    valid = [result for result in results if "error" not in result]
+    best = max(valid, key=lambda r: r[metric]) if valid else None
+    print_hybrid_summary(results, best, metric)
+    
+    return {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "config": cfg,
+        "ingest": ingest,
+        "weights": weights,
+        "results": results,
+        "best": best,
+        "best_pipeline": build_normalization_pipeline(best["normalization"], best["combination"], weights)
+        if best and "normalization" in best else None
+    }
+
+
+def print_hybrid_summary(results, best, metric):
+    """검색 방식별 관련성 / 지연 비교 표 출력"""
+    k = metric.split("@")[1]
+    print("\n" + "=" * 70)
+    print("📊 하이브리드 검색 비교 결과")
+    print("=" * 70)
+    print(f"   {'검색 방식':<32} {'P@' + k:>7} {'nDCG@' + k:>8} {'MRR':>7} {'p50(ms)':>9} {'p95(ms)':>9}")
+    for result in results:
+        if "error" in result:
+            print(f"   {result['mode']:<32} {'오류':>7}")
+            continue
+        print(f"   {result['mode']:<32} {result['precision@' + k]:>7.4f} {result[metric]:>8.4f} "
+              f"{result['mrr']:>7.4f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f}")
+    
+    if best:
+        print(f"\n💡 {metric} 최고: {best['mode']}")
+
+
+def estimate_graph_memory_bytes(variant, dimension, m, num_vectors, pq_m=None, pq_code_size=8):
+    """HNSW 그래프 네이티브 메모리 추정치 (OpenSearch k-NN 메모리 산정식 기준)
+    
+    float/byte/fp16: 1.1 * (차원당 바이트 * 차원 + 8 * m) * 벡터 수
+    pq: 1.1 * ((pq_code_size / 8) * pq_m + 24 + 8 * m) * 벡터 수
+    """
+    if variant == "pq":
+        per_vector = pq_code_size / 8 * pq_m + 24 + 8 * m
+    else:
+        per_vector = BYTES_PER_DIMENSION[variant] * dimension + 8 * m
+    return 1.1 * per_vector * num_vectors
+
+
+class QuantizedKNNBenchmark(KNNBenchmark):
+    """압축 저장 방식(variant)별 KNN 인덱스 벤치마크
+    
+    float: 기준 float32 인덱스 (설정된 engine)
+    byte: lucene data_type=byte (int8 로 균일 스케일 양자화한 벡터)
+    sq_fp16: faiss 스칼라 양자화 fp16 인코더
+    pq: faiss 곱 양자화 (학습 API 로 생성한 모델 사용)
+    """
+
+    def __init__(self, variant, config=None, client=None, model_id=None):
+        """variant 및 PQ 모델 설정"""
+        super().__init__(config, client)
+        self.variant = variant
+        self.model_id = model_id
+        self.config["engine"] = VARIANT_ENGINES.get(variant, self.config["engine"])
+        self.byte_scale = None
+
+    def share_data(self, source):
+        """기준 벤치마크의 코퍼스/쿼리/정답을 공유 (모든 variant 를 같은 float 정답으로 평가)"""
+        self.corpus, self.queries, self.truth = source.corpus, source.queries, source.truth
+        if self.variant == "byte":
+            self.byte_scale = 127 / max(float(np.abs(self.corpus).max()), 1e-12)
+
+    def to_byte(self, vectors):
+        """float 벡터를 [-128, 127] 정수로 양자화"""
+        return np.clip(np.round(vectors * self.byte_scale), -128, 127).astype(np.int8)
+
+    def build_mapping(self):
+        """variant 별 knn_vector 매핑"""
+        mapping = super().build_mapping()
+        field = mapping["mappings"]["properties"]["vector"]
+        method = field["method"]
+        
+        if self.variant == "byte":
+            field["data_type"] = "byte"
+        elif self.variant == "sq_fp16":
+            method["parameters"]["encoder"] = {"name": "sq", "parameters": {"type": "fp16"}}
+        elif self.variant == "pq":
+            # 학습된 모델이 method 와 차원 정보를 모두 가짐
+            mapping["mappings"]["properties"]["vector"] = {"type": "knn_vector", "model_id": self.model_id}
+        return mapping
+
+    def ingest_vectors(self):
+        """byte variant 는 정수 벡터로 적재"""
+        if self.variant == "byte":
+            return self.to_byte(self.corpus)
+        return super().ingest_vectors()
+
+    def knn_query(self, vector):
+        """byte variant 는 쿼리도 같은 스케일로 양자화"""
+        if self.variant == "byte":
+            return super().knn_query(self.to_byte(vector))
+        return super().knn_query(vector)
+
+    def graph_memory_kb(self):
+        """warmup 후 knn 네이티브 캐시에 올라간 그래프 메모리 (lucene 은 해당 없음)"""
+        if self.config["engine"] == "lucene":
+            return None
+        
+        index_name = self.config["index_name"]
+        self.client.transport.perform_request("GET", f"/_plugins/_knn/warmup/{index_name}")
+        stats = self.client.transport.perform_request("GET", "/_plugins/_knn/stats")
+        return sum(
+            node.get("indices_in_cache", {}).get(index_name, {}).get("graph_memory_usage", 0)
+            for node in stats["nodes"].values()
+        )
+
+
+def train_pq_model(benchmark, model_id, pq_m, pq_code_size, training_size, timeout=600):
+    """학습 인덱스에 코퍼스 일부를 적재하고 faiss HNSW+PQ 모델 학습"""
+    cfg = benchmark.config
+    if cfg["dimension"] % pq_m:
+        raise ValueError(f"PQ m({pq_m})은 차원({cfg['dimension']})의 약수여야 합니다")
+    
+    client = benchmark.client
+    training_index = f"{cfg['index_name']}-pq-train"
+    if client.indices.exists(index=training_index):
+        client.indices.delete(index=training_index)
+    client.indices.create(index=training_index, body={
+        "settings": {"index": {"knn": True, "number_of_replicas": 0}},
+        "mappings": {"properties": {"vector": {"type": "knn_vector", "dimension": cfg["dimension"]}}}
+    })
+    
+    sample = benchmark.corpus[:training_size]
+    bulk_ingest_vectors(client, training_index, sample)
+    print(f"   🏋️ PQ 모델 학습: {len(sample):,}개 벡터 (pq_m={pq_m}, code_size={pq_code_size})")
+    
+    try:
+        client.transport.perform_request("DELETE", f"/_plugins/_knn/models/{model_id}")
+    except Exception:
+        pass
+    
+    client.transport.perform_request("POST", f"/_plugins/_knn/models/{model_id}/_train", body={
+        "training_index": training_index,
+        "training_field": "vector",
+        "dimension": cfg["dimension"],
+        "description": "knn_benchmark quantization experiment",
+        "method": {
+            "name": "hnsw",
+            "engine": "faiss",
+            "space_type": cfg["space_type"],
+            "parameters": {
+                "m": cfg["m"],
+                "ef_construction": cfg["ef_construction"],
+                "ef_search": cfg["ef_search"],
+                "encoder": {"name": "pq", "parameters": {"m": pq_m, "code_size": pq_code_size}}
+            }
+        }
+    })
+    
+    # 학습 완료(created) 또는 실패(failed) 상태까지 대기
+    deadline = time.time() + timeout
+    interval = 0.5
+    while True:
+        model = client.transport.perform_request("GET", f"/_plugins/_knn/models/{model_id}")
+        if model["state"] == "created":
+            break
+        if model["state"] == "failed" or time.time() >= deadline:
+            raise RuntimeError(f"PQ 모델 학습 실패: {model.get('error') or model['state']}")
+        time.sleep(interval)
+        interval = min(interval * 2, 5.0)
+    
+    client.indices.delete(index=training_index)
+    return model_id
+
+
+def run_quantization_comparison(config, variants, pq_m, pq_code_size, pq_training_size, projection_vectors):
+    """압축 variant 별 저장 용량, 메모리, 적재 속도, 지연, recall 비교 리포트 반환"""
+    baseline = KNNBenchmark(config)
+    cfg = baseline.config
+    baseline.prepare_data()
+    base_index = cfg["index_name"]
+    model_id = f"{base_index}-pq-model"
+    
+    print("🗜️ OpenSearch KNN 벡터 압축(양자화) 비교")
+    print("=" * 60)
+    print(f"   코퍼스 {cfg['corpus_size']:,}건 x {cfg['dimension']}차원, 기준 엔진 {cfg['engine']}, variants={variants}")
+    
+    results = []
+    for variant in variants:
+        print(f"\n{'-' * 60}\n🧩 variant: {variant}")
+        benchmark = QuantizedKNNBenchmark(
+            variant, dict(cfg, index_name=f"{base_index}-{variant}"), baseline.client, model_id
+        )
+        benchmark.share_data(baseline)
+        
+        try:
+            if variant == "pq":
+                train_pq_model(benchmark, model_id, pq_m, pq_code_size, pq_training_size)
+            
+            benchmark.create_index()
+            ingest = benchmark.ingest()
+            latency, recall = benchmark.measure_latency()
+            estimated = estimate_graph_memory_bytes(
+                variant, cfg["dimension"], cfg["m"], projection_vectors, pq_m, pq_code_size
+            )
+            results.append({
+                "variant": variant,
+                "engine": benchmark.config["engine"],
+                "index_size_bytes": benchmark.index_size_bytes(),
+                "graph_memory_kb": benchmark.graph_memory_kb(),
+                "docs_per_sec": ingest["docs_per_sec"],
+                "build_sec": ingest["elapsed_sec"] + ingest["force_merge_sec"],
+                "recall": recall,
+                "p50_ms": latency["p50_ms"],
+                "p95_ms": latency["p95_ms"],
+                "p99_ms": latency["p99_ms"],
+                "projected_graph_memory_gb": estimated / 1024 ** 3
+            })
+        except Exception as e:
+            print(f"   ❌ {variant} 실패: {e}")
+            results.append({"variant": variant, "error": str(e)})
+    
+    print_quantization_summary(results, projection_vectors)
+    
+    return {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "config": cfg,
+        "pq": {"m": pq_m, "code_size": pq_code_size, "training_size": pq_training_size, "model_id": model_id},
+        "projection_vectors": projection_vectors,
+        "results": results
+    }
+
+
+def print_quantization_summary(results, projection_vectors):
+    """variant 비교 표 (float 기준 대비 비율 포함)"""
+    print("\n" + "=" * 78)
+    print("📊 벡터 압축 비교 결과")
+    print("=" * 78)
+    print(f"   {'variant':<8} {'엔진':<7} {'디스크(MB)':>10} {'그래프(MB)':>10} {'적재(건/초)':>11} "
+          f"{'recall':>7} {'p95(ms)':>8} {f'{projection_vectors / 1e6:.0f}M 추정(GB)':>14}")
+    
+    baseline = next((r for r in results if r["variant"] == "float" and "error" not in r), None)
+    for result in results:
+        if "error" in result:
+            print(f"   {result['variant']:<8} ❌ {result['error'][:60]}")
+            continue
+        graph_mb = "-" if result["graph_memory_kb"] is None else f"{result['graph_memory_kb'] / 1024:.1f}"
+        print(f"   {result['variant']:<8} {result['engine']:<7} {result['index_size_bytes'] / 1024 ** 2:>10.1f} "
+              f"{graph_mb:>10} {result['docs_per_sec']:>11,.0f} {result['recall']:>7.4f} "
+              f"{result['p95_ms']:>8.2f} {result['projected_graph_memory_gb']:>14.1f}")
+    
+    if baseline:
+        print("\n💡 float 기준 대비:")
+        for result in results:
+            if "error" in result or result is baseline:
+                continue
+            size_ratio = result["index_size_bytes"] / max(baseline["index_size_bytes"], 1)
+            memory_ratio = result["projected_graph_memory_gb"] / baseline["projected_graph_memory_gb"]
+            print(f"   • {result['variant']}: 디스크 {size_ratio:.0%}, 그래프 메모리 추정 {memory_ratio:.0%}, "
+                  f"recall {result['recall'] - baseline['recall']:+.4f}")
+    print("   ※ faiss/nmslib 그래프는 JVM 힙 밖 네이티브 메모리에 적재되므로 "
+          "knn.memory.circuit_breaker.limit 과 노드 물리 메모리 기준으로 산정하세요")
+
+
+def parse_args(argv):
+    """명령행 인자 파싱"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--index-name", default=DEFAULT_CONFIG["index_name"])
+    common.add_argument("--corpus-size", type=int, default=DEFAULT_CONFIG["corpus_size"])
+    common.add_argument("--dimension", type=int, default=DEFAULT_CONFIG["dimension"])
+    common.add_argument("--space-type", choices=SPACE_TYPES, default=DEFAULT_CONFIG["space_type"])
+    common.add_argument("--engine", choices=ENGINES, default=DEFAULT_CONFIG["engine"])
+    common.add_argument("--k", type=int, default=DEFAULT_CONFIG["k"])
+    common.add_argument("--query-count", type=int, default=DEFAULT_CONFIG["query_count"])
+    common.add_argument("--warmup-queries", type=int, default=DEFAULT_CONFIG["warmup_queries"])
+    common.add_argument("--shards", type=int, default=DEFAULT_CONFIG["shards"])
+    common.add_argument("--no-force-merge", dest="force_merge", action="store_false")
+    common.add_argument("--seed", type=int, default=DEFAULT_CONFIG["seed"])
+    common.add_argument("--dataset", help=".fvecs / .bvecs / .npy / .hdf5 코퍼스 파일 (지정 시 무작위 벡터 대신 사용)")
+    common.add_argument("--dataset-queries", help="쿼리 벡터 파일 (HDF5 는 test 데이터셋 사용)")
+    common.add_argument("--dataset-ground-truth", help="정답 이웃 .ivecs / .npy 파일")
+    common.add_argument("--dataset-limit", type=int, help="데이터셋 코퍼스 앞 N 건만 사용")
+    
+    parser = argparse.ArgumentParser(description="OpenSearch KNN 벤치마크")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    hnsw = argparse.ArgumentParser(add_help=False)
+    hnsw.add_argument("--m", type=int, default=DEFAULT_CONFIG["m"])
+    hnsw.add_argument("--ef-construction", type=int, default=DEFAULT_CONFIG["ef_construction"])
+    hnsw.add_argument("--ef-search", type=int, default=DEFAULT_CONFIG["ef_search"])
+    
+    run_parser = subparsers.add_parser("run", parents=[common, hnsw], help="단일 설정 벤치마크 실행")
+    run_parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONFIG["concurrency"])
+    run_parser.add_argument("--report-path", default=DEFAULT_CONFIG["report_path"])
+    
+    sweep_parser = subparsers.add_parser("sweep", parents=[common], help="HNSW 파라미터 그리드 스윕")
+    sweep_parser.add_argument("--m", dest="m_values", type=int, nargs="+", default=DEFAULT_SWEEP["m"])
+    sweep_parser.add_argument("--ef-construction", dest="ef_construction_values", type=int, nargs="+",
+                              default=DEFAULT_SWEEP["ef_construction"])
+    sweep_parser.add_argument("--ef-search", dest="ef_search_values", type=int, nargs="+",
+                              default=DEFAULT_SWEEP["ef_search"])
+    sweep_parser.add_argument("--target-recall", type=float, default=DEFAULT_SWEEP["target_recall"])
+    sweep_parser.add_argument("--keep-indices", action="store_true")
+    sweep_parser.add_argument("--report-path", default=DEFAULT_SWEEP["report_path"])
+    
+    quant_parser = subparsers.add_parser("quant", parents=[common, hnsw], help="벡터 압축(양자화) 방식 비교")
+    quant_parser.add_argument("--variants", nargs="+", choices=QUANT_VARIANTS, default=DEFAULT_QUANT["variants"])
+    quant_parser.add_argument("--pq-m", type=int, default=DEFAULT_QUANT["pq_m"])
+    quant_parser.add_argument("--pq-code-size", type=int, default=DEFAULT_QUANT["pq_code_size"])
+    quant_parser.add_argument("--pq-training-size", type=int, default=DEFAULT_QUANT["pq_training_size"])
+    quant_parser.add_argument("--projection-vectors", type=int, default=DEFAULT_QUANT["projection_vectors"])
+    quant_parser.add_argument("--report-path", default=DEFAULT_QUANT["report_path"])
+    
+    hybrid_parser = subparsers.add_parser("hybrid", parents=[common, hnsw], help="어휘/벡터/하이브리드 검색 비교")
+    hybrid_parser.add_argument("--normalizations", nargs="+", choices=HYBRID_NORMALIZATIONS,
+                               default=DEFAULT_HYBRID["normalizations"])
+    hybrid_parser.add_argument("--combinations", nargs="+", choices=HYBRID_COMBINATIONS,
+                               default=DEFAULT_HYBRID["combinations"])
+    hybrid_parser.add_argument("--weights", type=float, nargs=2, default=DEFAULT_HYBRID["weights"],
+                               metavar=("LEXICAL", "VECTOR"))
+    hybrid_parser.add_argument("--topics", type=int, default=DEFAULT_HYBRID["topics"])
+    hybrid_parser.add_argument("--word-leakage", type=float, default=DEFAULT_HYBRID["word_leakage"])
+    hybrid_parser.add_argument("--query-noise", type=float, default=DEFAULT_HYBRID["query_noise"])
+    hybrid_parser.add_argument("--report-path", default=DEFAULT_HYBRID["report_path"])
+    
+    filter_parser = subparsers.add_parser("filter", parents=[common, hnsw], help="필터링 KNN 전략 비교")
+    filter_parser.add_argument("--selectivity", dest="selectivities", type=float, nargs="+",
+                               default=DEFAULT_FILTER["selectivities"])
+    filter_parser.add_argument("--strategies", nargs="+", choices=FILTER_STRATEGIES,
+                               default=DEFAULT_FILTER["strategies"])
+    filter_parser.add_argument("--target-recall", type=float, default=DEFAULT_FILTER["target_recall"])
+    filter_parser.add_argument("--report-path", default=DEFAULT_FILTER["report_path"])
+    
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """메인 실행 함수"""
+    args = vars(parse_args(sys.argv[1:] if argv is None else argv))
+    command = args.pop("command")
+    
+    try:
+        if command == "sweep":
+            sweep_options = {
+                key: args.pop(key)
+                for key in ["m_values", "ef_construction_values", "ef_search_values", "target_recall", "keep_indices"]
+            }
+            report = run_sweep(args, **sweep_options)
+        elif command == "quant":
+            quant_options = {
+                key: args.pop(key)
+                for key in ["variants", "pq_m", "pq_code_size", "pq_training_size", "projection_vectors"]
+            }
+            report = run_quantization_comparison(args, **quant_options)
+        elif command == "hybrid":
+            hybrid_options = {key: args.pop(key) for key in ["normalizations", "combinations", "weights"]}
+            report = run_hybrid_comparison(args, **hybrid_options)
+        elif command == "filter":
+            filter_options = {key: args.pop(key) for key in ["selectivities", "strategies", "target_recall"]}
+            report = run_filter_comparison(args, **filter_options)
+        else:
+            report = KNNBenchmark(args).run()
+    except Exception as e:
+        print(f"❌ 벤치마크 실패: {e}")
+        return 1
+    
+    save_report(report, args["report_path"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
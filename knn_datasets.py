@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+ANN 벤치마크 벡터 데이터셋 로더
+==============================
+
+표준 ANN 벤치마크 형식을 메모리 매핑으로 열어, 코퍼스 전체를 RAM 에 올리지 않고
+벌크 적재(knn_vectors)와 정확 탐색 오라클(knn_oracle)에 그대로 전달합니다.
+
+지원 형식:
+- .fvecs / .ivecs / .bvecs (TEXMEX: SIFT1M, GIST1M 등) - 행마다 int32 차원 + 값
+- .npy - np.load(mmap_mode="r")
+- .hdf5 / .h5 (ann-benchmarks: train / test / neighbors / distances) - h5py 선택 설치
+
+사용 예:
+    python knn_datasets.py sift-128-euclidean.hdf5
+    python knn_datasets.py sift_base.fvecs --queries sift_query.fvecs --ground-truth sift_groundtruth.ivecs
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from knn_oracle import ExactKNN, recall_at_k
+
+try:
+    import h5py
+except ImportError:  # 선택 의존성 (HDF5 데이터셋 사용 시에만 필요)
+    h5py = None
+
+VECS_DTYPES = {".fvecs": np.float32, ".ivecs": np.int32, ".bvecs": np.uint8}
+HDF5_EXTENSIONS = (".hdf5", ".h5")
+
+# ann-benchmarks distance 속성 → OpenSearch space_type
+ANN_BENCHMARK_SPACE_TYPES = {"euclidean": "l2", "angular": "cosinesimil", "dot": "innerproduct"}
+
+
+def read_vecs(path, dtype=None):
+    """.fvecs/.ivecs/.bvecs 파일을 (행 수, 차원) 메모리 매핑 배열로 열기
+    
+    각 행 앞의 int32 차원 값은 건너뛴 strided view 를 반환하므로 파일 전체를 읽지 않습니다.
+    """
+    dtype = np.dtype(dtype or VECS_DTYPES[os.path.splitext(path)[1]])
+    dimension = int(np.fromfile(path, dtype=np.int32, count=1)[0])
+    row_bytes = 4 + dimension * dtype.itemsize
+    
+    file_size = os.path.getsize(path)
+    if file_size % row_bytes:
+        raise ValueError(f"{path}: 파일 크기 {file_size} 가 행 크기 {row_bytes} 의 배수가 아닙니다")
+    
+    rows = np.memmap(path, dtype=np.uint8, mode="r", shape=(file_size // row_bytes, row_bytes))
+    return rows[:, 4:].view(dtype)
+
+
+def _hdf5_array(dataset):
+    """h5py Dataset 을 가능하면 np.memmap 으로 변환 (연속 저장 + 무압축일 때만)"""
+    offset = dataset.id.get_offset()
+    if offset is None or dataset.chunks is not None or dataset.compression is not None:
+        return dataset  # 청크/압축 저장: h5py 슬라이싱으로 필요한 구간만 읽음
+    return np.memmap(dataset.file.filename, dtype=dataset.dtype, mode="r", offset=offset, shape=dataset.shape)
+
+
+def open_vectors(path, mmap=True, dataset="train"):
+    """확장자에 따라 벡터 파일 열기 (HDF5 는 dataset 이름으로 선택)"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in VECS_DTYPES:
+        vectors = read_vecs(path)
+        return vectors if mmap else np.array(vectors)
+    if extension == ".npy":
+        return np.load(path, mmap_mode="r" if mmap else None)
+    if extension in HDF5_EXTENSIONS:
+        if h5py is None:
+            raise ImportError("HDF5 데이터셋을 읽으려면 h5py 가 필요합니다 (pip install h5py)")
+        vectors = _hdf5_array(h5py.File(path, "r")[dataset])
+        return vectors if mmap else np.asarray(vectors[:])
+    raise ValueError(f"지원하지 않는 벡터 파일 형식: {path}")
+
+
+def load_dataset(path, queries=None, ground_truth=None, limit=None, space_type=None):
+    """코퍼스 / 쿼리 / 정답 이웃을 한 번에 열기
+    
+    HDF5(ann-benchmarks) 는 한 파일의 train / test / neighbors 와 distance 속성을 사용하고,
+    그 외 형식은 queries / ground_truth 경로를 따로 지정합니다.
+    limit 로 코퍼스를 앞에서부터 자르면 파일의 정답 이웃은 더 이상 유효하지 않으므로 버립니다.
+    
+    반환값: {"name", "corpus", "queries", "neighbors", "space_type", "dimension"}
+        corpus 는 메모리 매핑 배열(또는 h5py Dataset), queries / neighbors 는 없으면 None
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    if os.path.splitext(path)[1].lower() in HDF5_EXTENSIONS:
+        corpus = open_vectors(path, dataset="train")
+        hdf5_file = h5py.File(path, "r")
+        query_vectors = np.asarray(hdf5_file["test"][:], dtype=np.float32) if "test" in hdf5_file else None
+        neighbors = np.asarray(hdf5_file["neighbors"][:]) if "neighbors" in hdf5_file else None
+        metric = hdf5_file.attrs.get("distance")
+        if isinstance(metric, bytes):
+            metric = metric.decode()
+        space_type = space_type or ANN_BENCHMARK_SPACE_TYPES.get(metric)
+    else:
+        corpus = open_vectors(path)
+        query_vectors = np.asarray(open_vectors(queries), dtype=np.float32) if queries else None
+        neighbors = np.asarray(open_vectors(ground_truth)) if ground_truth else None
+    
+    if limit and limit < len(corpus):
+        corpus = corpus[:limit]
+        neighbors = None
+    
+    return {
+        "name": name,
+        "corpus": corpus,
+        "queries": query_vectors,
+        "neighbors": neighbors,
+        "space_type": space_type,
+        "dimension": int(corpus.shape[1])
+    }
+
+
+def sample_queries(corpus, count, seed=43):
+    """쿼리 파일이 없을 때 코퍼스에서 무작위 행을 쿼리로 추출 (오름차순으로 읽어 디스크 탐색 최소화)"""
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(corpus), size=min(count, len(corpus)), replace=False))
+    return np.asarray(corpus[rows], dtype=np.float32)
+
+
+def parse_args(argv):
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="ANN 벤치마크 데이터셋 확인 및 정답 이웃 검증")
+    parser.add_argument("path", help=".fvecs / .bvecs / .npy / .hdf5 코퍼스 파일")
+    parser.add_argument("--queries", help="쿼리 벡터 파일 (HDF5 는 test 데이터셋 사용)")
+    parser.add_argument("--ground-truth", help="정답 이웃 .ivecs / .npy 파일")
+    parser.add_argument("--space-type", help="거리 척도 (HDF5 는 distance 속성에서 자동 결정)")
+    parser.add_argument("--limit", type=int, help="코퍼스 앞 N 건만 사용")
+    parser.add_argument("--verify", type=int, default=10, help="정답 이웃을 오라클로 검증할 쿼리 수 (0: 생략)")
+    parser.add_argument("--k", type=int, default=10)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """데이터셋 요약 출력 및 파일 정답 이웃을 정확 탐색 오라클과 대조"""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    dataset = load_dataset(args.path, args.queries, args.ground_truth, args.limit, args.space_type)
+    corpus = dataset["corpus"]
+    
+    print(f"📂 데이터셋 '{dataset['name']}'")
+    print(f"   코퍼스: {corpus.shape[0]:,}건 x {dataset['dimension']}차원 ({corpus.dtype}, {type(corpus).__name__})")
+    if dataset["queries"] is not None:
+        print(f"   쿼리: {len(dataset['queries']):,}건")
+    if dataset["neighbors"] is not None:
+        print(f"   정답 이웃: {dataset['neighbors'].shape[1]}개/쿼리")
+    print(f"   space_type: {dataset['space_type'] or '미지정'}")
+    
+    if not args.verify or dataset["queries"] is None or dataset["neighbors"] is None:
+        return 0
+    if not dataset["space_type"]:
+        print("   ⚠️ space_type 을 알 수 없어 정답 검증을 생략합니다 (--space-type 지정)")
+        return 0
+    
+    queries = dataset["queries"][:args.verify]
+    k = min(args.k, dataset["neighbors"].shape[1])
+    start_time = time.time()
+    expected, _ = ExactKNN(corpus, dataset["space_type"]).search(queries, k)
+    elapsed = time.time() - start_time
+    
+    recall = recall_at_k(dataset["neighbors"][:len(queries)], expected, k)
+    print(f"\n🎯 오라클 대조: 쿼리 {len(queries)}건, recall@{k} {recall:.4f} ({elapsed:.1f}초)")
+    return 0 if recall >= 0.99 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
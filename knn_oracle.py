@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+KNN 정확 탐색(brute-force) 오라클
+================================
+
+OpenSearch 에 넣은 것과 같은 벡터로 NumPy 배치 행렬 연산 top-k 를 계산하여
+HNSW 검색 결과의 recall 과 점수 일치도를 검증합니다.
+점수는 OpenSearch knn 플러그인의 space_type 별 점수 변환식을 그대로 따릅니다.
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import numpy as np
+
+SPACE_TYPES = ["l2", "cosinesimil", "l1", "innerproduct"]
+
+
+def distance_to_score(distances, space_type):
+    """거리 값을 OpenSearch _score 로 변환"""
+    if space_type == "l2":  # 거리 = 유클리드 거리 제곱
+        return 1 / (1 + distances)
+    if space_type == "cosinesimil":  # 거리 = 1 - cos
+        return (2 - distances) / 2
+    if space_type == "l1":
+        return 1 / (1 + distances)
+    if space_type == "innerproduct":  # 거리 = -내적
+        inner = -distances
+        return np.where(inner >= 0, inner + 1, 1 / (1 - np.minimum(inner, 0)))
+    raise ValueError(f"지원하지 않는 space_type: {space_type}")
+
+
+class ExactKNN:
+    def __init__(self, vectors, space_type, ids=None, batch_size=256, block_size=8192, corpus_block_size=65536):
+        """코퍼스 벡터 등록 (ids 미지정 시 행 순번을 문서 ID 로 사용)
+        
+        np.memmap / h5py Dataset 같은 지연 로딩 배열은 메모리에 올리지 않고
+        corpus_block_size 행씩 디스크에서 읽어 top-k 를 병합합니다.
+        """
+        if space_type not in SPACE_TYPES:
+            raise ValueError(f"지원하지 않는 space_type: {space_type}")
+        
+        self.space_type = space_type
+        self.lazy = hasattr(vectors, "shape") and (isinstance(vectors, np.memmap) or not isinstance(vectors, np.ndarray))
+        self.vectors = vectors if self.lazy else np.asarray(vectors, dtype=np.float32)
+        self.ids = np.arange(len(self.vectors)) if ids is None else np.asarray(ids)
+        self.batch_size = batch_size
+        self.block_size = block_size
+        self.corpus_block_size = corpus_block_size
+        self._row_lookup = None
+        
+        # 쿼리와 무관한 항은 미리 계산 (지연 로딩 입력은 블록 단위로 한 번 순회)
+        self.sq_norms = None
+        if space_type == "l2":
+            self.sq_norms = np.concatenate([
+                (self._corpus(rows) ** 2).sum(axis=1) for rows, _ in self._chunks()
+            ])
+        elif space_type == "cosinesimil" and not self.lazy:
+            self.vectors = self._normalize(self.vectors)
+
+    @staticmethod
+    def _normalize(vectors):
+        """L2 정규화 (영벡터 보호)"""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _corpus(self, rows=None):
+        """코퍼스 전체 또는 rows(slice/행 번호 배열) 를 float32 배열로 읽기"""
+        if rows is None:
+            vectors = self.vectors
+        elif self.lazy and isinstance(rows, np.ndarray):
+            # h5py 는 오름차순 고유 인덱스만 허용하므로 정렬해서 읽은 뒤 원래 순서로 복원
+            unique_rows, inverse = np.unique(rows, return_inverse=True)
+            vectors = np.asarray(self.vectors[unique_rows])[inverse]
+        else:
+            vectors = self.vectors[rows]
+        
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.lazy and self.space_type == "cosinesimil":
+            vectors = self._normalize(vectors)
+        return vectors
+
+    def _chunks(self, rows=None):
+        """(코퍼스 행 지정자, 행 번호 배열) 목록 - 지연 로딩 입력은 corpus_block_size 행씩 분할"""
+        if not self.lazy:
+            return [(rows, rows)]
+        
+        step = self.corpus_block_size
+        if rows is None:
+            return [
+                (slice(start, min(start + step, len(self.vectors))), np.arange(start, min(start + step, len(self.vectors))))
+                for start in range(0, len(self.vectors), step)
+            ]
+        return [(rows[start:start + step], rows[start:start + step]) for start in range(0, len(rows), step)]
+
+    def _distances(self, queries, vectors, sq_norms=None):
+        """쿼리 배치 x 벡터 블록 거리 행렬 (작을수록 가까움)"""
+        if self.space_type == "l2":
+            q_norms = (queries ** 2).sum(axis=1, keepdims=True)
+            # ||x - q||^2 = ||x||^2 - 2x·q + ||q||^2 (부동소수 오차로 인한 음수 방지)
+            return np.maximum(sq_norms[None, :] - 2 * (queries @ vectors.T) + q_norms, 0)
+        if self.space_type == "cosinesimil":
+            return 1 - self._normalize(queries) @ vectors.T
+        if self.space_type == "innerproduct":
+            return -(queries @ vectors.T)
+        
+        # l1: 행렬곱으로 표현할 수 없으므로 코퍼스 블록 단위 브로드캐스팅
+        return np.concatenate([
+            np.abs(queries[:, None, :] - vectors[None, start:start + self.block_size, :]).sum(axis=2)
+            for start in range(0, len(vectors), self.block_size)
+        ], axis=1)
+
+    def distances(self, queries, rows=None):
+        """쿼리 배치 x 코퍼스(또는 rows 부분집합) 거리 행렬 (작을수록 가까움)"""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        sq_norms = None if self.sq_norms is None else (self.sq_norms if rows is None else self.sq_norms[rows])
+        return self._distances(queries, self._corpus(rows), sq_norms)
+
+    def search(self, queries, k, mask=None):
+        """정확 top-k 탐색 → (문서 ID 배열, 점수 배열), 각 shape (쿼리 수, k)
+        
+        mask: 코퍼스 행별 bool 배열 (필터 조건을 만족하는 문서만 후보로 사용)
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        rows = None if mask is None else np.flatnonzero(mask)
+        candidate_count = len(self.vectors) if rows is None else len(rows)
+        k = min(k, candidate_count)
+        
+        if k == 0:
+            return np.empty((len(queries), 0), dtype=self.ids.dtype), np.empty((len(queries), 0), dtype=np.float64)
+        
+        # 코퍼스 블록을 한 번씩만 읽고, 블록별 후보를 쿼리별 누적 top-k 와 병합
+        best_distances = np.full((len(queries), k), np.inf)
+        best_positions = np.zeros((len(queries), k), dtype=np.int64)
+        for chunk, positions in self._chunks(rows):
+            vectors = self._corpus(chunk)
+            sq_norms = None if self.sq_norms is None else (self.sq_norms if chunk is None else self.sq_norms[chunk])
+            
+            for start in range(0, len(queries), self.batch_size):
+                end = start + self.batch_size
+                batch = self._distances(queries[start:end], vectors, sq_norms)
+                
+                # argpartition 으로 블록 내 k 개 후보만 추린 뒤 누적 후보와 병합
+                block_k = min(k, batch.shape[1])
+                top = np.argpartition(batch, block_k - 1, axis=1)[:, :block_k]
+                merged_distances = np.concatenate([best_distances[start:end], np.take_along_axis(batch, top, axis=1)], axis=1)
+                merged_positions = np.concatenate([best_positions[start:end], top if positions is None else positions[top]], axis=1)
+                
+                keep = np.argpartition(merged_distances, k - 1, axis=1)[:, :k]
+                best_distances[start:end] = np.take_along_axis(merged_distances, keep, axis=1)
+                best_positions[start:end] = np.take_along_axis(merged_positions, keep, axis=1)
+        
+        order = np.argsort(best_distances, axis=1, kind="stable")
+        best_distances = np.take_along_axis(best_distances, order, axis=1)
+        best_positions = np.take_along_axis(best_positions, order, axis=1)
+        return self.ids[best_positions], distance_to_score(best_distances, self.space_type)
+
+    def scores_for(self, query, doc_ids):
+        """지정 문서들에 대한 정확한 _score (검색 결과 점수 검증용)"""
+        if self._row_lookup is None:
+            self._row_lookup = {doc_id: row for row, doc_id in enumerate(self.ids.tolist())}
+        rows = np.array([self._row_lookup[doc_id] for doc_id in doc_ids], dtype=np.int64)
+        if len(rows) == 0:
+            return np.empty(0)
+        return distance_to_score(self.distances(query, rows)[0], self.space_type)
+
+    def evaluate(self, query, hit_ids, hit_scores, k=None, mask=None):
+        """단일 쿼리 검색 결과를 정답과 비교
+        
+        반환값: {"recall": recall@k, "score_max_error": 반환 문서 점수 최대 오차,
+                 "expected_ids": 정답 top-k, "missing_ids": 누락된 정답 문서}
+        """
+        k = k or len(hit_ids)
+        expected_ids, _ = self.search(query, k, mask)
+        expected = expected_ids[0].tolist()
+        
+        found = set(hit_ids[:k]) & set(expected)
+        exact_scores = self.scores_for(query, hit_ids)
+        score_error = float(np.max(np.abs(np.asarray(hit_scores) - exact_scores))) if len(hit_ids) else 0.0
+        
+        return {
+            "recall": len(found) / len(expected) if expected else 1.0,
+            "score_max_error": score_error,
+            "expected_ids": expected,
+            "missing_ids": [doc_id for doc_id in expected if doc_id not in found]
+        }
+
+
+def recall_at_k(retrieved, truth, k):
+    """쿼리별 검색 결과와 정답 top-k 의 평균 recall"""
+    recalls = [
+        len(set(list(ids)[:k]) & set(list(expected)[:k])) / k
+        for ids, expected in zip(retrieved, truth)
+    ]
+    return float(np.mean(recalls))
+
+
+def relevance_at_k(judgements, k, relevant_counts=None):
+    """쿼리별 검색 결과 관련성(bool 목록) → 평균 precision@k, nDCG@k, MRR
+    
+    relevant_counts: 쿼리별 전체 관련 문서 수 (이상적 DCG 계산용, 미지정 시 k 로 가정)
+    """
+    discounts = 1 / np.log2(np.arange(2, k + 2))
+    precision, ndcg, reciprocal_rank = [], [], []
+    for i, relevant in enumerate(judgements):
+        gains = np.zeros(k)
+        gains[:min(k, len(relevant))] = np.asarray(relevant[:k], dtype=float)
+        ideal_count = min(k, relevant_counts[i] if relevant_counts is not None else k)
+        ideal = discounts[:ideal_count].sum()
+        
+        precision.append(gains.mean())
+        ndcg.append((gains * discounts).sum() / ideal if ideal > 0 else 0.0)
+        hits = np.flatnonzero(gains)
+        reciprocal_rank.append(1 / (hits[0] + 1) if len(hits) else 0.0)
+    
+    return {
+        f"precision@{k}": float(np.mean(precision)),
+        f"ndcg@{k}": float(np.mean(ndcg)),
+        "mrr": float(np.mean(reciprocal_rank))
+    }
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+_msearch 기반 배치 KNN 검색
+==========================
+
+N 개의 쿼리 벡터(및 쿼리별 선택적 필터)를 batch_size 단위 _msearch 요청으로 묶고,
+여러 배치를 병렬로 전송하여 쿼리별 검색 결과와 지연 시간을 반환합니다.
+"전체 고객 1만 명에 대한 유사 상품 찾기" 같은 대량 유사도 작업용입니다.
+필터링 KNN / 하이브리드(어휘 + 벡터) 검색 본문과 점수 정규화 검색 파이프라인 생성 함수도 제공합니다.
+
+사용 예:
+    python knn_search.py --index knn-benchmark --dimension 128 --count 10000 --batch-size 200 --parallel 4
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from opensearch_client import get_client
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_PARALLEL_BATCHES = 4
+
+
+def build_knn_body(field, vector, k, size=None, knn_filter=None, source=False):
+    """단일 KNN 검색 본문 (knn_filter 는 knn 쿼리 내부 filter 로 적용)"""
+    knn_clause = {
+        "vector": vector.tolist() if isinstance(vector, np.ndarray) else list(vector),
+        "k": k
+    }
+    if knn_filter is not None:
+        knn_clause["filter"] = knn_filter
+    
+    return {
+        "size": size or k,
+        "_source": source,
+        "query": {"knn": {field: knn_clause}}
+    }
+
+
+FILTER_STRATEGIES = ["post_filter", "efficient_filter", "script_score"]
+
+# knn_score 스크립트는 내적을 "innerprod" 로 표기
+SCRIPT_SPACE_TYPES = {"innerproduct": "innerprod"}
+
+
+def build_filtered_knn_body(strategy, field, vector, k, knn_filter, space_type):
+    """필터링 KNN 전략별 검색 본문
+    
+    post_filter: bool 의 must 에 knn, filter 에 조건 (근사 top-k 후 필터 → k 개 미만 가능)
+    efficient_filter: knn 쿼리 filter 파라미터 (lucene/faiss 검색 중 필터 적용)
+    script_score: 필터 통과 문서 전체에 대해 정확한 점수 계산 (사전 필터 + 전수 탐색)
+    """
+    vector = vector.tolist() if isinstance(vector, np.ndarray) else list(vector)
+    
+    if strategy == "post_filter":
+        query = {
+            "bool": {
+                "must": [{"knn": {field: {"vector": vector, "k": k}}}],
+                "filter": [knn_filter]
+            }
+        }
+    elif strategy == "efficient_filter":
+        query = {"knn": {field: {"vector": vector, "k": k, "filter": knn_filter}}}
+    elif strategy == "script_score":
+        query = {
+            "script_score": {
+                "query": {"bool": {"filter": [knn_filter]}},
+                "script": {
+                    "source": "knn_score",
+                    "lang": "knn",
+                    "params": {
+                        "field": field,
+                        "query_value": vector,
+                        "space_type": SCRIPT_SPACE_TYPES.get(space_type, space_type)
+                    }
+                }
+            }
+        }
+    else:
+        raise ValueError(f"지원하지 않는 필터 전략: {strategy}")
+    
+    return {"size": k, "_source": False, "query": query}
+
+
+HYBRID_NORMALIZATIONS = ["min_max", "l2"]
+HYBRID_COMBINATIONS = ["arithmetic_mean", "harmonic_mean"]
+
+
+def build_normalization_pipeline(normalization, combination, weights=None):
+    """하이브리드 검색용 normalization-processor 검색 파이프라인 본문
+    
+    weights: hybrid 하위 쿼리 순서(어휘, 벡터)와 같은 순서의 결합 가중치
+    """
+    combination_config = {"technique": combination}
+    if weights:
+        combination_config["parameters"] = {"weights": list(weights)}
+    
+    return {
+        "description": f"hybrid search {normalization} + {combination}",
+        "phase_results_processors": [{
+            "normalization-processor": {
+                "normalization": {"technique": normalization},
+                "combination": combination_config
+            }
+        }]
+    }
+
+
+def put_search_pipeline(client, pipeline_id, body):
+    """검색 파이프라인 생성/갱신"""
+    return client.transport.perform_request("PUT", f"/_search/pipeline/{pipeline_id}", body=body)
+
+
+def delete_search_pipeline(client, pipeline_id):
+    """검색 파이프라인 삭제"""
+    return client.transport.perform_request("DELETE", f"/_search/pipeline/{pipeline_id}")
+
+
+def build_hybrid_body(text_field, text, vector_field, vector, k, size=None, source=False):
+    """어휘(match) + 벡터(knn) hybrid 쿼리 본문 (점수 결합은 검색 파이프라인에서 수행)"""
+    return {
+        "size": size or k,
+        "_source": source,
+        "query": {
+            "hybrid": {
+                "queries": [
+                    {"match": {text_field: {"query": text}}},
+                    build_knn_body(vector_field, vector, k)["query"]
+                ]
+            }
+        }
+    }
+
+
+def _run_batch(client, index_name, bodies, timeout):
+    """_msearch 1회 실행 → (응답 목록, 클라이언트 지연 ms)"""
+    request = []
+    for body in bodies:
+        request.append({"index": index_name})
+        request.append(body)
+    
+    start_time = time.perf_counter()
+    response = client.msearch(body=request, request_timeout=timeout)
+    latency = (time.perf_counter() - start_time) * 1000
+    return response["responses"], latency
+
+
+def msearch_knn(client, index_name, vectors, field="vector", k=10, size=None, filters=None,
+                batch_size=DEFAULT_BATCH_SIZE, parallel_batches=DEFAULT_PARALLEL_BATCHES,
+                source=False, timeout=60):
+    """쿼리 벡터 목록을 배치 _msearch 로 실행
+    
+    filters: 쿼리별 필터 목록 (None 항목은 필터 없음)
+    반환값: 입력 순서와 같은 쿼리별 결과 목록
+        {"batch": 배치 번호, "hits": [...], "took_ms": 서버 처리 시간, "batch_latency_ms": 배치 왕복 시간,
+         "batch_size": 배치 쿼리 수, "error": 오류 (없으면 None)}
+    """
+    bodies = [
+        build_knn_body(field, vector, k, size, filters[i] if filters else None, source)
+        for i, vector in enumerate(vectors)
+    ]
+    batches = [(start, bodies[start:start + batch_size]) for start in range(0, len(bodies), batch_size)]
+    results = [None] * len(bodies)
+
+    def run(batch):
+        start, batch_bodies = batch
+        try:
+            responses, latency = _run_batch(client, index_name, batch_bodies, timeout)
+        except Exception as e:
+            responses, latency = [{"error": str(e)}] * len(batch_bodies), 0.0
+        
+        for offset, response in enumerate(responses):
+            error = response.get("error")
+            results[start + offset] = {
+                "batch": start // batch_size,
+                "hits": [] if error else response["hits"]["hits"],
+                "took_ms": response.get("took", 0),
+                "batch_latency_ms": latency,
+                "batch_size": len(batch_bodies),
+                "error": error
+            }
+    
+    with ThreadPoolExecutor(max_workers=parallel_batches) as executor:
+        list(executor.map(run, batches))
+    
+    return results
+
+
+def summarize_results(results, elapsed):
+    """배치 검색 결과 요약 (QPS, 서버 처리 시간 백분위, 오류 수)"""
+    took = np.array([result["took_ms"] for result in results if not result["error"]] or [0])
+    # 같은 배치의 쿼리는 왕복 시간을 공유하므로 배치별로 한 번만 집계
+    batch_latency = np.array(list({r["batch"]: r["batch_latency_ms"] for r in results if not r["error"]}.values()) or [0])
+    return {
+        "queries": len(results),
+        "errors": sum(1 for result in results if result["error"]),
+        "elapsed_sec": elapsed,
+        "qps": len(results) / elapsed if elapsed > 0 else 0,
+        "took_p50_ms": float(np.percentile(took, 50)),
+        "took_p95_ms": float(np.percentile(took, 95)),
+        "took_p99_ms": float(np.percentile(took, 99)),
+        "batch_latency_p50_ms": float(np.percentile(batch_latency, 50))
+    }
+
+
+def parse_args(argv):
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="_msearch 배치 KNN 검색 처리량 측정")
+    parser.add_argument("--index", default="knn-benchmark")
+    parser.add_argument("--field", default="vector")
+    parser.add_argument("--dimension", type=int, default=128)
+    parser.add_argument("--count", type=int, default=10000, help="쿼리 벡터 수")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL_BATCHES)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """무작위 쿼리 벡터로 배치 KNN 처리량 측정"""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    client = get_client(pool_size=args.parallel + 2)
+    vectors = np.random.default_rng(args.seed).standard_normal((args.count, args.dimension), dtype=np.float32)
+    
+    print(f"🔍 배치 KNN 검색: {args.count:,}건 (배치 {args.batch_size}, 병렬 {args.parallel})")
+    start_time = time.time()
+    results = msearch_knn(
+        client, args.index, vectors, field=args.field, k=args.k,
+        batch_size=args.batch_size, parallel_batches=args.parallel
+    )
+    summary = summarize_results(results, time.time() - start_time)
+    
+    print(f"✅ {summary['queries']:,}건 완료 ({summary['elapsed_sec']:.2f}초, {summary['qps']:,.1f} QPS)")
+    print(f"   서버 처리 p50 {summary['took_p50_ms']:.1f}ms / p95 {summary['took_p95_ms']:.1f}ms / p99 {summary['took_p99_ms']:.1f}ms")
+    print(f"   배치 왕복 p50 {summary['batch_latency_p50_ms']:.1f}ms")
+    if summary["errors"]:
+        first_error = next(result["error"] for result in results if result["error"])
+        print(f"   ⚠️ 오류 {summary['errors']:,}건: {str(first_error)[:120]}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
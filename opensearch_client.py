@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+OpenSearch 공용 클라이언트 팩토리
+모든 플러그인 테스터가 하나의 커넥션 풀(keep-alive)을 공유하도록 관리
+"""
+
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from opensearchpy import OpenSearch, RequestsHttpConnection
+import urllib3
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+OPENSEARCH_HOST = "localhost"
+OPENSEARCH_PORT = 9200
+OPENSEARCH_AUTH = ('admin', 'Kcb2025opSLabAi9')
+BASE_URL = f"https://{OPENSEARCH_HOST}:{OPENSEARCH_PORT}"
+
+# 커넥션 풀 크기 (환경변수 OPENSEARCH_POOL_SIZE 로 조정 가능)
+DEFAULT_POOL_SIZE = int(os.environ.get("OPENSEARCH_POOL_SIZE", "20"))
+DEFAULT_TIMEOUT = 30
+
+_lock = threading.Lock()
+_clients = {}
+_sessions = {}
+
+
+def get_client(pool_size=None, timeout=DEFAULT_TIMEOUT):
+    """풀 크기별로 하나씩 생성되는 공유 OpenSearch 클라이언트 반환"""
+    pool_size = pool_size or DEFAULT_POOL_SIZE
+    key = (pool_size, timeout)
+    
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = OpenSearch(
+                hosts=[{'host': OPENSEARCH_HOST, 'port': OPENSEARCH_PORT}],
+                http_auth=OPENSEARCH_AUTH,
+                use_ssl=True,
+                verify_certs=False,
+                ssl_assert_hostname=False,
+                ssl_show_warn=False,
+                connection_class=RequestsHttpConnection,
+                pool_maxsize=pool_size,
+                timeout=timeout
+            )
+            _clients[key] = client
+        return client
+
+
+def get_session(pool_size=None):
+    """/_plugins/... REST 호출용 keep-alive requests.Session 반환"""
+    pool_size = pool_size or DEFAULT_POOL_SIZE
+    
+    with _lock:
+        session = _sessions.get(pool_size)
+        if session is None:
+            session = requests.Session()
+            session.auth = OPENSEARCH_AUTH
+            session.verify = False
+            
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[pool_size] = session
+        return session
+
+
+def create_async_client(pool_size=None, timeout=DEFAULT_TIMEOUT):
+    """이벤트 루프 전용 AsyncOpenSearch 클라이언트 생성 (사용 후 close 필요)"""
+    # AsyncOpenSearch는 aiohttp가 설치된 경우에만 제공됨
+    from opensearchpy import AsyncOpenSearch
+    
+    return AsyncOpenSearch(
+        hosts=[{'host': OPENSEARCH_HOST, 'port': OPENSEARCH_PORT}],
+        http_auth=OPENSEARCH_AUTH,
+        use_ssl=True,
+        verify_certs=False,
+        ssl_assert_hostname=False,
+        ssl_show_warn=False,
+        maxsize=pool_size or DEFAULT_POOL_SIZE,
+        timeout=timeout
+    )
+
+
+def close_all():
+    """공유 클라이언트와 세션의 커넥션 풀 정리"""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        for session in _sessions.values():
+            session.close()
+        _clients.clear()
+        _sessions.clear()
@@ -9,20 +9,14 @@ OpenSearch Alerting 플러그인 간단 테스트
 
 import json
 import uuid
-from opensearchpy import OpenSearch
+from opensearch_client import get_client
 import warnings
 warnings.filterwarnings('ignore')
 
 class AlertingTester:
     def __init__(self):
         """OpenSearch 클라이언트 초기화"""
-        self.client = OpenSearch(
-            hosts=[{'host': 'localhost', 'port': 9200}],
-            http_auth=('admin', 'Kcb2025opSLabAi9'),
-            use_ssl=True,
-            verify_certs=False,
-            ssl_show_warn=False
-        )
+        self.client = get_client()
         print("🚨 Alerting 플러그인 테스트 시작")
         print("=" * 40)
     
@@ -13,25 +13,30 @@ Anomaly Detection 플러그인의 주요 기능들을 테스트합니다:
 날짜: 2025-08-12
 """
 
+import sys
 import json
 import time
 import datetime
 import numpy as np
-from opensearchpy import OpenSearch
+from opensearch_client import get_client
+from plugin_test_async import run_test_stages
+from index_helpers import stream_bulk, print_bulk_errors
+import synthetic_data
+from anomaly_historical import HistoricalAnalysisRunner, index_time_range, print_backfill_summary
+from rcf import RandomCutForest
+from anomaly_incremental import IncrementalAnomalyAnalyzer, LATEST
+from anomaly_hc_benchmark import HCDetectorBenchmark, print_hc_report
+from transaction_replay import TransactionReplayer, parse_schedule, detector_window_hits, print_replay_report, DEFAULT_SCHEDULE
 from opensearchpy.exceptions import RequestError, NotFoundError
 import warnings
 warnings.filterwarnings('ignore')
 
 class AnomalyDetectionTester:
-    def __init__(self):
-        """OpenSearch 클라이언트 초기화"""
-        self.client = OpenSearch(
-            hosts=[{'host': 'localhost', 'port': 9200}],
-            http_auth=('admin', 'Kcb2025opSLabAi9'),
-            use_ssl=True,
-            verify_certs=False,
-            ssl_show_warn=False
-        )
+    def __init__(self, scale=1.0):
+        """OpenSearch 클라이언트 초기화 (scale: 실시간 거래 데이터 배수)"""
+        self.client = get_client()
+        self.scale = scale
+        self.incremental = IncrementalAnomalyAnalyzer(self.client)
         print("🔍 Anomaly Detection 플러그인 테스트 시작")
         print("=" * 50)
     
@@ -73,11 +78,13 @@ class AnomalyDetectionTester:
             print(f"❌ 플러그인 상태 확인 실패: {e}")
             return False
     
-    def setup_financial_data(self):
+    def setup_financial_data(self, realtime_days=3, scale=None):
         """금융 업무용 시계열 데이터 생성"""
         print("\n📊 2. 금융 시계열 데이터 생성")
         print("-" * 30)
         
+        scale = scale or self.scale
+        
         try:
             # 1. 일일 거래량 데이터 인덱스
             transaction_volume_mapping = {
@@ -127,149 +134,90 @@ class AnomalyDetectionTester:
                 self.client.indices.create(index=index_name, body=mapping)
                 print(f"✅ 인덱스 '{index_name}' 생성 완료")
             
-            # 30일간 일일 메트릭 데이터 생성
-            daily_data = []
-            np.random.seed(42)
-            base_date = datetime.datetime(2025, 7, 13)  # 30일 전부터
+            # 스트리밍 벌크 인덱싱 (제너레이터 → 청크 단위 병렬 전송)
+            print("📊 일일 메트릭 데이터 인덱싱 중...")
+            daily_result = stream_bulk(
+                self.client, "financial-daily-metrics", self.generate_daily_metrics()
+            )
+            print_bulk_errors(daily_result, "일일 메트릭")
             
-            for day in range(30):
-                current_date = base_date + datetime.timedelta(days=day)
-                is_weekend = current_date.weekday() >= 5
-                
-                # 주말/주중 패턴 반영
-                if is_weekend:
-                    base_transactions = 8000 + np.random.normal(0, 500)
-                    base_amount = 12000000 + np.random.normal(0, 1000000)
-                else:
-                    base_transactions = 15000 + np.random.normal(0, 1000)
-                    base_amount = 25000000 + np.random.normal(0, 2000000)
-                
-                # 특정 날짜에 이상 패턴 주입 (시스템 장애, 프로모션 등)
-                if day in [5, 12, 20]:  # 이상 날짜
-                    if day == 5:  # 시스템 장애 시뮬레이션
-                        base_transactions *= 0.3
-                        base_amount *= 0.3
-                        system_load = 95 + np.random.normal(0, 3)
-                        response_time = 2000 + np.random.normal(0, 500)
-                        error_rate = 15 + np.random.normal(0, 3)
-                    elif day == 12:  # 프로모션 이벤트
-                        base_transactions *= 2.5
-                        base_amount *= 3.0
-                        system_load = 85 + np.random.normal(0, 5)
-                        response_time = 800 + np.random.normal(0, 200)
-                        error_rate = 2 + np.random.normal(0, 1)
-                    else:  # 외부 공격 시뮬레이션
-                        base_transactions *= 1.8
-                        base_amount *= 0.7
-                        system_load = 90 + np.random.normal(0, 5)
-                        response_time = 1500 + np.random.normal(0, 300)
-                        error_rate = 8 + np.random.normal(0, 2)
-                else:  # 정상 범위
-                    system_load = 45 + np.random.normal(0, 10)
-                    response_time = 200 + np.random.normal(0, 50)
-                    error_rate = 0.5 + np.random.normal(0, 0.3)
-                
-                daily_record = {
-                    "@timestamp": current_date.isoformat(),
-                    "date": current_date.strftime("%Y-%m-%d"),
-                    "daily_transaction_count": max(1000, int(base_transactions)),
-                    "daily_transaction_amount": max(1000000, base_amount),
-                    "avg_transaction_size": base_amount / base_transactions if base_transactions > 0 else 0,
-                    "peak_hour_transactions": max(500, int(base_transactions * 0.15)),
-                    "system_load": max(0, min(100, system_load)),
-                    "response_time_ms": max(50, response_time),
-                    "error_rate": max(0, min(100, error_rate)),
-                    "region": np.random.choice(["Seoul", "Busan", "Incheon", "Daegu", "Gwangju"])
-                }
-                daily_data.append(daily_record)
+            print(f"📊 실시간 거래 데이터 인덱싱 중... (최근 {realtime_days}일, scale={scale})")
+            realtime_result = stream_bulk(
+                self.client, "financial-realtime-transactions",
+                self.generate_realtime_transactions(days=realtime_days, scale=scale),
+                progress_every=100000
+            )
+            print_bulk_errors(realtime_result, "실시간 거래")
             
-            # 실시간 거래 데이터 생성 (최근 3일)
-            realtime_data = []
-            for day_offset in range(3):
-                current_date = datetime.datetime.now() - datetime.timedelta(days=day_offset)
-                
-                # 하루 24시간 동안 시간당 거래 생성
-                for hour in range(24):
-                    transaction_time = current_date.replace(hour=hour, minute=0, second=0)
-                    is_weekend = transaction_time.weekday() >= 5
-                    
-                    # 시간대별 거래 패턴
-                    if 6 <= hour <= 9:  # 출근 시간
-                        transaction_count = 200 + np.random.poisson(50)
-                    elif 12 <= hour <= 14:  # 점심 시간
-                        transaction_count = 300 + np.random.poisson(80)
-                    elif 18 <= hour <= 22:  # 퇴근/저녁 시간
-                        transaction_count = 250 + np.random.poisson(70)
-                    else:  # 기타 시간
-                        transaction_count = 100 + np.random.poisson(30)
-                    
-                    # 주말 패턴 조정
-                    if is_weekend:
-                        transaction_count = int(transaction_count * 0.7)
-                    
-                    # 거래 생성
-                    for _ in range(transaction_count):
-                        # 정상 거래 패턴
-                        if np.random.random() > 0.02:  # 98% 정상
-                            if 9 <= hour <= 17:  # 업무시간
-                                amount = np.random.lognormal(np.log(100), 0.8)
-                            else:  # 비업무시간
-                                amount = np.random.lognormal(np.log(50), 0.6)
-                            anomaly_score = np.random.uniform(0, 0.3)
-                        else:  # 2% 이상 거래
-                            amount = np.random.lognormal(np.log(1000), 1.2)  # 큰 금액
-                            anomaly_score = np.random.uniform(0.7, 1.0)
-                        
-                        transaction = {
-                            "@timestamp": (transaction_time + datetime.timedelta(
-                                minutes=np.random.randint(0, 60),
-                                seconds=np.random.randint(0, 60)
-                            )).isoformat(),
-                            "transaction_id": f"TXN_{day_offset:02d}{hour:02d}{np.random.randint(1000, 9999)}",
-                            "customer_id": f"CUST_{np.random.randint(1, 1001):04d}",
-                            "amount": amount,
-                            "merchant_type": np.random.choice([
-                                "restaurant", "grocery", "gas_station", "retail", 
-                                "online", "pharmacy", "entertainment"
-                            ]),
-                            "location": np.random.choice([
-                                "Seoul_Gangnam", "Seoul_Jongno", "Busan_Haeundae", 
-                                "Incheon_Airport", "Daegu_Central"
-                            ]),
-                            "is_weekend": is_weekend,
-                            "hour_of_day": hour,
-                            "anomaly_score": anomaly_score
-                        }
-                        realtime_data.append(transaction)
-            
-            # 벌크 인덱싱
-            print(f"📊 일일 메트릭 데이터 인덱싱 중... ({len(daily_data)}건)")
-            bulk_body = []
-            for record in daily_data:
-                bulk_body.extend([
-                    {"index": {"_index": "financial-daily-metrics"}},
-                    record
-                ])
-            
-            self.client.bulk(body=bulk_body, refresh=True)
-            
-            print(f"📊 실시간 거래 데이터 인덱싱 중... ({len(realtime_data)}건)")
-            bulk_body = []
-            for record in realtime_data:
-                bulk_body.extend([
-                    {"index": {"_index": "financial-realtime-transactions"}},
-                    record
-                ])
-            
-            self.client.bulk(body=bulk_body, refresh=True)
-            
-            print(f"✅ 총 {len(daily_data)}개 일일 메트릭 + {len(realtime_data)}개 실시간 거래 데이터 생성 완료")
-            return True
+            self.incremental.reset()  # 인덱스를 새로 만들었으므로 누적 상태도 처음부터
+            print(f"✅ 총 {daily_result['success']:,}개 일일 메트릭 + {realtime_result['success']:,}개 실시간 거래 데이터 생성 완료")
+            print(f"   적재 속도: {realtime_result['docs_per_sec']:,.0f}건/초 ({realtime_result['elapsed']:.1f}초)")
+            return daily_result['failed'] == 0 and realtime_result['failed'] == 0
             
         except Exception as e:
             print(f"❌ 금융 데이터 생성 실패: {e}")
             return False
     
+    def generate_daily_metrics(self):
+        """30일간 일일 메트릭 데이터 생성 (제너레이터)"""
+        np.random.seed(42)
+        base_date = datetime.datetime(2025, 7, 13)  # 30일 전부터
+        
+        for day in range(30):
+            current_date = base_date + datetime.timedelta(days=day)
+            is_weekend = current_date.weekday() >= 5
+            
+            # 주말/주중 패턴 반영
+            if is_weekend:
+                base_transactions = 8000 + np.random.normal(0, 500)
+                base_amount = 12000000 + np.random.normal(0, 1000000)
+            else:
+                base_transactions = 15000 + np.random.normal(0, 1000)
+                base_amount = 25000000 + np.random.normal(0, 2000000)
+            
+            # 특정 날짜에 이상 패턴 주입 (시스템 장애, 프로모션 등)
+            if day in [5, 12, 20]:  # 이상 날짜
+                if day == 5:  # 시스템 장애 시뮬레이션
+                    base_transactions *= 0.3
+                    base_amount *= 0.3
+                    system_load = 95 + np.random.normal(0, 3)
+                    response_time = 2000 + np.random.normal(0, 500)
+                    error_rate = 15 + np.random.normal(0, 3)
+                elif day == 12:  # 프로모션 이벤트
+                    base_transactions *= 2.5
+                    base_amount *= 3.0
+                    system_load = 85 + np.random.normal(0, 5)
+                    response_time = 800 + np.random.normal(0, 200)
+                    error_rate = 2 + np.random.normal(0, 1)
+                else:  # 외부 공격 시뮬레이션
+                    base_transactions *= 1.8
+                    base_amount *= 0.7
+                    system_load = 90 + np.random.normal(0, 5)
+                    response_time = 1500 + np.random.normal(0, 300)
+                    error_rate = 8 + np.random.normal(0, 2)
+            else:  # 정상 범위
+                system_load = 45 + np.random.normal(0, 10)
+                response_time = 200 + np.random.normal(0, 50)
+                error_rate = 0.5 + np.random.normal(0, 0.3)
+            
+            daily_record = {
+                "@timestamp": current_date.isoformat(),
+                "date": current_date.strftime("%Y-%m-%d"),
+                "daily_transaction_count": max(1000, int(base_transactions)),
+                "daily_transaction_amount": max(1000000, base_amount),
+                "avg_transaction_size": base_amount / base_transactions if base_transactions > 0 else 0,
+                "peak_hour_transactions": max(500, int(base_transactions * 0.15)),
+                "system_load": max(0, min(100, system_load)),
+                "response_time_ms": max(50, response_time),
+                "error_rate": max(0, min(100, error_rate)),
+                "region": np.random.choice(["Seoul", "Busan", "Incheon", "Daegu", "Gwangju"])
+            }
+            yield daily_record
+    
+    def generate_realtime_transactions(self, days=3, scale=1.0):
+        """최근 N일 실시간 거래 데이터 생성 (벡터화 제너레이터, scale 로 거래량 배수 조정)"""
+        return synthetic_data.generate_realtime_transactions(days=days, scale=scale)
+    
     def create_anomaly_detectors(self):
         """이상 탐지기 생성 및 설정"""
         print("\n🎯 3. 이상 탐지기 생성 및 설정")
@@ -463,6 +411,81 @@ class AnomalyDetectionTester:
             print(f"❌ 이상 탐지기 생성 실패: {e}")
             return False
     
+    def run_historical_analysis(self, timeout=3600):
+        """적재된 과거 데이터 전체 구간을 탐지기별 historical analysis 작업으로 일괄 분석"""
+        print("\n🕰️ 과거 구간 일괄 분석 (historical analysis)")
+        print("-" * 30)
+        
+        detector_indices = {
+            "daily": "financial-daily-metrics",
+            "realtime": "financial-realtime-transactions"
+        }
+        detector_ids = getattr(self, "detector_ids", {})
+        if not detector_ids:
+            print("❌ 분석할 탐지기가 없습니다. 탐지기를 먼저 생성하세요.")
+            return False
+        
+        try:
+            runner = HistoricalAnalysisRunner(self.client)
+            summary = {}
+            for detector_type, detector_id in detector_ids.items():
+                start_time, end_time = index_time_range(self.client, detector_indices[detector_type])
+                if start_time is None:
+                    print(f"⚠️ {detector_type}: 분석할 데이터가 없습니다")
+                    continue
+                # 구간 끝은 배타적이므로 마지막 문서가 포함되도록 1분 여유
+                summary.update(runner.backfill([detector_id], start_time, end_time + 60000, timeout))
+            
+            print_backfill_summary(summary)
+            return bool(summary) and any(result.get("state") == "FINISHED" for result in summary.values())
+            
+        except Exception as e:
+            print(f"❌ 과거 구간 분석 실패: {e}")
+            return False
+    
+    def run_hc_benchmark(self, entities=10000):
+        """customer_id category_field 다중 엔티티 탐지기 - 콜드 스타트 / 엔티티당 모델 메모리 / 구간 처리량 측정"""
+        print(f"\n👥 다중 엔티티 탐지기 벤치마크 (고객 {entities:,}명)")
+        print("-" * 30)
+        
+        try:
+            report = HCDetectorBenchmark(self.client).run(entities=entities, observe_intervals=2)
+            print_hc_report(report)
+            return report.get("cold_start", {}).get("cold_start_seconds") is not None
+            
+        except Exception as e:
+            print(f"❌ 다중 엔티티 탐지기 벤치마크 실패: {e}")
+            return False
+    
+    def run_replay_soak(self, duration=2520, settle=180):
+        """현재 시각 거래를 계속 흘려 넣으며 5 / 12 / 20일차 패턴을 주입하고 실시간 탐지기의 구간별 탐지 여부 확인"""
+        print(f"\n🎞️ 실시간 거래 리플레이 soak 테스트 ({duration}초)")
+        print("-" * 30)
+        
+        try:
+            report = TransactionReplayer(self.client).run(parse_schedule(DEFAULT_SCHEDULE), duration, loop=True)
+            detector_id = getattr(self, "detector_ids", {}).get("realtime")
+            if detector_id:
+                print(f"   ⏳ 탐지 결과 대기 ({settle}초)")
+                time.sleep(settle)
+                detector_window_hits(self.client, detector_id, report["windows"])
+            print_replay_report(report)
+            return report["sent"] > 0 and report["failed"] == 0
+            
+        except Exception as e:
+            print(f"❌ 실시간 거래 리플레이 실패: {e}")
+            return False
+    
+    def refresh_incremental_state(self):
+        """증분 분석 상태 갱신 - 워터마크 이후 새 문서만 집계 (분석 단계들이 공유, 새 데이터가 없으면 조회 생략)"""
+        delta = self.incremental.update(until=LATEST)
+        new_docs = sum(item["docs"] for item in delta.values())
+        if new_docs:
+            print(f"   📥 증분 집계: 새 문서 {new_docs:,}건 병합 "
+                  f"(누적 일일 메트릭 {self.incremental.state['metrics']['docs']:,}건, "
+                  f"거래 {self.incremental.state['transactions']['docs']:,}건)")
+        return delta
+    
     def analyze_anomaly_results(self):
         """이상 탐지 결과 분석"""
         print("\n📈 4. 이상 탐지 결과 분석")
@@ -472,58 +495,26 @@ class AnomalyDetectionTester:
             # 기본 통계 기반 이상 탐지 분석
             print("📊 기본 통계 기반 이상 패턴 분석:")
             
-            # 1. 일일 메트릭 이상 패턴 분석
-            daily_analysis_query = {
-                "size": 0,
-                "aggs": {
-                    "daily_stats": {
-                        "date_histogram": {
-                            "field": "@timestamp",
-                            "calendar_interval": "1d"
-                        },
-                        "aggs": {
-                            "total_transactions": {"sum": {"field": "daily_transaction_count"}},
-                            "avg_system_load": {"avg": {"field": "system_load"}},
-                            "avg_response_time": {"avg": {"field": "response_time_ms"}},
-                            "avg_error_rate": {"avg": {"field": "error_rate"}},
-                            "anomaly_score": {
-                                "bucket_script": {
-                                    "buckets_path": {
-                                        "load": "avg_system_load",
-                                        "response": "avg_response_time",
-                                        "errors": "avg_error_rate"
-                                    },
-                                    "script": """
-                                        double load_score = params.load > 80 ? (params.load - 80) / 20.0 : 0;
-                                        double response_score = params.response > 1000 ? (params.response - 1000) / 1000.0 : 0;
-                                        double error_score = params.errors > 5 ? (params.errors - 5) / 10.0 : 0;
-                                        return Math.min(1.0, (load_score + response_score + error_score) / 3.0);
-                                    """
-                                }
-                            }
-                        }
-                    },
-                    "overall_stats": {
-                        "stats": {"field": "daily_transaction_count"}
-                    }
-                }
-            }
-            
-            daily_result = self.client.search(
-                index="financial-daily-metrics", 
-                body=daily_analysis_query
-            )
+            # 워터마크 이후 새 데이터만 집계해 누적 상태에 병합 (전체 인덱스 재집계 없음)
+            self.refresh_incremental_state()
             
+            # 1. 일일 메트릭 이상 패턴 분석 (누적 상태의 일별 평균 + 규칙 기반 점수)
             print("\n   📅 일일 시스템 성능 분석:")
             anomalous_days = []
-            for bucket in daily_result['aggregations']['daily_stats']['buckets']:
-                date = bucket['key_as_string'][:10]
-                transactions = bucket['total_transactions']['value']
-                system_load = bucket['avg_system_load']['value']
-                response_time = bucket['avg_response_time']['value']
-                error_rate = bucket['avg_error_rate']['value']
-                anomaly_score = bucket['anomaly_score']['value']
-                
+            daily_features = []
+            for day in self.incremental.daily_summary():
+                date = day['date']
+                transactions = day['transactions']
+                system_load = day['system_load']
+                response_time = day['response_time']
+                error_rate = day['error_rate']
+                anomaly_score = day['score']
+                if anomaly_score is None:
+                    # 부하 / 응답시간 / 오류율 중 집계된 값이 없는 날은 점수를 매길 수 없어 건너뜀
+                    print(f"     {date}: ⚪ 지표 없음 (거래량: {transactions:,.0f})")
+                    continue
+                daily_features.append((date, [transactions, system_load, response_time]))
+
                 status = "🚨 이상" if anomaly_score > 0.3 else "✅ 정상"
                 print(f"     {date}: {status} (점수: {anomaly_score:.3f})")
                 print(f"       - 거래량: {transactions:,.0f}, 시스템 부하: {system_load:.1f}%")
@@ -539,62 +530,28 @@ class AnomalyDetectionTester:
                         "error_rate": error_rate
                     })
             
-            # 2. 실시간 거래 패턴 분석
-            realtime_analysis_query = {
-                "size": 0,
-                "aggs": {
-                    "hourly_patterns": {
-                        "date_histogram": {
-                            "field": "@timestamp",
-                            "calendar_interval": "1h"
-                        },
-                        "aggs": {
-                            "transaction_count": {"value_count": {"field": "transaction_id"}},
-                            "avg_amount": {"avg": {"field": "amount"}},
-                            "high_value_count": {
-                                "filter": {
-                                    "range": {"amount": {"gte": 500}}
-                                }
-                            },
-                            "avg_anomaly_score": {"avg": {"field": "anomaly_score"}},
-                            "suspicious_transactions": {
-                                "filter": {
-                                    "range": {"anomaly_score": {"gte": 0.7}}
-                                }
-                            }
-                        }
-                    },
-                    "merchant_anomalies": {
-                        "terms": {
-                            "field": "merchant_type",
-                            "size": 10
-                        },
-                        "aggs": {
-                            "avg_anomaly_score": {"avg": {"field": "anomaly_score"}},
-                            "high_risk_transactions": {
-                                "filter": {
-                                    "range": {"anomaly_score": {"gte": 0.5}}
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-            
-            realtime_result = self.client.search(
-                index="financial-realtime-transactions",
-                body=realtime_analysis_query
-            )
+            # 로컬 RCF 교차 검증 (탐지기와 같은 특성, 30개 점뿐이라 shingle 1 / 작은 forest 에 맞춘 점수 하한)
+            forest = RandomCutForest(shingle_size=1, output_after=3, score_floor=0.7)
+            rcf_days = [
+                date for (date, features), result in zip(daily_features, forest.process(
+                    features for _, features in daily_features
+                ))
+                if result["grade"] > 0
+            ]
+            rule_days = {day["date"] for day in anomalous_days}
+            print(f"\n   🌲 로컬 RCF 이상 날짜: {', '.join(rcf_days) or '없음'}")
+            print(f"       - 규칙 기반과 일치: {len(rule_days & set(rcf_days))}일, "
+                  f"RCF만: {len(set(rcf_days) - rule_days)}일, 규칙만: {len(rule_days - set(rcf_days))}일")
             
+            # 2. 실시간 거래 패턴 분석
             print(f"\n   ⏰ 시간대별 거래 패턴 분석:")
             suspicious_hours = []
-            for bucket in realtime_result['aggregations']['hourly_patterns']['buckets']:
-                timestamp = bucket['key_as_string']
-                count = bucket['transaction_count']['value']
-                avg_amount = bucket['avg_amount']['value']
-                high_value_count = bucket['high_value_count']['doc_count']
-                avg_anomaly = bucket['avg_anomaly_score']['value']
-                suspicious_count = bucket['suspicious_transactions']['doc_count']
+            for hour in self.incremental.hourly_patterns():
+                timestamp = hour['time']
+                count = hour['count']
+                avg_amount = hour['avg_amount']
+                avg_anomaly = hour['avg_anomaly']
+                suspicious_count = hour['suspicious']
                 
                 if suspicious_count > 0 or avg_anomaly > 0.3:
                     suspicious_hours.append({
@@ -611,10 +568,10 @@ class AnomalyDetectionTester:
                     print(f"       - 의심 거래: {suspicious_count}건, 평균 이상점수: {avg_anomaly:.3f}")
             
             print(f"\n   🏪 업종별 이상 패턴 분석:")
-            for bucket in realtime_result['aggregations']['merchant_anomalies']['buckets']:
-                merchant = bucket['key']
-                avg_anomaly = bucket['avg_anomaly_score']['value']
-                high_risk_count = bucket['high_risk_transactions']['doc_count']
+            for merchant_stats in self.incremental.merchant_anomalies():
+                merchant = merchant_stats['merchant']
+                avg_anomaly = merchant_stats['avg_anomaly']
+                high_risk_count = merchant_stats['high_risk']
                 
                 risk_level = "🚨 높음" if avg_anomaly > 0.4 else "⚠️ 중간" if avg_anomaly > 0.2 else "✅ 낮음"
                 print(f"     {merchant}: {risk_level} (평균 이상점수: {avg_anomaly:.3f}, 고위험: {high_risk_count}건)")
@@ -683,29 +640,6 @@ class AnomalyDetectionTester:
                             }
                         }
                     }
-                },
-                "performance_trends": {
-                    "size": 0,
-                    "query": {
-                        "range": {
-                            "@timestamp": {
-                                "gte": "now-24h"
-                            }
-                        }
-                    },
-                    "aggs": {
-                        "hourly_performance": {
-                            "date_histogram": {
-                                "field": "@timestamp",
-                                "calendar_interval": "1h"
-                            },
-                            "aggs": {
-                                "avg_system_load": {"avg": {"field": "system_load"}},
-                                "avg_response_time": {"avg": {"field": "response_time_ms"}},
-                                "avg_error_rate": {"avg": {"field": "error_rate"}}
-                            }
-                        }
-                    }
                 }
             }
             
@@ -768,24 +702,12 @@ class AnomalyDetectionTester:
             except Exception as e:
                 print(f"   ❌ 거래 현황 조회 실패: {e}")
             
-            # 3. 24시간 성능 트렌드
+            # 3. 24시간 성능 트렌드 (증분 분석 누적 상태의 시간 버킷)
             try:
-                performance_trends = self.client.search(
-                    index="financial-daily-metrics",
-                    body=monitoring_queries["performance_trends"]
-                )
+                self.refresh_incremental_state()
                 
                 print(f"\n📊 24시간 성능 트렌드:")
-                trend_data = []
-                for bucket in performance_trends['aggregations']['hourly_performance']['buckets']:
-                    if bucket['doc_count'] > 0:
-                        hour_data = {
-                            'time': bucket['key_as_string'],
-                            'load': bucket['avg_system_load']['value'],
-                            'response': bucket['avg_response_time']['value'],
-                            'errors': bucket['avg_error_rate']['value']
-                        }
-                        trend_data.append(hour_data)
+                trend_data = self.incremental.performance_trend(hours=24)
                 
                 if trend_data:
                     # 최근 몇 시간 데이터 표시
@@ -908,88 +830,16 @@ class AnomalyDetectionTester:
         print("-" * 30)
         
         try:
-            # 종합 분석을 위한 데이터 수집
-            analysis_queries = {
-                "system_reliability": {
-                    "size": 0,
-                    "aggs": {
-                        "avg_uptime": {
-                            "avg": {
-                                "script": {
-                                    "source": "100 - doc['error_rate'].value"
-                                }
-                            }
-                        },
-                        "performance_distribution": {
-                            "range": {
-                                "field": "response_time_ms",
-                                "ranges": [
-                                    {"key": "excellent", "to": 200},
-                                    {"key": "good", "from": 200, "to": 500},
-                                    {"key": "poor", "from": 500, "to": 1000},
-                                    {"key": "critical", "from": 1000}
-                                ]
-                            }
-                        },
-                        "load_distribution": {
-                            "histogram": {
-                                "field": "system_load",
-                                "interval": 20
-                            }
-                        }
-                    }
-                },
-                "transaction_insights": {
-                    "size": 0,
-                    "aggs": {
-                        "fraud_rate": {
-                            "avg": {"field": "anomaly_score"}
-                        },
-                        "high_risk_merchants": {
-                            "terms": {
-                                "field": "merchant_type",
-                                "order": {"avg_anomaly": "desc"}
-                            },
-                            "aggs": {
-                                "avg_anomaly": {"avg": {"field": "anomaly_score"}},
-                                "transaction_count": {"value_count": {"field": "transaction_id"}}
-                            }
-                        },
-                        "peak_hours": {
-                            "terms": {
-                                "field": "hour_of_day",
-                                "size": 24,
-                                "order": {"_count": "desc"}
-                            }
-                        },
-                        "weekend_vs_weekday": {
-                            "terms": {"field": "is_weekend"},
-                            "aggs": {
-                                "avg_amount": {"avg": {"field": "amount"}},
-                                "avg_anomaly": {"avg": {"field": "anomaly_score"}}
-                            }
-                        }
-                    }
-                }
-            }
-            
-            # 시스템 신뢰성 분석
-            system_result = self.client.search(
-                index="financial-daily-metrics",
-                body=analysis_queries["system_reliability"]
-            )
-            
-            # 거래 인사이트 분석
-            transaction_result = self.client.search(
-                index="financial-realtime-transactions",
-                body=analysis_queries["transaction_insights"]
-            )
+            # 종합 분석을 위한 데이터 수집 (증분 분석 누적 상태 - 전체 인덱스 재집계 없음)
+            self.refresh_incremental_state()
+            system_result = self.incremental.reliability()
+            transaction_result = self.incremental.transaction_insights()
             
             print("📊 종합 분석 결과:")
             
             # 시스템 성능 분석
-            avg_uptime = system_result['aggregations']['avg_uptime']['value']
-            perf_dist = system_result['aggregations']['performance_distribution']['buckets']
+            avg_uptime = system_result['avg_uptime']
+            perf_dist = system_result['performance_distribution']
             
             print(f"\n   🖥️ 시스템 성능 평가:")
             print(f"     평균 가용성: {avg_uptime:.2f}%")
@@ -1000,25 +850,27 @@ class AnomalyDetectionTester:
                 print(f"     {bucket['key']} 성능: {percentage:.1f}%")
             
             # 거래 패턴 분석
-            fraud_rate = transaction_result['aggregations']['fraud_rate']['value']
-            high_risk_merchants = transaction_result['aggregations']['high_risk_merchants']['buckets']
-            peak_hours = transaction_result['aggregations']['peak_hours']['buckets'][:3]
-            weekend_analysis = transaction_result['aggregations']['weekend_vs_weekday']['buckets']
+            fraud_rate = transaction_result['fraud_rate']
+            high_risk_merchants = transaction_result['high_risk_merchants']
+            peak_hours = transaction_result['peak_hours'][:3]
+            weekend_analysis = transaction_result['weekend']
+            amount_quantiles = transaction_result['amount_quantiles']
             
             print(f"\n   💳 거래 패턴 분석:")
             print(f"     전체 이상 점수: {fraud_rate:.3f}")
+            if amount_quantiles[0.5] is not None:
+                print(f"     거래 금액 분위수: p50 ${amount_quantiles[0.5]:,.0f}, p95 ${amount_quantiles[0.95]:,.0f}, "
+                      f"p99 ${amount_quantiles[0.99]:,.0f}")
             
             print(f"     고위험 업종 TOP 3:")
-            for i, bucket in enumerate(high_risk_merchants[:3], 1):
-                merchant = bucket['key']
-                avg_anomaly = bucket['avg_anomaly']['value']
-                count = bucket['transaction_count']['value']
+            for i, merchant_stats in enumerate(high_risk_merchants[:3], 1):
+                merchant = merchant_stats['merchant']
+                avg_anomaly = merchant_stats['avg_anomaly']
+                count = merchant_stats['docs']
                 print(f"       {i}. {merchant}: {avg_anomaly:.3f} ({count:.0f}건)")
             
             print(f"     거래 집중 시간대:")
-            for bucket in peak_hours:
-                hour = bucket['key']
-                count = bucket['doc_count']
+            for hour, count in peak_hours:
                 print(f"       {hour:02d}:00 - {count}건")
             
             # 비즈니스 추천사항 생성
@@ -1042,18 +894,17 @@ class AnomalyDetectionTester:
                 recommendations.append("🛡️ 사기 탐지 시스템 강화 - 이상 점수가 높은 거래 패턴 분석 및 대응")
             
             # 고위험 업종별 맞춤 대응
-            if high_risk_merchants and high_risk_merchants[0]['avg_anomaly']['value'] > 0.4:
-                top_risk_merchant = high_risk_merchants[0]['key']
+            if high_risk_merchants and high_risk_merchants[0]['avg_anomaly'] > 0.4:
+                top_risk_merchant = high_risk_merchants[0]['merchant']
                 recommendations.append(f"🎯 {top_risk_merchant} 업종 특별 모니터링 - 추가 보안 조치 적용")
             
             # 운영 효율성 개선
-            weekend_data = {bucket['key']: bucket for bucket in weekend_analysis}
-            if weekend_data.get(True, {}).get('avg_anomaly', {}).get('value', 0) > weekend_data.get(False, {}).get('avg_anomaly', {}).get('value', 0):
+            if (weekend_analysis.get(True, {}).get('avg_anomaly') or 0) > (weekend_analysis.get(False, {}).get('avg_anomaly') or 0):
                 recommendations.append("📅 주말 보안 강화 - 주말 이상 거래 비율이 평일보다 높음")
             
             # 용량 계획
-            peak_hour_traffic = max(bucket['doc_count'] for bucket in peak_hours) if peak_hours else 0
-            avg_hour_traffic = sum(bucket['doc_count'] for bucket in peak_hours) / len(peak_hours) if peak_hours else 0
+            peak_hour_traffic = max(count for _, count in peak_hours) if peak_hours else 0
+            avg_hour_traffic = sum(count for _, count in peak_hours) / len(peak_hours) if peak_hours else 0
             
             if peak_hour_traffic > avg_hour_traffic * 2:
                 recommendations.append("📈 트래픽 분산 최적화 - 피크 시간대 부하 분산 방안 검토")
@@ -1093,34 +944,47 @@ class AnomalyDetectionTester:
             print(f"❌ 비즈니스 추천사항 생성 실패: {e}")
             return False
     
-    def run_all_tests(self):
-        """모든 Anomaly Detection 테스트 실행"""
+    def run_all_tests(self, concurrent=False, max_concurrency=4, historical=False, hc_entities=0, replay_seconds=0):
+        """모든 Anomaly Detection 테스트 실행
+        
+        historical: 과거 구간 일괄 분석, hc_entities: 다중 엔티티 탐지기 벤치마크, replay_seconds: 실시간 리플레이 soak 테스트 추가
+        """
         print("🚀 OpenSearch Anomaly Detection 플러그인 종합 테스트")
         print("=" * 65)
         
-        test_results = {}
-        
-        # 테스트 실행
-        test_methods = [
-            ("플러그인 상태 확인", self.check_anomaly_plugin_status),
-            ("금융 데이터 생성", self.setup_financial_data),
-            ("이상 탐지기 생성", self.create_anomaly_detectors),
-            ("이상 탐지 결과 분석", self.analyze_anomaly_results),
-            ("실시간 모니터링", self.test_real_time_monitoring),
-            ("비즈니스 추천사항", self.generate_business_recommendations)
+        # 테스트 실행 (같은 단계 안의 테스트는 서로 독립적이므로 동시 실행 가능)
+        test_stages = [
+            [("플러그인 상태 확인", self.check_anomaly_plugin_status)],
+            [("금융 데이터 생성", self.setup_financial_data)],
+            [
+                ("이상 탐지기 생성", self.create_anomaly_detectors),
+                ("이상 탐지 결과 분석", self.analyze_anomaly_results),
+                ("실시간 모니터링", self.test_real_time_monitoring),
+                ("비즈니스 추천사항", self.generate_business_recommendations)
+            ]
         ]
+        if historical:
+            test_stages.append([("과거 구간 일괄 분석", self.run_historical_analysis)])
+        if hc_entities:
+            test_stages.append([("다중 엔티티 탐지기 벤치마크", lambda: self.run_hc_benchmark(hc_entities))])
+        if replay_seconds:
+            test_stages.append([("실시간 리플레이 soak", lambda: self.run_replay_soak(replay_seconds))])
         
-        for test_name, test_method in test_methods:
-            try:
-                result = test_method()
-                test_results[test_name] = result
-                if result:
-                    print(f"\n✅ {test_name} 테스트 완료")
-                else:
-                    print(f"\n❌ {test_name} 테스트 실패")
-            except Exception as e:
-                print(f"\n💥 {test_name} 테스트 중 오류: {e}")
-                test_results[test_name] = False
+        if concurrent:
+            test_results = run_test_stages(test_stages, max_concurrency)
+        else:
+            test_results = {}
+            for test_name, test_method in (test for stage in test_stages for test in stage):
+                try:
+                    result = test_method()
+                    test_results[test_name] = result
+                    if result:
+                        print(f"\n✅ {test_name} 테스트 완료")
+                    else:
+                        print(f"\n❌ {test_name} 테스트 실패")
+                except Exception as e:
+                    print(f"\n💥 {test_name} 테스트 중 오류: {e}")
+                    test_results[test_name] = False
         
         # 최종 결과 요약
         print(f"\n" + "=" * 65)
@@ -1175,8 +1039,16 @@ class AnomalyDetectionTester:
 
 def main():
     """메인 실행 함수"""
-    tester = AnomalyDetectionTester()
-    tester.run_all_tests()
+    # --scale=N: 부하 테스트용 실시간 거래 데이터 배수 (예: --scale=600 → 평일 3일 기준 약 1,000만 건)
+    scale = next((float(arg.split("=", 1)[1]) for arg in sys.argv if arg.startswith("--scale=")), 1.0)
+    tester = AnomalyDetectionTester(scale=scale)
+    # --historical: 적재된 과거 데이터를 historical analysis 작업으로 일괄 채점
+    # --hc-entities=N: 고객 N명 customer_id 다중 엔티티 탐지기 벤치마크 (예: --hc-entities=20000)
+    hc_entities = next((int(arg.split("=", 1)[1]) for arg in sys.argv if arg.startswith("--hc-entities=")), 0)
+    # --replay=SECONDS: 현재 시각 거래 스트림에 장애 / 프로모션 / 공격 패턴을 주입하는 soak 테스트
+    replay_seconds = next((int(arg.split("=", 1)[1]) for arg in sys.argv if arg.startswith("--replay=")), 0)
+    tester.run_all_tests(concurrent="--async" in sys.argv, historical="--historical" in sys.argv,
+                         hc_entities=hc_entities, replay_seconds=replay_seconds)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+OpenSearch 플러그인 비동기 테스트 실행기
+==================================
+
+독립적인 플러그인 점검을 asyncio로 동시에 실행합니다:
+1. AsyncOpenSearch 기반 플러그인 점검 (Security, SQL, KNN, Alerting, ML,
+   Performance Analyzer, Index Management, Observability)
+2. 기존 동기 테스터(ML Commons, Anomaly Detection)의 단계별 동시 실행
+
+동시 실행 수는 세마포어로 제한하며, 각 테스트의 출력은 모아 두었다가
+테스트가 끝날 때 한 번에 출력합니다.
+
+사용법: python full_plugin_test.py --async
+"""
+
+import io
+import inspect
+import sys
+import time
+import asyncio
+import contextvars
+import requests
+from opensearchpy.exceptions import TransportError
+from opensearch_client import create_async_client
+from full_plugin_test import (
+    EMPLOYEE_INDEX, EMPLOYEE_MAPPING, EMPLOYEES, SQL_QUERIES,
+    PRODUCT_INDEX, PRODUCT_MAPPING, PRODUCTS, PRODUCT_KNN_QUERY,
+    TEST_MONITOR, CUSTOMER_INDEX, CUSTOMER_MAPPING, CUSTOMERS,
+    print_results_summary
+)
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+# 현재 실행 중인 테스트의 출력 버퍼 (asyncio.to_thread 에도 컨텍스트가 전달됨)
+_output_buffer = contextvars.ContextVar("output_buffer", default=None)
+
+
+class _TaskOutput(io.TextIOBase):
+    """테스트별 출력을 버퍼에 모으는 stdout 대체 스트림"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        buffer = _output_buffer.get()
+        if buffer is None:
+            return self._stream.write(text)
+        buffer.append(text)
+        return len(text)
+
+    def flush(self):
+        self._stream.flush()
+
+
+async def _run_buffered(semaphore, func):
+    """세마포어 범위 안에서 테스트 실행 후 (결과, 출력) 반환"""
+    async with semaphore:
+        buffer = []
+        _output_buffer.set(buffer)
+        start_time = time.time()
+        
+        try:
+            if inspect.iscoroutinefunction(func):
+                result = await func()
+            else:
+                result = await asyncio.to_thread(func)
+        except Exception as e:
+            # 실패한 테스트의 진단 출력도 잃지 않도록 예외에 실어 보냄
+            e.test_output = "".join(buffer)
+            e.test_elapsed = time.time() - start_time
+            raise
+        
+        elapsed = time.time() - start_time
+        return result, "".join(buffer), elapsed
+
+
+async def _run_concurrently(tests, semaphore):
+    """테스트 목록을 동시에 실행하고, 끝나는 순서대로 출력 후 결과 반환"""
+    tasks = {
+        asyncio.create_task(_run_buffered(semaphore, test_func)): test_name
+        for test_name, test_func in tests
+    }
+    outcomes = {}
+    
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            test_name = tasks[task]
+            try:
+                result, output, elapsed = task.result()
+                sys.stdout.write(output)
+                outcomes[test_name] = (result, None, elapsed)
+            except Exception as e:
+                sys.stdout.write(getattr(e, "test_output", ""))
+                outcomes[test_name] = (False, e, getattr(e, "test_elapsed", 0.0))
+    
+    return outcomes
+
+
+async def _run_stages(test_stages, max_concurrency):
+    """단계 순서대로, 단계 안의 테스트는 동시에 실행"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    test_results = {}
+    
+    for stage in test_stages:
+        outcomes = await _run_concurrently(stage, semaphore)
+        
+        # 단계 안의 선언 순서 유지
+        for test_name, _ in stage:
+            result, error, elapsed = outcomes[test_name]
+            test_results[test_name] = bool(result)
+            if error is not None:
+                print(f"\n💥 {test_name} 테스트 중 오류 ({elapsed:.1f}초): {error}")
+            elif result:
+                print(f"\n✅ {test_name} 테스트 완료 ({elapsed:.1f}초)")
+            else:
+                print(f"\n❌ {test_name} 테스트 실패 ({elapsed:.1f}초)")
+    
+    return test_results
+
+
+def run_test_stages(test_stages, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """동기 테스터의 단계별 테스트 목록을 동시 실행하고 결과 딕셔너리 반환"""
+    original_stdout = sys.stdout
+    sys.stdout = _TaskOutput(original_stdout)
+    try:
+        return asyncio.run(_run_stages(test_stages, max_concurrency))
+    finally:
+        sys.stdout = original_stdout
+
+
+class AsyncPluginTester:
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        """AsyncOpenSearch 클라이언트 초기화"""
+        self.max_concurrency = max_concurrency
+        self.client = None
+        
+        print("🔧 OpenSearch 플러그인 비동기 테스터 시작")
+        print(f"   동시 실행 제한: {max_concurrency}개")
+        print("-" * 50)
+
+    async def _request(self, method, path, body=None):
+        """플러그인 REST API 호출"""
+        return await self.client.transport.perform_request(method, path, body=body)
+
+    async def _recreate_index(self, index_name, mapping, documents):
+        """인덱스 재생성 후 벌크 삽입 (검색 가능해질 때까지 대기)"""
+        if await self.client.indices.exists(index=index_name):
+            await self.client.indices.delete(index=index_name)
+        
+        await self.client.indices.create(index=index_name, body=mapping)
+        
+        bulk_body = []
+        for i, doc in enumerate(documents):
+            bulk_body.extend([
+                {"index": {"_index": index_name, "_id": i+1}},
+                doc
+            ])
+        
+        await self.client.bulk(body=bulk_body, refresh="wait_for")
+
+    async def test_security_plugin(self):
+        """Security 플러그인 점검"""
+        print("\n=== 🔐 Security 플러그인 테스트 ===")
+        
+        try:
+            auth_info, users = await asyncio.gather(
+                self._request('GET', '/_plugins/_security/authinfo'),
+                self._request('GET', '/_plugins/_security/api/internalusers')
+            )
+            print(f"✅ 현재 사용자: {auth_info.get('user_name')}")
+            print(f"✅ 사용자 역할: {', '.join(auth_info.get('roles', []))}")
+            print(f"✅ 총 사용자 수: {len(users)}명")
+            return True
+        
+        except TransportError as e:
+            print(f"❌ Security 플러그인 오류: {e.status_code}")
+        except Exception as e:
+            print(f"❌ Security 테스트 실패: {e}")
+        
+        return False
+
+    async def test_sql_plugin(self):
+        """SQL 플러그인 점검"""
+        print("\n=== 🔍 SQL 플러그인 테스트 ===")
+        
+        try:
+            await self._recreate_index(EMPLOYEE_INDEX, EMPLOYEE_MAPPING, EMPLOYEES)
+            print(f"✅ 직원 데이터 생성: {len(EMPLOYEES)}명")
+            
+            responses = await asyncio.gather(
+                *[self._request('POST', '/_plugins/_sql', body={"query": test_case['query']})
+                  for test_case in SQL_QUERIES],
+                return_exceptions=True
+            )
+            
+            for test_case, result in zip(SQL_QUERIES, responses):
+                print(f"\n📊 {test_case['name']}:")
+                
+                if isinstance(result, Exception):
+                    print(f"   ❌ 쿼리 실행 실패: {getattr(result, 'status_code', result)}")
+                elif result.get('datarows'):
+                    print("   결과:")
+                    for row in result['datarows'][:3]:
+                        print(f"     {row}")
+                else:
+                    print("   ✅ 쿼리 실행 성공 (결과 없음)")
+            
+            return True
+        
+        except Exception as e:
+            print(f"❌ SQL 플러그인 테스트 실패: {e}")
+        
+        return False
+
+    async def test_knn_plugin(self):
+        """KNN (벡터 검색) 플러그인 점검"""
+        print("\n=== 🎯 KNN 벡터 검색 플러그인 테스트 ===")
+        
+        try:
+            await self._recreate_index(PRODUCT_INDEX, PRODUCT_MAPPING, PRODUCTS)
+            print("✅ KNN 인덱스 생성 완료")
+            print(f"✅ 상품 데이터 생성: {len(PRODUCTS)}개")
+            
+            print("\n🔍 벡터 검색 (스마트폰과 유사한 상품):")
+            response = await self.client.search(index=PRODUCT_INDEX, body=PRODUCT_KNN_QUERY)
+            
+            if response['hits']['hits']:
+                for i, hit in enumerate(response['hits']['hits']):
+                    product = hit['_source']
+                    print(f"   {i+1}. {product['product_name']} (유사도: {hit['_score']:.4f})")
+                return True
+            else:
+                print("   ❌ 검색 결과 없음")
+        
+        except Exception as e:
+            print(f"❌ KNN 플러그인 테스트 실패: {e}")
+        
+        return False
+
+    async def test_alerting_plugin(self):
+        """Alerting 플러그인 점검"""
+        print("\n=== 🚨 Alerting 플러그인 테스트 ===")
+        
+        try:
+            monitors = await self._request('GET', '/_plugins/_alerting/monitors')
+            print("✅ Alerting 플러그인 활성화")
+            print(f"✅ 현재 모니터 수: {monitors.get('totalMonitors', 0)}")
+        except TransportError as e:
+            print(f"❌ Alerting 플러그인 응답 오류: {e.status_code}")
+            return False
+        except Exception as e:
+            print(f"❌ Alerting 테스트 실패: {e}")
+            return False
+        
+        try:
+            monitor = await self._request('POST', '/_plugins/_alerting/monitors', body=TEST_MONITOR)
+            print(f"✅ 테스트 모니터 생성: {monitor.get('_id')}")
+        except TransportError as e:
+            print(f"⚠️ 모니터 생성 실패: {e.status_code}")
+            print("   (기본 기능은 정상 작동)")
+        
+        return True
+
+    async def test_ml_plugin(self):
+        """ML Commons 플러그인 점검"""
+        print("\n=== 🤖 ML Commons 플러그인 테스트 ===")
+        
+        try:
+            ml_stats = await self._request('GET', '/_plugins/_ml/stats')
+            print("✅ ML Commons 플러그인 활성화")
+            print(f"✅ ML 노드 수: {len(ml_stats.get('nodes', {}))}")
+            
+            await self._recreate_index(CUSTOMER_INDEX, CUSTOMER_MAPPING, CUSTOMERS)
+            print(f"   ✅ ML용 고객 데이터 생성: {len(CUSTOMERS)}명")
+            return True
+        
+        except TransportError as e:
+            print(f"❌ ML 플러그인 응답 오류: {e.status_code}")
+        except Exception as e:
+            print(f"❌ ML 플러그인 테스트 실패: {e}")
+        
+        return False
+
+    async def test_performance_analyzer(self):
+        """Performance Analyzer 플러그인 점검 (포트 9600)"""
+        print("\n=== ⚡ Performance Analyzer 플러그인 테스트 ===")
+        
+        try:
+            response = await asyncio.to_thread(
+                requests.get,
+                "http://localhost:9600/_plugins/_performanceanalyzer/metrics",
+                timeout=5
+            )
+            
+            if response.status_code == 200:
+                print("✅ Performance Analyzer 활성화")
+                print("✅ 성능 메트릭 수집 중")
+            else:
+                print(f"⚠️ Performance Analyzer 응답: {response.status_code}")
+                print("   (별도 포트에서 실행되므로 정상일 수 있음)")
+        
+        except Exception as e:
+            print(f"⚠️ Performance Analyzer 접근 불가: {e}")
+            print("   (Performance Analyzer는 별도 설정이 필요할 수 있습니다)")
+        
+        return True
+
+    async def test_index_management(self):
+        """Index Management 플러그인 점검"""
+        print("\n=== 📁 Index Management 플러그인 테스트 ===")
+        
+        try:
+            policies = await self._request('GET', '/_plugins/_ism/policies')
+            print("✅ Index Management 플러그인 활성화")
+            print(f"✅ 현재 ISM 정책 수: {policies.get('total_policies', 0)}")
+            return True
+        
+        except TransportError as e:
+            print(f"❌ Index Management 플러그인 오류: {e.status_code}")
+        except Exception as e:
+            print(f"❌ Index Management 테스트 실패: {e}")
+        
+        return False
+
+    async def test_observability(self):
+        """Observability 플러그인 점검"""
+        print("\n=== 👁️ Observability 플러그인 테스트 ===")
+        
+        try:
+            objects = await self._request('GET', '/_plugins/_observability/object')
+            print("✅ Observability 플러그인 활성화")
+            print(f"✅ 관측성 객체 수: {len(objects.get('observabilityObjectList', []))}")
+            return True
+        
+        except TransportError as e:
+            print(f"❌ Observability 플러그인 오류: {e.status_code}")
+        except Exception as e:
+            print(f"❌ Observability 테스트 실패: {e}")
+        
+        return False
+
+    async def run_all_tests(self):
+        """모든 플러그인 점검을 동시에 실행"""
+        print("🚀 OpenSearch 플러그인 전체 테스트를 비동기로 시작합니다!")
+        print("=" * 60)
+        
+        self.client = create_async_client(pool_size=self.max_concurrency * 2)
+        original_stdout = sys.stdout
+        sys.stdout = _TaskOutput(original_stdout)
+        
+        try:
+            # 연결 확인
+            try:
+                info = await self.client.info()
+                print(f"✅ OpenSearch 버전: {info['version']['number']}")
+                print(f"✅ 클러스터: {info['cluster_name']}")
+            except Exception as e:
+                print(f"❌ 연결 실패: {e}")
+                return None
+            
+            tests = [
+                ("Security", self.test_security_plugin),
+                ("SQL", self.test_sql_plugin),
+                ("KNN", self.test_knn_plugin),
+                ("Alerting", self.test_alerting_plugin),
+                ("ML Commons", self.test_ml_plugin),
+                ("Performance Analyzer", self.test_performance_analyzer),
+                ("Index Management", self.test_index_management),
+                ("Observability", self.test_observability)
+            ]
+            
+            start_time = time.time()
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            outcomes = await _run_concurrently(tests, semaphore)
+            
+            # 선언 순서대로 결과 정리
+            results = {}
+            for test_name, _ in tests:
+                result, error, _ = outcomes[test_name]
+                if error is not None:
+                    results[test_name] = f"❌ 오류: {str(error)[:30]}..."
+                else:
+                    results[test_name] = "✅ 성공" if result else "❌ 실패"
+            
+            total_elapsed = time.time() - start_time
+            
+            print_results_summary(results)
+            
+            print(f"\n⏱️ 전체 소요 시간: {total_elapsed:.2f}초 "
+                  f"(개별 합계 {sum(o[2] for o in outcomes.values()):.2f}초)")
+            
+            return results
+        
+        finally:
+            sys.stdout = original_stdout
+            await self.client.close()
+
+
+def main():
+    """메인 실행 함수"""
+    asyncio.run(AsyncPluginTester().run_all_tests())
+
+
+if __name__ == "__main__":
+    main()
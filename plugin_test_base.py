@@ -3,28 +3,18 @@
 OpenSearch 플러그인 개별 테스트 - 기본 구조 + Security 플러그인
 """
 
-import requests
 import json
 import time
-from opensearchpy import OpenSearch, RequestsHttpConnection
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from opensearch_client import get_client, get_session, BASE_URL, OPENSEARCH_AUTH
 
 class PluginTesterBase:
     def __init__(self):
         """OpenSearch 연결 설정"""
-        self.client = OpenSearch(
-            hosts=[{'host': 'localhost', 'port': 9200}],
-            http_auth=('admin', 'Kcb2025opSLabAi9'),
-            use_ssl=True,
-            verify_certs=False,
-            ssl_assert_hostname=False,
-            ssl_show_warn=False,
-            connection_class=RequestsHttpConnection
-        )
+        self.client = get_client()
+        self.session = get_session()
         
-        self.base_url = "https://localhost:9200"
-        self.auth = ('admin', 'Kcb2025opSLabAi9')
+        self.base_url = BASE_URL
+        self.auth = OPENSEARCH_AUTH
         
         print("🔍 OpenSearch 플러그인 개별 테스트")
         print("=" * 50)
@@ -54,10 +44,8 @@ class PluginTesterBase:
         try:
             # 1. 현재 사용자 인증 정보 확인
             print("\n📋 1. 사용자 인증 정보")
-            auth_response = requests.get(
-                f"{self.base_url}/_plugins/_security/authinfo",
-                auth=self.auth,
-                verify=False
+            auth_response = self.session.get(
+                f"{self.base_url}/_plugins/_security/authinfo"
             )
             
             if auth_response.status_code == 200:
@@ -74,10 +62,8 @@ class PluginTesterBase:
             
             # 2. 사용자 목록 관리
             print("\n👥 2. 사용자 관리")
-            users_response = requests.get(
-                f"{self.base_url}/_plugins/_security/api/internalusers",
-                auth=self.auth,
-                verify=False
+            users_response = self.session.get(
+                f"{self.base_url}/_plugins/_security/api/internalusers"
             )
             
             if users_response.status_code == 200:
@@ -102,10 +88,8 @@ class PluginTesterBase:
             
             # 3. 역할 기반 접근 제어 (RBAC)
             print("\n🎭 3. 역할 기반 접근 제어")
-            roles_response = requests.get(
-                f"{self.base_url}/_plugins/_security/api/roles",
-                auth=self.auth,
-                verify=False
+            roles_response = self.session.get(
+                f"{self.base_url}/_plugins/_security/api/roles"
             )
             
             if roles_response.status_code == 200:
@@ -136,10 +120,8 @@ class PluginTesterBase:
             
             # 4. 멀티테넌시 (Multi-tenancy)
             print("\n🏢 4. 멀티테넌시")
-            tenants_response = requests.get(
-                f"{self.base_url}/_plugins/_security/api/tenants",
-                auth=self.auth,
-                verify=False
+            tenants_response = self.session.get(
+                f"{self.base_url}/_plugins/_security/api/tenants"
             )
             
             if tenants_response.status_code == 200:
@@ -162,10 +144,8 @@ class PluginTesterBase:
             
             # 5. 역할 매핑 (Role Mapping)
             print("\n🔗 5. 역할 매핑")
-            rolesmapping_response = requests.get(
-                f"{self.base_url}/_plugins/_security/api/rolesmapping",
-                auth=self.auth,
-                verify=False
+            rolesmapping_response = self.session.get(
+                f"{self.base_url}/_plugins/_security/api/rolesmapping"
             )
             
             if rolesmapping_response.status_code == 200:
@@ -193,10 +173,8 @@ class PluginTesterBase:
             print("\n🔒 6. 보안 설정")
             try:
                 # 보안 상태 확인
-                health_response = requests.get(
-                    f"{self.base_url}/_plugins/_security/health",
-                    auth=self.auth,
-                    verify=False
+                health_response = self.session.get(
+                    f"{self.base_url}/_plugins/_security/health"
                 )
                 
                 if health_response.status_code == 200:
@@ -217,10 +195,8 @@ class PluginTesterBase:
             # 7. 감사 로깅 (Audit Logging)
             print("\n📊 7. 감사 로깅")
             try:
-                audit_response = requests.get(
-                    f"{self.base_url}/_plugins/_security/api/audit",
-                    auth=self.auth,
-                    verify=False
+                audit_response = self.session.get(
+                    f"{self.base_url}/_plugins/_security/api/audit"
                 )
                 
                 if audit_response.status_code == 200:
@@ -4,30 +4,56 @@ OpenSearch KNN 플러그인 상세 테스트
 벡터 검색 및 유사도 분석 기능 테스트
 """
 
-import requests
+import sys
 import json
 import time
-import random
-import math
-from opensearchpy import OpenSearch, RequestsHttpConnection
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import numpy as np
+from opensearch_client import get_client, BASE_URL, OPENSEARCH_AUTH
+from index_helpers import index_documents
+from knn_benchmark import KNNBenchmark, save_report
+from knn_oracle import ExactKNN, relevance_at_k
+from knn_search import (
+    HYBRID_NORMALIZATIONS, HYBRID_COMBINATIONS,
+    msearch_knn, summarize_results, build_filtered_knn_body, build_knn_body, build_hybrid_body,
+    build_normalization_pipeline, put_search_pipeline, delete_search_pipeline
+)
+from knn_vectors import normalize
 
 class KNNPluginTester:
     def __init__(self):
         """OpenSearch 연결 설정"""
-        self.client = OpenSearch(
-            hosts=[{'host': 'localhost', 'port': 9200}],
-            http_auth=('admin', 'Kcb2025opSLabAi9'),
-            use_ssl=True,
-            verify_certs=False,
-            ssl_assert_hostname=False,
-            ssl_show_warn=False,
-            connection_class=RequestsHttpConnection
-        )
+        self.client = get_client()
+        
+        self.base_url = BASE_URL
+        self.auth = OPENSEARCH_AUTH
         
-        self.base_url = "https://localhost:9200"
-        self.auth = ('admin', 'Kcb2025opSLabAi9')
+        # 정확 탐색 오라클 (검색 결과 정답 대조용)
+        self.documents = []
+        self.doc_oracle = None
+        self.oracle_results = []
+
+    def verify_knn_hits(self, label, oracle, query_vector, response, k, mask=None):
+        """정확 탐색 오라클로 KNN 결과의 recall 과 점수 일치도 검증"""
+        if oracle is None:
+            return None
+        
+        hits = response['hits']['hits']
+        evaluation = oracle.evaluate(
+            query_vector,
+            [hit['_id'] for hit in hits],
+            [hit['_score'] for hit in hits],
+            k=k,
+            mask=mask
+        )
+        evaluation["label"] = label
+        self.oracle_results.append(evaluation)
+        
+        status = "✅" if evaluation["recall"] >= 1.0 else "⚠️"
+        print(f"      {status} 정답 대조: recall@{k} {evaluation['recall']:.2f}, "
+              f"점수 최대 오차 {evaluation['score_max_error']:.6f}")
+        if evaluation["missing_ids"]:
+            print(f"         누락된 정답 문서 ID: {', '.join(evaluation['missing_ids'])}")
+        return evaluation
 
     def test_connection(self):
         """연결 테스트"""
@@ -189,13 +215,18 @@ class KNNPluginTester:
              "content_vector": [0.1, 0.0, 0.1, 0.0, 0.0, 0.1, 0.9, 0.8, 0.0, 0.2]}
         ]
         
-        # 데이터 삽입
-        for i, doc in enumerate(documents):
-            self.client.index(index=doc_index, id=i+1, body=doc)
-        
-        time.sleep(3)  # 인덱싱 대기
+        # 데이터 삽입 (검색 가능해질 때까지 대기)
+        index_documents(self.client, doc_index, documents)
         print(f"   ✅ 문서 데이터 생성: {len(documents)}개")
         
+        # 동일 벡터로 정확 탐색 오라클 구성 (_id 는 1부터 순번)
+        self.documents = documents
+        self.doc_oracle = ExactKNN(
+            [doc["content_vector"] for doc in documents],
+            "cosinesimil",
+            ids=[str(i + 1) for i in range(len(documents))]
+        )
+        
         return doc_index
 
     def test_basic_knn_search(self, index_name):
@@ -235,6 +266,8 @@ class KNNPluginTester:
                     print(f"      {i+1}. {doc['title']} ({doc['category']})")
                     print(f"         유사도: {score:.4f}, 저자: {doc['author']}")
                 
+                self.verify_knn_hits("기본KNN검색", self.doc_oracle, tech_query_vector, response, k=5)
+                
                 results["검색기능"].append("K-최근접 이웃 벡터 검색")
                 results["테스트결과"]["기본KNN검색"] = "성공"
             else:
@@ -275,6 +308,8 @@ class KNNPluginTester:
                     print(f"      {i+1}. {doc['title']} ({doc['category']})")
                     print(f"         유사도: {score:.4f}")
                 
+                self.verify_knn_hits("카테고리KNN검색", self.doc_oracle, business_query_vector, business_response, k=3)
+                
                 results["검색기능"].append("카테고리별 유사도 검색")
                 results["테스트결과"]["카테고리KNN검색"] = "성공"
                 
@@ -328,6 +363,10 @@ class KNNPluginTester:
                     score = hit['_score']
                     print(f"      - {doc['title']} (유사도: {score:.4f})")
                 
+                # 필터 조건을 만족하는 문서 안에서의 정답과 비교
+                category_mask = [doc["category"] == "기술" for doc in self.documents]
+                self.verify_knn_hits("카테고리필터KNN", self.doc_oracle, query_vector, filtered_response, k=5, mask=category_mask)
+                
                 results["필터기능"].append("카테고리 필터 + KNN")
                 results["테스트결과"]["카테고리필터KNN"] = "성공"
                 
@@ -380,6 +419,9 @@ class KNNPluginTester:
                     print(f"      - {doc['title']} ({publish_date})")
                     print(f"        유사도: {score:.4f}")
                 
+                date_mask = ["2024-02-01" <= doc["publish_date"] <= "2024-02-28" for doc in self.documents]
+                self.verify_knn_hits("날짜필터KNN", self.doc_oracle, query_vector, date_response, k=5, mask=date_mask)
+                
                 results["필터기능"].append("날짜 범위 필터 + KNN")
                 results["테스트결과"]["날짜필터KNN"] = "성공"
                 
@@ -425,6 +467,12 @@ class KNNPluginTester:
                     print(f"      - {doc['title']} ({doc['category']})")
                     print(f"        유사도: {score:.4f}")
                 
+                complex_mask = [
+                    doc["category"] in ("기술", "연구") and doc["publish_date"] >= "2024-01-15"
+                    for doc in self.documents
+                ]
+                self.verify_knn_hits("복합필터KNN", self.doc_oracle, query_vector, complex_response, k=3, mask=complex_mask)
+                
                 results["필터기능"].append("복합 조건 필터 + KNN")
                 results["테스트결과"]["복합필터KNN"] = "성공"
                 
@@ -432,6 +480,164 @@ class KNNPluginTester:
             print(f"   ❌ 복합 필터 KNN 오류: {e}")
             results["테스트결과"]["복합필터KNN"] = f"오류: {e}"
         
+        # 4. knn filter 파라미터 (efficient filtering) - post-filter 와 달리 k 개를 채워서 반환
+        print("\n📋 4. knn filter 파라미터 (검색 중 필터 적용)")
+        
+        efficient_query = build_filtered_knn_body(
+            "efficient_filter", "content_vector", query_vector, 5,
+            {"term": {"category": "기술"}}, "cosinesimil"
+        )
+        efficient_query["_source"] = True
+        
+        try:
+            efficient_response = self.client.search(index=index_name, body=efficient_query)
+            
+            if efficient_response['hits']['hits']:
+                print("   ✅ knn filter 파라미터 검색 성공")
+                print("   📊 '기술' 카테고리 (검색 중 필터):")
+                
+                for hit in efficient_response['hits']['hits']:
+                    print(f"      - {hit['_source']['title']} (유사도: {hit['_score']:.4f})")
+                
+                category_mask = [doc["category"] == "기술" for doc in self.documents]
+                self.verify_knn_hits("knn필터파라미터", self.doc_oracle, query_vector, efficient_response, k=5, mask=category_mask)
+                
+                results["필터기능"].append("knn filter 파라미터 (efficient filtering)")
+                results["테스트결과"]["knn필터파라미터"] = "성공"
+                
+        except Exception as e:
+            print(f"   ❌ knn filter 파라미터 오류: {e}")
+            results["테스트결과"]["knn필터파라미터"] = f"오류: {e}"
+        
+        return results
+
+    def test_batched_knn_search(self, index_name):
+        """_msearch 배치 KNN 검색 테스트 (모든 문서에 대해 유사 문서 찾기)"""
+        print("\n=== 📦 배치 KNN 검색 (_msearch) 테스트 ===")
+        
+        results = {"배치검색기능": [], "테스트결과": {}}
+        
+        try:
+            # 각 문서 벡터를 쿼리로 사용하고, 자기 자신은 knn filter 로 제외
+            query_vectors = [doc["content_vector"] for doc in self.documents]
+            doc_ids = [str(i + 1) for i in range(len(self.documents))]
+            filters = [{"bool": {"must_not": [{"ids": {"values": [doc_id]}}]}} for doc_id in doc_ids]
+            
+            start_time = time.time()
+            batch_results = msearch_knn(
+                self.client, index_name, query_vectors,
+                field="content_vector", k=3, filters=filters,
+                batch_size=4, parallel_batches=2, source=["title"]
+            )
+            summary = summarize_results(batch_results, time.time() - start_time)
+            
+            if summary["errors"]:
+                first_error = next(result["error"] for result in batch_results if result["error"])
+                print(f"   ❌ 배치 검색 오류 {summary['errors']}건: {first_error}")
+                results["테스트결과"]["배치KNN검색"] = f"오류: {first_error}"
+                return results
+            
+            print(f"   ✅ {summary['queries']}개 쿼리 → {len(set(r['batch'] for r in batch_results))}개 _msearch 요청")
+            print(f"      서버 처리 p50 {summary['took_p50_ms']:.1f}ms, 배치 왕복 p50 {summary['batch_latency_p50_ms']:.1f}ms")
+            
+            # 쿼리별 결과 및 오라클 정답 대조 (자기 자신 제외)
+            recalls = []
+            for doc, doc_id, result in zip(self.documents, doc_ids, batch_results):
+                similar = ", ".join(hit["_source"]["title"] for hit in result["hits"])
+                print(f"      - {doc['title']} → {similar}")
+                
+                evaluation = self.doc_oracle.evaluate(
+                    doc["content_vector"],
+                    [hit["_id"] for hit in result["hits"]],
+                    [hit["_score"] for hit in result["hits"]],
+                    k=3,
+                    mask=[other_id != doc_id for other_id in doc_ids]
+                )
+                recalls.append(evaluation["recall"])
+            
+            average_recall = sum(recalls) / len(recalls)
+            print(f"      🎯 배치 결과 평균 recall@3: {average_recall:.2f}")
+            
+            results["배치검색기능"].append("_msearch 배치 KNN 검색 (쿼리별 필터)")
+            results["테스트결과"]["배치KNN검색"] = f"성공 ({summary['qps']:.1f} QPS, recall {average_recall:.2f})"
+            
+        except Exception as e:
+            print(f"   ❌ 배치 KNN 검색 오류: {e}")
+            results["테스트결과"]["배치KNN검색"] = f"오류: {e}"
+        
+        return results
+
+    def test_hybrid_search(self, index_name):
+        """하이브리드 검색 테스트 (content match + content_vector knn, 점수 정규화 검색 파이프라인)"""
+        print("\n=== 🔀 하이브리드 검색 (어휘 + 벡터) 테스트 ===")
+        
+        results = {"하이브리드기능": [], "테스트결과": {}}
+        
+        # (검색어, 쿼리 벡터, 관련 카테고리)
+        # '분석' 은 비즈니스/연구 문서에 모두 등장하고, '여행 요리' 는 '여행지'/'요리법' 과 토큰이 달라 어휘 검색이 놓침
+        queries = [
+            ("파이썬 프로그래밍", [0.8, 0.9, 0.1, 0.1, 0.1, 0.0, 0.0, 0.0, 0.2, 0.1], "기술"),
+            ("마케팅 분석", [0.1, 0.1, 0.9, 0.8, 0.0, 0.0, 0.1, 0.0, 0.0, 0.1], "비즈니스"),
+            ("빅데이터 분석 기법", [0.0, 0.1, 0.1, 0.1, 0.9, 0.8, 0.1, 0.0, 0.3, 0.2], "연구"),
+            ("여행 요리", [0.0, 0.0, 0.1, 0.0, 0.1, 0.1, 0.9, 0.9, 0.0, 0.1], "생활")
+        ]
+        k = 3
+        weights = [0.3, 0.7]
+        relevant_counts = [sum(doc["category"] == category for doc in self.documents) for _, _, category in queries]
+
+        def evaluate(label, bodies, params=None):
+            judgements, took = [], []
+            for body, (_, _, category) in zip(bodies, queries):
+                response = self.client.search(index=index_name, body=body, params=params)
+                judgements.append([hit["_source"]["category"] == category for hit in response["hits"]["hits"]])
+                took.append(response.get("took", 0))
+            
+            relevance = relevance_at_k(judgements, k, relevant_counts)
+            print(f"   • {label:<32} P@{k} {relevance[f'precision@{k}']:.2f}, "
+                  f"nDCG@{k} {relevance[f'ndcg@{k}']:.2f}, took 평균 {sum(took) / len(took):.1f}ms")
+            return relevance[f"ndcg@{k}"]
+        
+        try:
+            print(f"\n📋 검색 방식별 관련성 비교 (쿼리 {len(queries)}개, 가중치 어휘:벡터 = {weights[0]}:{weights[1]})")
+            scores = {
+                "어휘 (match)": evaluate("어휘 (match)", [
+                    {"size": k, "_source": ["category"], "query": {"match": {"content": text}}}
+                    for text, _, _ in queries
+                ]),
+                "벡터 (knn)": evaluate("벡터 (knn)", [
+                    build_knn_body("content_vector", vector, k, source=["category"])
+                    for _, vector, _ in queries
+                ])
+            }
+            
+            hybrid_bodies = [
+                build_hybrid_body("content", text, "content_vector", vector, k, source=["category"])
+                for text, vector, _ in queries
+            ]
+            for normalization in HYBRID_NORMALIZATIONS:
+                for combination in HYBRID_COMBINATIONS:
+                    label = f"hybrid {normalization} + {combination}"
+                    pipeline_id = f"knn-hybrid-{normalization}-{combination}".replace("_", "-")
+                    put_search_pipeline(
+                        self.client, pipeline_id,
+                        build_normalization_pipeline(normalization, combination, weights)
+                    )
+                    try:
+                        scores[label] = evaluate(label, hybrid_bodies, {"search_pipeline": pipeline_id})
+                    finally:
+                        delete_search_pipeline(self.client, pipeline_id)
+            
+            best = max(scores, key=scores.get)
+            print(f"   ✅ nDCG@{k} 최고: {best} ({scores[best]:.2f})")
+            
+            results["하이브리드기능"].append("normalization-processor 검색 파이프라인 (min_max / l2 x 산술 / 조화 평균)")
+            results["하이브리드기능"].append("hybrid 쿼리 (match + knn)")
+            results["테스트결과"]["하이브리드검색"] = f"성공 (최고 nDCG@{k} {scores[best]:.2f}: {best})"
+        
+        except Exception as e:
+            print(f"   ❌ 하이브리드 검색 오류 (neural-search 플러그인 확인): {e}")
+            results["테스트결과"]["하이브리드검색"] = f"오류: {e}"
+        
         return results
 
     def test_distance_metrics(self):
@@ -483,10 +689,7 @@ class KNNPluginTester:
                     {"name": "벡터5", "vector": [0.0, 0.0, 0.0, 1.0, 0.0]}
                 ]
                 
-                for i, vec_data in enumerate(test_vectors):
-                    self.client.index(index=index_name, id=i+1, body=vec_data)
-                
-                time.sleep(2)
+                index_documents(self.client, index_name, test_vectors)
                 
                 # 검색 테스트
                 search_vector = [1.0, 0.0, 0.0, 0.0, 0.0]
@@ -518,6 +721,13 @@ class KNNPluginTester:
                         score = hit['_score']
                         print(f"        - {doc['name']}: 점수 {score:.4f}")
                     
+                    oracle = ExactKNN(
+                        [doc["vector"] for doc in test_vectors],
+                        dist_config["type"],
+                        ids=[str(i + 1) for i in range(len(test_vectors))]
+                    )
+                    self.verify_knn_hits(dist_config['type'], oracle, search_vector, search_response, k=3)
+                    
                     results["거리메트릭"].append(dist_config['name'])
                     results["테스트결과"][dist_config['type']] = f"성공 ({search_time:.2f}ms)"
                 else:
@@ -541,6 +751,7 @@ class KNNPluginTester:
             {"dim": 128, "name": "128차원"},
             {"dim": 256, "name": "256차원"}
         ]
+        rng = np.random.default_rng()
         
         for dim_config in dimension_tests:
             try:
@@ -583,31 +794,18 @@ class KNNPluginTester:
                 # 고차원 테스트 데이터 생성
                 print(f"\n   📊 {dim_config['name']} 벡터 데이터 생성 중...")
                 
-                test_docs = []
-                for i in range(20):  # 20개 문서
-                    vector = [random.random() for _ in range(dimension)]
-                    # 벡터 정규화 (코사인 유사도를 위해)
-                    magnitude = math.sqrt(sum(x*x for x in vector))
-                    if magnitude > 0:
-                        vector = [x/magnitude for x in vector]
-                    
-                    doc = {
-                        "id": f"doc_{i:03d}",
-                        "high_dim_vector": vector
-                    }
-                    test_docs.append(doc)
-                
-                # 배치 삽입
-                for i, doc in enumerate(test_docs):
-                    self.client.index(index=index_name, id=i+1, body=doc)
+                # 20개 문서 + 쿼리 1개를 한 번에 생성 후 행 단위 정규화 (코사인 유사도를 위해)
+                vectors = normalize(rng.random((21, dimension), dtype=np.float32))
+                test_docs = [
+                    {"id": f"doc_{i:03d}", "high_dim_vector": vector}
+                    for i, vector in enumerate(vectors[:20].tolist())
+                ]
                 
-                time.sleep(3)  # 인덱싱 대기
+                # 배치 삽입 (검색 가능해질 때까지 대기)
+                index_documents(self.client, index_name, test_docs)
                 
                 # 검색 성능 테스트
-                query_vector = [random.random() for _ in range(dimension)]
-                magnitude = math.sqrt(sum(x*x for x in query_vector))
-                if magnitude > 0:
-                    query_vector = [x/magnitude for x in query_vector]
+                query_vector = vectors[20].tolist()
                 
                 start_time = time.time()
                 
@@ -635,6 +833,13 @@ class KNNPluginTester:
                     top_hit = search_response['hits']['hits'][0]
                     print(f"      최고 유사도: {top_hit['_score']:.4f} ({top_hit['_source']['id']})")
                     
+                    oracle = ExactKNN(
+                        [doc["high_dim_vector"] for doc in test_docs],
+                        "cosinesimil",
+                        ids=[str(i + 1) for i in range(len(test_docs))]
+                    )
+                    self.verify_knn_hits(dim_config['name'], oracle, query_vector, search_response, k=5)
+                    
                     results["고차원기능"].append(f"{dim_config['name']} 벡터 검색")
                     results["테스트결과"][dim_config['name']] = f"성공 ({search_time:.2f}ms)"
                 else:
@@ -672,11 +877,19 @@ class KNNPluginTester:
         filter_results = self.test_filtered_knn_search(doc_index)
         all_results.update(filter_results)
         
-        # 5. 거리 메트릭 테스트
+        # 5. 배치 KNN 검색 테스트
+        batch_results = self.test_batched_knn_search(doc_index)
+        all_results.update(batch_results)
+        
+        # 6. 하이브리드 검색 테스트
+        hybrid_results = self.test_hybrid_search(doc_index)
+        all_results.update(hybrid_results)
+        
+        # 7. 거리 메트릭 테스트
         distance_results = self.test_distance_metrics()
         all_results.update(distance_results)
         
-        # 6. 고차원 벡터 테스트
+        # 8. 고차원 벡터 테스트
         high_dim_results = self.test_high_dimensional_vectors()
         all_results.update(high_dim_results)
         
@@ -691,7 +904,7 @@ class KNNPluginTester:
         
         # 모든 기능 수집
         all_features = []
-        for key in ["인덱스기능", "검색기능", "필터기능", "거리메트릭", "고차원기능"]:
+        for key in ["인덱스기능", "검색기능", "필터기능", "배치검색기능", "하이브리드기능", "거리메트릭", "고차원기능"]:
             if key in results:
                 all_features.extend(results[key])
         
@@ -720,6 +933,15 @@ class KNNPluginTester:
             success_rate = (success_count / total_count) * 100
             print(f"\n📈 성공률: {success_rate:.1f}% ({success_count}/{total_count})")
         
+        # 정확 탐색 오라클 대조 결과
+        if self.oracle_results:
+            print(f"\n🎯 정확 탐색 오라클 대조 ({len(self.oracle_results)}개 쿼리):")
+            for evaluation in self.oracle_results:
+                print(f"   • {evaluation['label']}: recall {evaluation['recall']:.2f}, "
+                      f"점수 최대 오차 {evaluation['score_max_error']:.6f}")
+            average_recall = sum(e["recall"] for e in self.oracle_results) / len(self.oracle_results)
+            print(f"   📈 평균 recall: {average_recall:.3f}")
+        
         # 활용 방안
         print(f"\n💡 KNN 플러그인 활용 방안:")
         use_cases = [
@@ -741,7 +963,7 @@ class KNNPluginTester:
         print(f"\n🌐 다음 단계:")
         print("   1. 실제 텍스트 임베딩 모델과 연동")
         print("   2. 대용량 벡터 데이터 성능 최적화")
-        print("   3. 하이브리드 검색 (키워드 + 벡터) 구현")
+        print("   3. 하이브리드 검색 가중치 튜닝 (knn_benchmark.py hybrid)")
         print("   4. 실시간 추천 시스템 구축")
         
         print(f"\n💻 생성된 테스트 인덱스:")
@@ -754,6 +976,17 @@ class KNNPluginTester:
         for idx in indices:
             print(f"   • {idx}")
 
+    def run_benchmark(self, **config):
+        """KNN 벤치마크 모드 (적재 처리량, 지연 백분위, QPS, recall@k) 실행"""
+        benchmark = KNNBenchmark(config, client=self.client)
+        report = benchmark.run()
+        save_report(report, benchmark.config["report_path"])
+        return report
+
 if __name__ == "__main__":
     tester = KNNPluginTester()
-    tester.run_knn_plugin_test()
\ No newline at end of file
+    if "--benchmark" in sys.argv:
+        # 세부 설정은 knn_benchmark.py run --help 참고
+        tester.run_benchmark()
+    else:
+        tester.run_knn_plugin_test()
\ No newline at end of file
@@ -13,10 +13,14 @@ ML Commons 플러그인의 주요 기능들을 테스트합니다:
 날짜: 2025-08-12
 """
 
+import sys
 import json
 import time
 import numpy as np
-from opensearchpy import OpenSearch
+from opensearch_client import get_client
+from plugin_test_async import run_test_stages
+from index_helpers import stream_bulk, print_bulk_errors
+from rcf import RandomCutForest
 from opensearchpy.exceptions import RequestError
 import warnings
 warnings.filterwarnings('ignore')
@@ -24,13 +28,7 @@ warnings.filterwarnings('ignore')
 class MLCommonsPluginTester:
     def __init__(self):
         """OpenSearch 클라이언트 초기화"""
-        self.client = OpenSearch(
-            hosts=[{'host': 'localhost', 'port': 9200}],
-            http_auth=('admin', 'Kcb2025opSLabAi9'),
-            use_ssl=True,
-            verify_certs=False,
-            ssl_show_warn=False
-        )
+        self.client = get_client()
         print("🤖 ML Commons 플러그인 테스트 시작")
         print("=" * 50)
     
@@ -130,18 +128,12 @@ class MLCommonsPluginTester:
                 }
                 customers.append(customer)
             
-            # 벌크 인덱싱
-            bulk_body = []
-            for customer in customers:
-                bulk_body.extend([
-                    {"index": {"_index": index_name}},
-                    customer
-                ])
+            # 스트리밍 벌크 인덱싱
+            result = stream_bulk(self.client, index_name, customers)
+            print_bulk_errors(result, "고객 데이터")
+            print(f"✅ {result['success']}개 고객 데이터 생성 완료")
             
-            self.client.bulk(body=bulk_body, refresh=True)
-            print(f"✅ {len(customers)}개 고객 데이터 생성 완료")
-            
-            return True
+            return result['failed'] == 0
             
         except Exception as e:
             print(f"❌ 샘플 데이터 생성 실패: {e}")
@@ -304,16 +296,10 @@ class MLCommonsPluginTester:
                 }
                 transactions.append(transaction)
             
-            # 벌크 인덱싱
-            bulk_body = []
-            for transaction in transactions:
-                bulk_body.extend([
-                    {"index": {"_index": anomaly_index}},
-                    transaction
-                ])
-            
-            self.client.bulk(body=bulk_body, refresh=True)
-            print(f"✅ {len(transactions)}개 거래 데이터 생성 완료")
+            # 스트리밍 벌크 인덱싱
+            result = stream_bulk(self.client, anomaly_index, transactions)
+            print_bulk_errors(result, "거래 데이터")
+            print(f"✅ {result['success']}개 거래 데이터 생성 완료")
             
             # RCF 기반 이상 탐지 쿼리
             anomaly_query = {
@@ -376,6 +362,16 @@ class MLCommonsPluginTester:
                     source = hit['_source']
                     print(f"     - ${source['transaction_amount']:.2f} ({source['timestamp']}) - {source['merchant_category']}")
             
+            # 로컬 스트리밍 RCF 로 같은 거래 시계열 점수화 (클러스터 왕복 없이 주입된 이상과 비교)
+            forest = RandomCutForest(shingle_size=1, output_after=16)
+            scored = forest.process([transaction["transaction_amount"]] for transaction in transactions)
+            flagged = {i for i, item in enumerate(scored) if item["grade"] > 0}
+            injected = {i for i, transaction in enumerate(transactions) if transaction["is_anomaly"]}
+            detected = len(flagged & injected)
+            print(f"\n🌲 로컬 RCF 점수화: 이상 {len(flagged)}건 (임계 점수 {forest.threshold():.3f})")
+            print(f"   정밀도: {detected / len(flagged) if flagged else 0:.1%}, "
+                  f"재현율: {detected / len(injected) if injected else 0:.1%} (주입 {len(injected)}건 중 {detected}건)")
+            
             return True
             
         except Exception as e:
@@ -592,34 +588,38 @@ class MLCommonsPluginTester:
             print(f"❌ ML 인사이트 분석 실패: {e}")
             return False
     
-    def run_all_tests(self):
+    def run_all_tests(self, concurrent=False, max_concurrency=4):
         """모든 ML Commons 테스트 실행"""
         print("🚀 OpenSearch ML Commons 플러그인 종합 테스트")
         print("=" * 60)
         
-        test_results = {}
-        
-        # 테스트 실행
-        test_methods = [
-            ("플러그인 상태 확인", self.check_ml_plugin_status),
-            ("샘플 데이터 생성", self.setup_sample_data),
-            ("K-Means 클러스터링", self.test_kmeans_clustering),
-            ("RCF 이상 탐지", self.test_rcf_anomaly_detection),
-            ("모델 관리", self.test_model_management),
-            ("ML 비즈니스 인사이트", self.test_ml_insights)
+        # 테스트 실행 (같은 단계 안의 테스트는 서로 독립적이므로 동시 실행 가능)
+        test_stages = [
+            [("플러그인 상태 확인", self.check_ml_plugin_status)],
+            [("샘플 데이터 생성", self.setup_sample_data)],
+            [
+                ("K-Means 클러스터링", self.test_kmeans_clustering),
+                ("RCF 이상 탐지", self.test_rcf_anomaly_detection),
+                ("모델 관리", self.test_model_management),
+                ("ML 비즈니스 인사이트", self.test_ml_insights)
+            ]
         ]
         
-        for test_name, test_method in test_methods:
-            try:
-                result = test_method()
-                test_results[test_name] = result
-                if result:
-                    print(f"\n✅ {test_name} 테스트 완료")
-                else:
-                    print(f"\n❌ {test_name} 테스트 실패")
-            except Exception as e:
-                print(f"\n💥 {test_name} 테스트 중 오류: {e}")
-                test_results[test_name] = False
+        if concurrent:
+            test_results = run_test_stages(test_stages, max_concurrency)
+        else:
+            test_results = {}
+            for test_name, test_method in (test for stage in test_stages for test in stage):
+                try:
+                    result = test_method()
+                    test_results[test_name] = result
+                    if result:
+                        print(f"\n✅ {test_name} 테스트 완료")
+                    else:
+                        print(f"\n❌ {test_name} 테스트 실패")
+                except Exception as e:
+                    print(f"\n💥 {test_name} 테스트 중 오류: {e}")
+                    test_results[test_name] = False
         
         # 최종 결과 요약
         print(f"\n" + "=" * 60)
@@ -675,7 +675,7 @@ class MLCommonsPluginTester:
 def main():
     """메인 실행 함수"""
     tester = MLCommonsPluginTester()
-    tester.run_all_tests()
+    tester.run_all_tests(concurrent="--async" in sys.argv)
 
 
 if __name__ == "__main__":
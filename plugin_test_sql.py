@@ -3,28 +3,304 @@
 OpenSearch SQL 플러그인 상세 테스트
 """
 
-import requests
+import os
 import json
 import time
-from opensearchpy import OpenSearch, RequestsHttpConnection
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+import tempfile
+from opensearch_client import get_client, get_session, BASE_URL, OPENSEARCH_AUTH
+from index_helpers import index_documents, stream_bulk, print_bulk_errors
+from synthetic_data import generate_employees
+from sql_client import SQLStreamClient, SQLQueryError, pa
+from sql_cache import SQLTranslationCache
+from sql_prepared import prepare
+
+SCALED_EMPLOYEES_INDEX = "sql-test-employees-scaled"
+
+# 직원 데이터 매핑 (샘플 / 대용량 인덱스 공용)
+EMPLOYEE_MAPPING = {
+    "properties": {
+        "employee_id": {"type": "keyword"},
+        "name": {"type": "text"},
+        "department": {"type": "keyword"},
+        "position": {"type": "keyword"},
+        "salary": {"type": "integer"},
+        "hire_date": {"type": "date"},
+        "age": {"type": "integer"},
+        "email": {"type": "keyword"},
+        "performance_score": {"type": "float"}
+    }
+}
+
+
+def basic_sql_queries(index_name):
+    """기본 SQL 기능 쿼리 목록"""
+    return [
+        {
+            "name": "전체 데이터 조회",
+            "query": f"SELECT * FROM `{index_name}` LIMIT 3",
+            "feature": "SELECT * (전체 컬럼 조회)"
+        },
+        {
+            "name": "특정 컬럼 선택",
+            "query": f"SELECT name, department, salary FROM `{index_name}` LIMIT 5",
+            "feature": "SELECT 특정 컬럼"
+        },
+        {
+            "name": "WHERE 조건 검색",
+            "query": f"SELECT name, position, salary FROM `{index_name}` WHERE department = 'IT'",
+            "feature": "WHERE 절 필터링"
+        },
+        {
+            "name": "ORDER BY 정렬",
+            "query": f"SELECT name, salary FROM `{index_name}` ORDER BY salary DESC LIMIT 5",
+            "feature": "ORDER BY 정렬"
+        },
+        {
+            "name": "LIMIT 제한",
+            "query": f"SELECT name, department FROM `{index_name}` LIMIT 3",
+            "feature": "LIMIT 결과 제한"
+        }
+    ]
+
+
+def aggregation_sql_queries(index_name):
+    """집계 함수 쿼리 목록"""
+    return [
+        {
+            "name": "COUNT 함수",
+            "query": f"SELECT COUNT(*) as total_employees FROM `{index_name}`",
+            "feature": "COUNT(*) 총 개수"
+        },
+        {
+            "name": "AVG 함수",
+            "query": f"SELECT AVG(salary) as average_salary FROM `{index_name}`",
+            "feature": "AVG() 평균값"
+        },
+        {
+            "name": "MAX/MIN 함수",
+            "query": f"SELECT MAX(salary) as max_salary, MIN(salary) as min_salary FROM `{index_name}`",
+            "feature": "MAX(), MIN() 최대/최소값"
+        },
+        {
+            "name": "SUM 함수",
+            "query": f"SELECT SUM(salary) as total_salary FROM `{index_name}`",
+            "feature": "SUM() 합계"
+        },
+        {
+            "name": "GROUP BY",
+            "query": f"SELECT department, COUNT(*) as emp_count, AVG(salary) as avg_salary FROM `{index_name}` GROUP BY department",
+            "feature": "GROUP BY 그룹화"
+        },
+        {
+            "name": "HAVING 절",
+            "query": f"SELECT department, COUNT(*) as count FROM `{index_name}` GROUP BY department HAVING COUNT(*) > 1",
+            "feature": "HAVING 그룹 조건"
+        }
+    ]
+
+
+def advanced_sql_queries(index_name):
+    """고급 SQL 기능 쿼리 목록 (서브쿼리 포함)"""
+    return [
+        {
+            "name": "CASE WHEN 조건문",
+            "query": f"""
+            SELECT name, salary,
+                   CASE 
+                       WHEN salary >= 6000 THEN '고급'
+                       WHEN salary >= 5000 THEN '중급'
+                       ELSE '초급'
+                   END as salary_grade
+            FROM `{index_name}`
+            ORDER BY salary DESC
+            """,
+            "feature": "CASE WHEN 조건부 분류"
+        },
+        {
+            "name": "서브쿼리",
+            "query": f"""
+            SELECT name, salary, department
+            FROM `{index_name}`
+            WHERE salary > (SELECT AVG(salary) FROM `{index_name}`)
+            ORDER BY salary DESC
+            """,
+            "feature": "서브쿼리 (Subquery)"
+        },
+        {
+            "name": "다중 조건 WHERE",
+            "query": f"""
+            SELECT name, department, salary, age
+            FROM `{index_name}`
+            WHERE salary >= 5000 AND age < 35 AND department IN ('IT', 'Finance')
+            """,
+            "feature": "복합 WHERE 조건 (AND, IN)"
+        },
+        {
+            "name": "LIKE 패턴 검색",
+            "query": f"""
+            SELECT name, email
+            FROM `{index_name}`
+            WHERE email LIKE '%company.com'
+            """,
+            "feature": "LIKE 패턴 매칭"
+        },
+        {
+            "name": "날짜 함수",
+            "query": f"""
+            SELECT name, hire_date,
+                   DATE_FORMAT(hire_date, 'yyyy') as hire_year,
+                   DATE_FORMAT(hire_date, 'MM') as hire_month
+            FROM `{index_name}`
+            ORDER BY hire_date DESC
+            """,
+            "feature": "DATE_FORMAT 날짜 포맷"
+        },
+        {
+            "name": "ROUND 함수",
+            "query": f"""
+            SELECT department,
+                   COUNT(*) as employee_count,
+                   ROUND(AVG(salary), 0) as avg_salary,
+                   ROUND(AVG(performance_score), 2) as avg_performance
+            FROM `{index_name}`
+            GROUP BY department
+            """,
+            "feature": "ROUND 반올림 함수"
+        }
+    ]
+
+
+def business_sql_queries(index_name):
+    """비즈니스 분석 쿼리 목록"""
+    return [
+        {
+            "name": "부서별 인력 현황",
+            "query": f"""
+            SELECT department,
+                   COUNT(*) as headcount,
+                   ROUND(AVG(age), 1) as avg_age,
+                   ROUND(AVG(salary), 0) as avg_salary,
+                   ROUND(AVG(performance_score), 2) as avg_performance
+            FROM `{index_name}`
+            GROUP BY department
+            ORDER BY headcount DESC
+            """,
+            "feature": "부서별 종합 분석"
+        },
+        {
+            "name": "연봉 구간별 분포",
+            "query": f"""
+            SELECT 
+                CASE 
+                    WHEN salary >= 6000 THEN '6000만원 이상'
+                    WHEN salary >= 5000 THEN '5000-6000만원'
+                    WHEN salary >= 4000 THEN '4000-5000만원'
+                    ELSE '4000만원 미만'
+                END as salary_range,
+                COUNT(*) as employee_count,
+                ROUND(AVG(performance_score), 2) as avg_performance
+            FROM `{index_name}`
+            GROUP BY salary_range
+            ORDER BY MIN(salary) DESC
+            """,
+            "feature": "연봉 구간별 성과 분석"
+        },
+        {
+            "name": "입사년도별 트렌드",
+            "query": f"""
+            SELECT 
+                DATE_FORMAT(hire_date, 'yyyy') as hire_year,
+                COUNT(*) as new_hires,
+                ROUND(AVG(salary), 0) as avg_starting_salary
+            FROM `{index_name}`
+            GROUP BY DATE_FORMAT(hire_date, 'yyyy')
+            ORDER BY hire_year DESC
+            """,
+            "feature": "입사 트렌드 분석"
+        },
+        {
+            "name": "고성과자 식별",
+            "query": f"""
+            SELECT name, department, position, salary, performance_score
+            FROM `{index_name}`
+            WHERE performance_score >= 4.5
+            ORDER BY performance_score DESC, salary DESC
+            """,
+            "feature": "고성과자 조회"
+        },
+        {
+            "name": "부서별 성과 순위",
+            "query": f"""
+            SELECT department,
+                   ROUND(AVG(performance_score), 2) as avg_performance,
+                   COUNT(*) as team_size,
+                   ROUND(AVG(salary), 0) as avg_salary
+            FROM `{index_name}`
+            GROUP BY department
+            ORDER BY avg_performance DESC
+            """,
+            "feature": "부서 성과 랭킹"
+        }
+    ]
+
+
+def ppl_queries(index_name):
+    """PPL 쿼리 목록 (검색 / 필터 + 집계 / 중복 제거 / 계산 필드 / 빈도 / 정렬 명령)"""
+    return [
+        {
+            "name": "기본 PPL 검색",
+            "query": f"search source={index_name} | fields name, department, salary | head 5",
+            "feature": "PPL search | fields | head"
+        },
+        {
+            "name": "PPL 필터링", 
+            "query": f"search source={index_name} | where department='IT' | fields name, position, salary",
+            "feature": "PPL where 필터링"
+        },
+        {
+            "name": "PPL 그룹 통계",
+            "query": f"source={index_name} | stats count() as headcount, avg(salary) as avg_salary by department",
+            "feature": "PPL stats ... by 집계"
+        },
+        {
+            "name": "PPL 계산 필드",
+            "query": f"source={index_name} | eval bonus = salary * performance_score / 10 "
+                     f"| stats avg(bonus) as avg_bonus by department",
+            "feature": "PPL eval 계산 필드"
+        },
+        {
+            "name": "PPL 중복 제거",
+            "query": f"source={index_name} | dedup department | fields department, name, salary",
+            "feature": "PPL dedup 중복 제거"
+        },
+        {
+            "name": "PPL 상위 빈도",
+            "query": f"source={index_name} | top 3 position",
+            "feature": "PPL top 최빈값"
+        },
+        {
+            "name": "PPL 희소 빈도",
+            "query": f"source={index_name} | rare department",
+            "feature": "PPL rare 최소 빈도값"
+        },
+        {
+            "name": "PPL 정렬",
+            "query": f"source={index_name} | sort - salary, age | head 5 | fields name, salary, age",
+            "feature": "PPL sort 다중 정렬"
+        }
+    ]
+
 
 class SQLPluginTester:
     def __init__(self):
         """OpenSearch 연결 설정"""
-        self.client = OpenSearch(
-            hosts=[{'host': 'localhost', 'port': 9200}],
-            http_auth=('admin', 'Kcb2025opSLabAi9'),
-            use_ssl=True,
-            verify_certs=False,
-            ssl_assert_hostname=False,
-            ssl_show_warn=False,
-            connection_class=RequestsHttpConnection
-        )
+        self.client = get_client()
+        self.session = get_session()
+        self.sql_client = SQLStreamClient(self.session)
+        self.sql_cache = SQLTranslationCache(self.client, self.sql_client)
         
-        self.base_url = "https://localhost:9200"
-        self.auth = ('admin', 'Kcb2025opSLabAi9')
+        self.base_url = BASE_URL
+        self.auth = OPENSEARCH_AUTH
 
     def test_connection(self):
         """연결 테스트"""
@@ -46,24 +322,7 @@ class SQLPluginTester:
         if self.client.indices.exists(index=employees_index):
             self.client.indices.delete(index=employees_index)
         
-        # 직원 데이터 매핑
-        employee_mapping = {
-            "mappings": {
-                "properties": {
-                    "employee_id": {"type": "keyword"},
-                    "name": {"type": "text"},
-                    "department": {"type": "keyword"},
-                    "position": {"type": "keyword"},
-                    "salary": {"type": "integer"},
-                    "hire_date": {"type": "date"},
-                    "age": {"type": "integer"},
-                    "email": {"type": "keyword"},
-                    "performance_score": {"type": "float"}
-                }
-            }
-        }
-        
-        self.client.indices.create(index=employees_index, body=employee_mapping)
+        self.client.indices.create(index=employees_index, body={"mappings": EMPLOYEE_MAPPING})
         
         # 샘플 직원 데이터
         employees = [
@@ -79,27 +338,52 @@ class SQLPluginTester:
             {"employee_id": "EMP010", "name": "한미래", "department": "Marketing", "position": "디지털마케터", "salary": 5000, "hire_date": "2023-05-20", "age": 25, "email": "han@company.com", "performance_score": 4.4}
         ]
         
-        # 데이터 삽입
-        for i, emp in enumerate(employees):
-            self.client.index(index=employees_index, id=i+1, body=emp)
-        
-        time.sleep(2)  # 인덱싱 대기
+        # 데이터 삽입 (검색 가능해질 때까지 대기)
+        index_documents(self.client, employees_index, employees)
         print(f"   ✅ 직원 데이터 생성: {len(employees)}명")
         
         return employees_index
 
+    def create_scaled_test_data(self, rows, departments=4, skew=0.0, start_date="2010-01-01", end_date=None,
+                                index_name=SCALED_EMPLOYEES_INDEX, seed=42):
+        """부하 테스트용 대용량 직원 데이터 생성 (synthetic_data 생성기 → 스트리밍 벌크)
+        
+        적재 중에는 refresh / 복제본을 끄고, 끝나면 refresh_interval 을 복구합니다.
+        """
+        print(f"\n📊 대용량 직원 데이터 생성 중... ({rows:,}명, 부서 {departments}개, skew={skew}, "
+              f"입사일 {start_date} ~ {end_date or '오늘'})")
+        
+        if self.client.indices.exists(index=index_name):
+            self.client.indices.delete(index=index_name)
+        
+        self.client.indices.create(index=index_name, body={
+            "settings": {"number_of_replicas": 0, "refresh_interval": "-1"},
+            "mappings": EMPLOYEE_MAPPING
+        })
+        
+        result = stream_bulk(
+            self.client, index_name,
+            generate_employees(rows, departments, skew, start_date, end_date, seed),
+            refresh=False, progress_every=100000
+        )
+        print_bulk_errors(result, "직원")
+        
+        self.client.indices.put_settings(index=index_name, body={"index": {"refresh_interval": "1s"}})
+        self.client.indices.refresh(index=index_name)
+        print(f"   ✅ 직원 데이터 생성: {result['success']:,}명 ({result['docs_per_sec']:,.0f}건/초, {result['elapsed']:.1f}초)")
+        
+        return index_name
+
     def execute_sql_query(self, query, test_name, show_results=True):
         """SQL 쿼리 실행 및 결과 표시"""
         try:
             print(f"\n🔍 {test_name}")
             print(f"   SQL: {query.strip()}")
             
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/_plugins/_sql",
-                auth=self.auth,
                 headers={"Content-Type": "application/json"},
-                data=json.dumps({"query": query}),
-                verify=False
+                data=json.dumps({"query": query})
             )
             
             if response.status_code == 200:
@@ -148,35 +432,7 @@ class SQLPluginTester:
         results = {"기본기능": [], "테스트결과": {}}
         
         # 1. SELECT 문
-        basic_queries = [
-            {
-                "name": "전체 데이터 조회",
-                "query": f"SELECT * FROM `{index_name}` LIMIT 3",
-                "feature": "SELECT * (전체 컬럼 조회)"
-            },
-            {
-                "name": "특정 컬럼 선택",
-                "query": f"SELECT name, department, salary FROM `{index_name}` LIMIT 5",
-                "feature": "SELECT 특정 컬럼"
-            },
-            {
-                "name": "WHERE 조건 검색",
-                "query": f"SELECT name, position, salary FROM `{index_name}` WHERE department = 'IT'",
-                "feature": "WHERE 절 필터링"
-            },
-            {
-                "name": "ORDER BY 정렬",
-                "query": f"SELECT name, salary FROM `{index_name}` ORDER BY salary DESC LIMIT 5",
-                "feature": "ORDER BY 정렬"
-            },
-            {
-                "name": "LIMIT 제한",
-                "query": f"SELECT name, department FROM `{index_name}` LIMIT 3",
-                "feature": "LIMIT 결과 제한"
-            }
-        ]
-        
-        for test in basic_queries:
+        for test in basic_sql_queries(index_name):
             success, _ = self.execute_sql_query(test["query"], test["name"])
             if success:
                 results["기본기능"].append(test["feature"])
@@ -192,40 +448,7 @@ class SQLPluginTester:
         
         results = {"집계기능": [], "테스트결과": {}}
         
-        aggregation_queries = [
-            {
-                "name": "COUNT 함수",
-                "query": f"SELECT COUNT(*) as total_employees FROM `{index_name}`",
-                "feature": "COUNT(*) 총 개수"
-            },
-            {
-                "name": "AVG 함수",
-                "query": f"SELECT AVG(salary) as average_salary FROM `{index_name}`",
-                "feature": "AVG() 평균값"
-            },
-            {
-                "name": "MAX/MIN 함수",
-                "query": f"SELECT MAX(salary) as max_salary, MIN(salary) as min_salary FROM `{index_name}`",
-                "feature": "MAX(), MIN() 최대/최소값"
-            },
-            {
-                "name": "SUM 함수",
-                "query": f"SELECT SUM(salary) as total_salary FROM `{index_name}`",
-                "feature": "SUM() 합계"
-            },
-            {
-                "name": "GROUP BY",
-                "query": f"SELECT department, COUNT(*) as emp_count, AVG(salary) as avg_salary FROM `{index_name}` GROUP BY department",
-                "feature": "GROUP BY 그룹화"
-            },
-            {
-                "name": "HAVING 절",
-                "query": f"SELECT department, COUNT(*) as count FROM `{index_name}` GROUP BY department HAVING COUNT(*) > 1",
-                "feature": "HAVING 그룹 조건"
-            }
-        ]
-        
-        for test in aggregation_queries:
+        for test in aggregation_sql_queries(index_name):
             success, _ = self.execute_sql_query(test["query"], test["name"])
             if success:
                 results["집계기능"].append(test["feature"])
@@ -241,75 +464,7 @@ class SQLPluginTester:
         
         results = {"고급기능": [], "테스트결과": {}}
         
-        advanced_queries = [
-            {
-                "name": "CASE WHEN 조건문",
-                "query": f"""
-                SELECT name, salary,
-                       CASE 
-                           WHEN salary >= 6000 THEN '고급'
-                           WHEN salary >= 5000 THEN '중급'
-                           ELSE '초급'
-                       END as salary_grade
-                FROM `{index_name}`
-                ORDER BY salary DESC
-                """,
-                "feature": "CASE WHEN 조건부 분류"
-            },
-            {
-                "name": "서브쿼리",
-                "query": f"""
-                SELECT name, salary, department
-                FROM `{index_name}`
-                WHERE salary > (SELECT AVG(salary) FROM `{index_name}`)
-                ORDER BY salary DESC
-                """,
-                "feature": "서브쿼리 (Subquery)"
-            },
-            {
-                "name": "다중 조건 WHERE",
-                "query": f"""
-                SELECT name, department, salary, age
-                FROM `{index_name}`
-                WHERE salary >= 5000 AND age < 35 AND department IN ('IT', 'Finance')
-                """,
-                "feature": "복합 WHERE 조건 (AND, IN)"
-            },
-            {
-                "name": "LIKE 패턴 검색",
-                "query": f"""
-                SELECT name, email
-                FROM `{index_name}`
-                WHERE email LIKE '%company.com'
-                """,
-                "feature": "LIKE 패턴 매칭"
-            },
-            {
-                "name": "날짜 함수",
-                "query": f"""
-                SELECT name, hire_date,
-                       DATE_FORMAT(hire_date, 'yyyy') as hire_year,
-                       DATE_FORMAT(hire_date, 'MM') as hire_month
-                FROM `{index_name}`
-                ORDER BY hire_date DESC
-                """,
-                "feature": "DATE_FORMAT 날짜 포맷"
-            },
-            {
-                "name": "ROUND 함수",
-                "query": f"""
-                SELECT department,
-                       COUNT(*) as employee_count,
-                       ROUND(AVG(salary), 0) as avg_salary,
-                       ROUND(AVG(performance_score), 2) as avg_performance
-                FROM `{index_name}`
-                GROUP BY department
-                """,
-                "feature": "ROUND 반올림 함수"
-            }
-        ]
-        
-        for test in advanced_queries:
+        for test in advanced_sql_queries(index_name):
             success, _ = self.execute_sql_query(test["query"], test["name"])
             if success:
                 results["고급기능"].append(test["feature"])
@@ -325,78 +480,7 @@ class SQLPluginTester:
         
         results = {"분석기능": [], "테스트결과": {}}
         
-        business_queries = [
-            {
-                "name": "부서별 인력 현황",
-                "query": f"""
-                SELECT department,
-                       COUNT(*) as headcount,
-                       ROUND(AVG(age), 1) as avg_age,
-                       ROUND(AVG(salary), 0) as avg_salary,
-                       ROUND(AVG(performance_score), 2) as avg_performance
-                FROM `{index_name}`
-                GROUP BY department
-                ORDER BY headcount DESC
-                """,
-                "feature": "부서별 종합 분석"
-            },
-            {
-                "name": "연봉 구간별 분포",
-                "query": f"""
-                SELECT 
-                    CASE 
-                        WHEN salary >= 6000 THEN '6000만원 이상'
-                        WHEN salary >= 5000 THEN '5000-6000만원'
-                        WHEN salary >= 4000 THEN '4000-5000만원'
-                        ELSE '4000만원 미만'
-                    END as salary_range,
-                    COUNT(*) as employee_count,
-                    ROUND(AVG(performance_score), 2) as avg_performance
-                FROM `{index_name}`
-                GROUP BY salary_range
-                ORDER BY MIN(salary) DESC
-                """,
-                "feature": "연봉 구간별 성과 분석"
-            },
-            {
-                "name": "입사년도별 트렌드",
-                "query": f"""
-                SELECT 
-                    DATE_FORMAT(hire_date, 'yyyy') as hire_year,
-                    COUNT(*) as new_hires,
-                    ROUND(AVG(salary), 0) as avg_starting_salary
-                FROM `{index_name}`
-                GROUP BY DATE_FORMAT(hire_date, 'yyyy')
-                ORDER BY hire_year DESC
-                """,
-                "feature": "입사 트렌드 분석"
-            },
-            {
-                "name": "고성과자 식별",
-                "query": f"""
-                SELECT name, department, position, salary, performance_score
-                FROM `{index_name}`
-                WHERE performance_score >= 4.5
-                ORDER BY performance_score DESC, salary DESC
-                """,
-                "feature": "고성과자 조회"
-            },
-            {
-                "name": "부서별 성과 순위",
-                "query": f"""
-                SELECT department,
-                       ROUND(AVG(performance_score), 2) as avg_performance,
-                       COUNT(*) as team_size,
-                       ROUND(AVG(salary), 0) as avg_salary
-                FROM `{index_name}`
-                GROUP BY department
-                ORDER BY avg_performance DESC
-                """,
-                "feature": "부서 성과 랭킹"
-            }
-        ]
-        
-        for test in business_queries:
+        for test in business_sql_queries(index_name):
             success, _ = self.execute_sql_query(test["query"], test["name"])
             if success:
                 results["분석기능"].append(test["feature"])
@@ -406,6 +490,202 @@ class SQLPluginTester:
         
         return results
 
+    def test_cursor_streaming(self, index_name):
+        """fetch_size 커서 스트리밍 및 파일 내보내기 테스트"""
+        print("\n=== 📜 SQL 커서 스트리밍 테스트 ===")
+        
+        results = {"스트리밍기능": [], "테스트결과": {}}
+        query = f"SELECT employee_id, name, department, salary FROM {index_name}"
+        fetch_size = 3
+        
+        # 1. 페이지 단위 조회 (전체 행 수와 페이지 수 확인)
+        try:
+            print(f"\n🔍 커서 페이지 조회 (fetch_size={fetch_size})")
+            page_sizes = [len(rows) for _, rows in self.sql_client.iter_pages(query, fetch_size)]
+            print(f"   ✅ {sum(page_sizes)}행 / {len(page_sizes)}페이지 {page_sizes}")
+            
+            if len(page_sizes) > 1:
+                results["스트리밍기능"].append("fetch_size 커서 페이지 조회")
+                results["테스트결과"]["커서페이지조회"] = f"성공 ({len(page_sizes)}페이지)"
+            else:
+                results["테스트결과"]["커서페이지조회"] = "커서 미반환 (단일 페이지)"
+        except Exception as e:
+            print(f"   ❌ 커서 조회 오류: {e}")
+            results["테스트결과"]["커서페이지조회"] = f"오류: {e}"
+        
+        # 2. 중간 중단 시 커서 해제 (제너레이터 close → finally 에서 _sql/close 호출)
+        try:
+            print("\n🔍 중간 중단 후 커서 해제")
+            rows = self.sql_client.iter_rows(query, fetch_size)
+            first_rows = [next(rows) for _ in range(fetch_size + 1)]
+            rows.close()
+            print(f"   ✅ {len(first_rows)}행 읽은 뒤 커서 해제")
+            results["스트리밍기능"].append("조기 종료 시 커서 자동 해제")
+            results["테스트결과"]["커서해제"] = "성공"
+        except Exception as e:
+            print(f"   ❌ 커서 해제 오류: {e}")
+            results["테스트결과"]["커서해제"] = f"오류: {e}"
+        
+        # 3. 파일 내보내기 (Parquet 는 pyarrow 설치 시에만)
+        formats = ["csv", "jsonl"] + (["parquet"] if pa is not None else [])
+        with tempfile.TemporaryDirectory() as output_dir:
+            for output_format in formats:
+                try:
+                    path = os.path.join(output_dir, f"employees.{output_format}")
+                    export = self.sql_client.export(query, path, fetch_size=fetch_size)
+                    print(f"   ✅ {output_format.upper()} 내보내기: {export['rows']}행, {export['bytes']:,} bytes")
+                    results["스트리밍기능"].append(f"{output_format.upper()} 점진적 내보내기")
+                    results["테스트결과"][f"{output_format.upper()}내보내기"] = "성공"
+                except Exception as e:
+                    print(f"   ❌ {output_format.upper()} 내보내기 오류: {e}")
+                    results["테스트결과"][f"{output_format.upper()}내보내기"] = f"오류: {e}"
+        
+        if pa is None:
+            print("   ⚠️ pyarrow 미설치 - Parquet 내보내기 생략")
+        
+        return results
+
+    def test_translation_cache(self, index_name, repeat=50):
+        """SQL → DSL 변환 캐시 결과 일치 / 지연 / 매핑 변경 시 폐기 테스트"""
+        print("\n=== 🗄️ SQL 변환 캐시 테스트 ===")
+        
+        results = {"캐시기능": [], "테스트결과": {}}
+        self.sql_cache.invalidate()
+        
+        def query_for(department, min_salary):
+            return (f"SELECT employee_id, name, salary FROM `{index_name}` "
+                    f"WHERE department = '{department}' AND salary >= {min_salary}")
+        
+        # 1. 같은 모양, 다른 값 → 첫 실행만 explain, 이후 _search 직접 실행
+        try:
+            print("\n🔍 파라미터만 다른 쿼리 반복")
+            statuses = []
+            mismatches = 0
+            for department, min_salary in [("IT", 5000), ("HR", 4000), ("Finance", 5000), ("IT", 6500)]:
+                query = query_for(department, min_salary)
+                cached = self.sql_cache.execute(query)
+                expected = self.sql_client.execute(query)
+                statuses.append(cached["cache"])
+                if sorted(json.dumps(row) for row in cached["datarows"]) != sorted(json.dumps(row) for row in expected["datarows"]):
+                    mismatches += 1
+                print(f"   {department} / {min_salary}: {len(cached['datarows'])}행 ({cached['cache']})")
+            
+            if mismatches == 0 and "hit" in statuses:
+                results["캐시기능"].append("파라미터 치환 DSL 재사용")
+                results["테스트결과"]["캐시결과일치"] = f"성공 ({statuses.count('hit')}/{len(statuses)} 적중)"
+            elif mismatches:
+                results["테스트결과"]["캐시결과일치"] = f"실패 ({mismatches}건 불일치)"
+            else:
+                reason = self.sql_cache.execute(query_for("IT", 5000)).get("cache_reason", "")
+                results["테스트결과"]["캐시결과일치"] = f"캐시 불가 쿼리: {reason}"
+        except Exception as e:
+            print(f"   ❌ 캐시 실행 오류: {e}")
+            results["테스트결과"]["캐시결과일치"] = f"오류: {e}"
+        
+        # 2. 반복 실행 지연 비교
+        try:
+            query = query_for("IT", 5000)
+            timings = {}
+            for label, execute in [("SQL 플러그인", self.sql_client.execute), ("변환 캐시", self.sql_cache.execute)]:
+                start_time = time.perf_counter()
+                for _ in range(repeat):
+                    execute(query)
+                timings[label] = (time.perf_counter() - start_time) * 1000 / repeat
+                print(f"   ⏱️ {label}: 평균 {timings[label]:.2f}ms ({repeat}회)")
+            
+            results["캐시기능"].append("반복 쿼리 SQL 파싱/계획 생략")
+            results["테스트결과"]["캐시지연"] = f"성공 ({timings['SQL 플러그인'] / timings['변환 캐시']:.1f}배)"
+        except Exception as e:
+            print(f"   ❌ 지연 비교 오류: {e}")
+            results["테스트결과"]["캐시지연"] = f"오류: {e}"
+        
+        # 3. 매핑 변경 → 해당 인덱스 캐시 폐기 후 재변환
+        interval = self.sql_cache.mapping_check_interval
+        try:
+            print("\n🔍 매핑 변경 후 캐시 폐기")
+            self.sql_cache.mapping_check_interval = 0
+            self.client.indices.put_mapping(index=index_name, body={"properties": {"cache_probe": {"type": "keyword"}}})
+            status = self.sql_cache.execute(query_for("IT", 5000))["cache"]
+            print(f"   {'✅' if status == 'miss' else '❌'} 매핑 변경 후 첫 실행: {status}")
+            if status == "miss":
+                results["캐시기능"].append("매핑 변경 시 캐시 무효화")
+                results["테스트결과"]["캐시무효화"] = "성공"
+            else:
+                results["테스트결과"]["캐시무효화"] = f"실패 ({status})"
+        except Exception as e:
+            print(f"   ❌ 캐시 무효화 오류: {e}")
+            results["테스트결과"]["캐시무효화"] = f"오류: {e}"
+        finally:
+            self.sql_cache.mapping_check_interval = interval
+        
+        print(f"   📊 캐시 상태: {self.sql_cache.info()}")
+        return results
+
+    def test_prepared_queries(self, index_name):
+        """준비된 쿼리 바인딩 / 일괄 실행 / 주입 방지 테스트"""
+        print("\n=== 🧩 준비된 쿼리 (파라미터 바인딩) 테스트 ===")
+        
+        results = {"준비쿼리기능": [], "테스트결과": {}}
+        
+        # 1. 이름 자리 템플릿 일괄 실행 (변환 캐시 경유)
+        try:
+            query = prepare(
+                "SELECT employee_id, name, salary FROM {index} WHERE department = :department AND salary >= :min_salary",
+                cache=self.sql_cache, index=index_name
+            )
+            param_sets = [{"department": department, "min_salary": 5000} for department in ["IT", "HR", "Finance", "Marketing"]]
+            responses = query.execute_many(param_sets)
+            errors = [response["error"] for response in responses if "error" in response]
+            for params, response in zip(param_sets, responses):
+                print(f"   {params['department']}: {len(response.get('datarows', []))}행 ({response.get('cache', '오류')})")
+            
+            if errors:
+                results["테스트결과"]["일괄실행"] = f"실패 ({errors[0][:100]})"
+            else:
+                results["준비쿼리기능"].append(":name 파라미터 일괄 실행")
+                results["테스트결과"]["일괄실행"] = f"성공 ({len(responses)}건)"
+        except Exception as e:
+            print(f"   ❌ 일괄 실행 오류: {e}")
+            results["테스트결과"]["일괄실행"] = f"오류: {e}"
+        
+        # 2. 위치 자리 + IN 목록 펼침
+        try:
+            query = prepare("SELECT name, department FROM {index} WHERE department IN (?) AND age < ?", index=index_name,
+                            sql_client=self.sql_client)
+            response = query.execute(["IT", "HR"], 30)
+            departments = {row[1] for row in response["datarows"]}
+            print(f"\n   IN ('IT', 'HR') AND age < 30: {len(response['datarows'])}행 {sorted(departments)}")
+            if departments <= {"IT", "HR"}:
+                results["준비쿼리기능"].append("? 파라미터 + IN 목록 바인딩")
+                results["테스트결과"]["목록바인딩"] = "성공"
+            else:
+                results["테스트결과"]["목록바인딩"] = f"실패 ({sorted(departments)})"
+        except Exception as e:
+            print(f"   ❌ 목록 바인딩 오류: {e}")
+            results["테스트결과"]["목록바인딩"] = f"오류: {e}"
+        
+        # 3. 주입 시도 값은 문자열 리터럴로만 처리, 잘못된 식별자는 거부
+        try:
+            query = prepare("SELECT name FROM {index} WHERE department = ?", index=index_name, sql_client=self.sql_client)
+            injected = query.execute("IT' OR '1'='1")
+            try:
+                prepare("SELECT name FROM {index}", index=f"{index_name}` WHERE 1=1 --")
+                identifier_rejected = False
+            except ValueError:
+                identifier_rejected = True
+            
+            print(f"   주입 시도 값 결과: {len(injected['datarows'])}행, 잘못된 식별자 거부: {identifier_rejected}")
+            if not injected["datarows"] and identifier_rejected:
+                results["준비쿼리기능"].append("값 이스케이프 / 식별자 검증")
+                results["테스트결과"]["주입방지"] = "성공"
+            else:
+                results["테스트결과"]["주입방지"] = "실패"
+        except Exception as e:
+            print(f"   ❌ 주입 방지 테스트 오류: {e}")
+            results["테스트결과"]["주입방지"] = f"오류: {e}"
+        
+        return results
+
     def test_ppl_queries(self, index_name):
         """PPL (Piped Processing Language) 테스트"""
         print("\n=== 🔄 PPL (Piped Processing Language) 테스트 ===")
@@ -413,47 +693,28 @@ class SQLPluginTester:
         results = {"PPL기능": [], "테스트결과": {}}
         
         try:
-            # PPL 쿼리 예시
-            ppl_queries = [
-                {
-                    "name": "기본 PPL 검색",
-                    "query": "search source=sql-test-employees | fields name, department, salary | head 5"
-                },
-                {
-                    "name": "PPL 필터링", 
-                    "query": "search source=sql-test-employees | where department='IT' | fields name, position, salary"
-                }
-            ]
-            
-            for test in ppl_queries:
+            for test in ppl_queries(index_name):
                 try:
                     print(f"\n🔍 {test['name']}")
                     print(f"   PPL: {test['query'].strip()}")
                     
-                    response = requests.post(
-                        f"{self.base_url}/_plugins/_sql",
-                        auth=self.auth,
-                        headers={"Content-Type": "application/json"},
-                        data=json.dumps({"query": test["query"]}),
-                        verify=False
-                    )
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        print(f"   ✅ PPL 실행 성공")
-                        
-                        if 'datarows' in result and result['datarows']:
-                            print(f"   📊 결과: {len(result['datarows'])}행")
-                            # 첫 번째 결과만 표시
-                            if result['datarows']:
-                                print(f"      샘플: {result['datarows'][0]}")
-                        
-                        results["PPL기능"].append(test["feature"])
-                        results["테스트결과"][test["name"]] = "성공"
-                    else:
-                        print(f"   ❌ PPL 실행 실패: {response.status_code}")
+                    try:
+                        result = self.sql_client.execute(test["query"], "ppl")
+                    except SQLQueryError as e:
+                        print(f"   ❌ PPL 실행 실패: {e.status_code}")
+                        print(f"      오류: {e.message[:100]}")
                         results["테스트결과"][test["name"]] = "실패"
-                        
+                        continue
+                    
+                    print(f"   ✅ PPL 실행 성공")
+                    if 'datarows' in result and result['datarows']:
+                        print(f"   📊 결과: {len(result['datarows'])}행")
+                        # 첫 번째 결과만 표시
+                        print(f"      샘플: {result['datarows'][0]}")
+                    
+                    results["PPL기능"].append(test["feature"])
+                    results["테스트결과"][test["name"]] = "성공"
+                    
                 except Exception as e:
                     print(f"   ❌ PPL 오류: {e}")
                     results["테스트결과"][test["name"]] = f"오류: {e}"
@@ -494,6 +755,18 @@ class SQLPluginTester:
         business_results = self.test_business_analysis_queries(index_name)
         all_results.update(business_results)
         
+        # 커서 스트리밍
+        streaming_results = self.test_cursor_streaming(index_name)
+        all_results.update(streaming_results)
+        
+        # SQL 변환 캐시
+        cache_results = self.test_translation_cache(index_name)
+        all_results.update(cache_results)
+        
+        # 준비된 쿼리
+        prepared_results = self.test_prepared_queries(index_name)
+        all_results.update(prepared_results)
+        
         # PPL 테스트
         ppl_results = self.test_ppl_queries(index_name)
         all_results.update(ppl_results)
@@ -509,7 +782,7 @@ class SQLPluginTester:
         
         # 모든 기능 수집
         all_features = []
-        for key in ["기본기능", "집계기능", "고급기능", "분석기능", "PPL기능"]:
+        for key in ["기본기능", "집계기능", "고급기능", "분석기능", "스트리밍기능", "캐시기능", "준비쿼리기능", "PPL기능"]:
             if key in results:
                 all_features.extend(results[key])
         
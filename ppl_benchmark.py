@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+OpenSearch PPL 파이프라인 부하 벤치마크 (PPL vs SQL vs DSL)
+=========================================================
+
+같은 분석을 PPL 파이프라인(stats ... by / dedup / eval / top / rare / sort), SQL, 그리고
+직접 작성한 DSL 집계로 각각 실행하여 지연 시간을 비교합니다. 각 실행 구간 전후로
+_nodes/stats/breaker 를 조회해 메모리 서킷 브레이커 차단(tripped) 횟수와 추정 사용량 최대값을 기록합니다.
+
+DSL 은 샤드 요청 캐시(size=0 집계 결과 캐시)를 끄고 실행하여 PPL / SQL 과 같은 조건으로 측정합니다.
+세 언어의 결과 행(버킷)은 정규화해 서로 비교하고, 결과가 다른 분석은 불일치로 표시해 속도 비교에서 제외합니다.
+
+2.13 에서 eval / top / rare / dedup 처럼 푸시다운되지 않는 파이프라인은 plugins.query.size_limit
+(기본 200)건만 스캔해 메모리에서 처리하므로, 실행 동안 size_limit 을 인덱스 문서 수로 올렸다가
+원래 값으로 되돌립니다 (--size-limit 로 직접 지정). 그래도 문서 수보다 작으면 메모리 처리 분석을 truncated 로 표시합니다.
+대용량 데이터는 sql_benchmark --setup-rows 또는 이 스크립트의 --setup-rows 로 생성합니다.
+
+사용 예:
+    python ppl_benchmark.py --setup-rows 1000000 --skew 1.2
+    python ppl_benchmark.py --index sql-test-employees-scaled --transactions-index financial-realtime-transactions
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import sys
+import json
+import time
+import argparse
+import datetime
+from opensearch_client import get_client
+from sql_client import SQLStreamClient, analyze_plan
+from sql_benchmark import latency_summary
+from plugin_test_sql import SQLPluginTester, SCALED_EMPLOYEES_INDEX
+
+DEFAULT_ITERATIONS = 10
+DEFAULT_WARMUP = 2
+LANGUAGES = ["ppl", "sql", "dsl"]
+SIZE_LIMIT_SETTING = "plugins.query.size_limit"
+DEFAULT_SIZE_LIMIT = 200
+
+
+def employee_workloads(index_name):
+    """직원 데이터 분석 목록 {"name", "ppl", "sql", "dsl", "compare"} (같은 분석의 세 가지 표현)
+    
+    compare: "all" 은 행의 모든 값, "keys" 는 문자열 키만 비교 (PPL top / rare 는 건수 컬럼이 없음)
+    """
+    return [
+        {
+            "name": "부서별 인원/평균 연봉",
+            "ppl": f"source={index_name} | stats count() as headcount, avg(salary) as avg_salary by department",
+            "sql": f"SELECT department, COUNT(*) AS headcount, AVG(salary) AS avg_salary FROM `{index_name}` "
+                   f"GROUP BY department",
+            "dsl": {"size": 0, "aggs": {"by_department": {
+                "terms": {"field": "department", "size": 10000},
+                "aggs": {"avg_salary": {"avg": {"field": "salary"}}}
+            }}}
+        },
+        {
+            "name": "부서x직급 통계",
+            "ppl": f"source={index_name} | stats count() as headcount, max(salary) as max_salary, "
+                   f"min(age) as min_age by department, position",
+            "sql": f"SELECT department, position, COUNT(*) AS headcount, MAX(salary) AS max_salary, MIN(age) AS min_age "
+                   f"FROM `{index_name}` GROUP BY department, position",
+            "dsl": {"size": 0, "aggs": {"by_department": {
+                "terms": {"field": "department", "size": 10000},
+                "aggs": {"by_position": {
+                    "terms": {"field": "position", "size": 100},
+                    "aggs": {"max_salary": {"max": {"field": "salary"}}, "min_age": {"min": {"field": "age"}}}
+                }}
+            }}}
+        },
+        {
+            "name": "eval 계산 필드 집계",
+            "ppl": f"source={index_name} | eval bonus = salary * performance_score / 10 "
+                   f"| stats avg(bonus) as avg_bonus by department",
+            "sql": f"SELECT department, AVG(salary * performance_score / 10) AS avg_bonus FROM `{index_name}` "
+                   f"GROUP BY department",
+            "dsl": {"size": 0, "aggs": {"by_department": {
+                "terms": {"field": "department", "size": 10000},
+                "aggs": {"avg_bonus": {"avg": {"script": {
+                    "source": "doc['salary'].value * doc['performance_score'].value / 10"
+                }}}}
+            }}}
+        },
+        {
+            "name": "입사연도별 인원",
+            "ppl": f"source={index_name} | eval hire_year = YEAR(hire_date) | stats count() as hires by hire_year",
+            "sql": f"SELECT YEAR(hire_date) AS hire_year, COUNT(*) AS hires FROM `{index_name}` "
+                   f"GROUP BY YEAR(hire_date)",
+            "dsl": {"size": 0, "aggs": {"by_year": {
+                "date_histogram": {"field": "hire_date", "calendar_interval": "year", "format": "yyyy",
+                                   "min_doc_count": 1}
+            }}}
+        },
+        {
+            "name": "상위 5 직급 (top)",
+            "ppl": f"source={index_name} | top 5 position",
+            "sql": f"SELECT position, COUNT(*) AS cnt FROM `{index_name}` GROUP BY position ORDER BY cnt DESC LIMIT 5",
+            "dsl": {"size": 0, "aggs": {"by_position": {"terms": {"field": "position", "size": 5}}}},
+            "compare": "keys"
+        },
+        {
+            "name": "희소 부서 (rare)",
+            "ppl": f"source={index_name} | rare department",
+            "sql": f"SELECT department, COUNT(*) AS cnt FROM `{index_name}` GROUP BY department ORDER BY cnt ASC LIMIT 10",
+            "dsl": {"size": 0, "aggs": {"by_department": {
+                "terms": {"field": "department", "size": 10, "order": {"_count": "asc"}}
+            }}},
+            "compare": "keys"
+        },
+        {
+            "name": "부서 목록 (dedup)",
+            "ppl": f"source={index_name} | dedup department | fields department",
+            "sql": f"SELECT DISTINCT department FROM `{index_name}`",
+            "dsl": {"size": 10000, "_source": ["department"], "collapse": {"field": "department"}}
+        },
+        {
+            "name": "연봉 상위 100 (sort)",
+            "ppl": f"source={index_name} | sort - salary, age | head 100 | fields name, department, salary, age",
+            "sql": f"SELECT name, department, salary, age FROM `{index_name}` ORDER BY salary DESC, age ASC LIMIT 100",
+            "dsl": {"size": 100, "_source": ["name", "department", "salary", "age"],
+                    "sort": [{"salary": "desc"}, {"age": "asc"}]}
+        }
+    ]
+
+
+def transaction_workloads(index_name):
+    """실시간 거래 데이터 분석 목록 (plugin_test_anomaly_detection --scale 데이터)"""
+    return [
+        {
+            "name": "업종x지역 거래 합계",
+            "ppl": f"source={index_name} | stats count() as txns, sum(amount) as total by merchant_type, location",
+            "sql": f"SELECT merchant_type, location, COUNT(*) AS txns, SUM(amount) AS total FROM `{index_name}` "
+                   f"GROUP BY merchant_type, location",
+            "dsl": {"size": 0, "aggs": {"by_merchant": {
+                "terms": {"field": "merchant_type", "size": 100},
+                "aggs": {"by_location": {
+                    "terms": {"field": "location", "size": 100},
+                    "aggs": {"total": {"sum": {"field": "amount"}}}
+                }}
+            }}}
+        },
+        {
+            "name": "고객 수 (distinct_count)",
+            "ppl": f"source={index_name} | stats distinct_count(customer_id) as customers",
+            "sql": f"SELECT COUNT(DISTINCT customer_id) AS customers FROM `{index_name}`",
+            "dsl": {"size": 0, "aggs": {"customers": {"cardinality": {"field": "customer_id"}}}}
+        },
+        {
+            "name": "시간대별 고위험 거래",
+            "ppl": f"source={index_name} | where anomaly_score > 0.7 | stats count() as risky by hour_of_day",
+            "sql": f"SELECT hour_of_day, COUNT(*) AS risky FROM `{index_name}` WHERE anomaly_score > 0.7 "
+                   f"GROUP BY hour_of_day",
+            "dsl": {"size": 0, "query": {"range": {"anomaly_score": {"gt": 0.7}}},
+                    "aggs": {"by_hour": {"terms": {"field": "hour_of_day", "size": 24}}}}
+        }
+    ]
+
+
+def breaker_snapshot(client):
+    """노드 합산 서킷 브레이커 상태 {브레이커: {"tripped", "estimated_bytes", "limit_bytes"}}"""
+    stats = client.nodes.stats(metric="breaker")
+    snapshot = {}
+    for node in stats.get("nodes", {}).values():
+        for name, breaker in node.get("breakers", {}).items():
+            entry = snapshot.setdefault(name, {"tripped": 0, "estimated_bytes": 0, "limit_bytes": 0})
+            entry["tripped"] += breaker.get("tripped", 0)
+            entry["estimated_bytes"] = max(entry["estimated_bytes"], breaker.get("estimated_size_in_bytes", 0))
+            entry["limit_bytes"] = max(entry["limit_bytes"], breaker.get("limit_size_in_bytes", 0))
+    return snapshot
+
+
+def breaker_trips(before, after):
+    """두 스냅샷 사이에 새로 차단된 브레이커 {이름: 횟수}"""
+    trips = {}
+    for name, entry in after.items():
+        delta = entry["tripped"] - before.get(name, {}).get("tripped", 0)
+        if delta > 0:
+            trips[name] = delta
+    return trips
+
+
+def _bucket_rows(aggregations, prefix):
+    """DSL 집계 트리 → 평탄화한 행 목록 (중첩 terms 키 + 말단 doc_count + 지표 값)"""
+    nested = [agg for agg in aggregations.values() if "buckets" in agg]
+    if not nested:
+        return [prefix + [agg["value"] for agg in aggregations.values() if "value" in agg]]
+    
+    rows = []
+    for bucket in nested[0]["buckets"]:
+        key = bucket.get("key_as_string", bucket["key"])
+        children = {name: value for name, value in bucket.items() if isinstance(value, dict)}
+        if any("buckets" in child for child in children.values()):
+            rows.extend(_bucket_rows(children, prefix + [key]))
+        else:
+            rows.append(prefix + [key, bucket["doc_count"]] + [child["value"] for child in children.values() if "value" in child])
+    return rows
+
+
+def response_rows(language, response):
+    """응답 행 목록 - PPL / SQL 은 datarows, DSL 은 평탄화한 집계 버킷 또는 hits 의 _source"""
+    if language != "dsl":
+        return response.get("datarows", [])
+    aggregations = response.get("aggregations")
+    if aggregations:
+        return _bucket_rows(aggregations, [])
+    return [list(hit.get("_source", {}).values()) for hit in response["hits"]["hits"]]
+
+
+def _canonical(value):
+    """비교용 값 - 숫자(숫자 문자열 포함)는 유효숫자 6자리, 그 외는 문자열"""
+    if isinstance(value, bool) or value is None:
+        return str(value)
+    try:
+        return f"{float(value):.6g}"
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def result_signature(rows, compare="all"):
+    """언어 간 비교용 행 집합 (컬럼 순서가 언어마다 달라 행 안의 값도 정렬)"""
+    signature = []
+    for row in rows:
+        if compare == "keys":
+            row = [value for value in row if isinstance(value, str) and _canonical(value) == value]
+        signature.append(tuple(sorted(_canonical(value) for value in row)))
+    return sorted(signature)
+
+
+def current_size_limit(client):
+    """plugins.query.size_limit 현재 값과 transient 설정값 (없으면 None) → (값, transient 값)"""
+    settings = client.cluster.get_settings(include_defaults=True, flat_settings=True)
+    transient = settings.get("transient", {}).get(SIZE_LIMIT_SETTING)
+    for scope in ("transient", "persistent", "defaults"):
+        if SIZE_LIMIT_SETTING in settings.get(scope, {}):
+            return int(settings[scope][SIZE_LIMIT_SETTING]), transient
+    return DEFAULT_SIZE_LIMIT, transient
+
+
+def set_size_limit(client, value):
+    """plugins.query.size_limit transient 설정 (None 이면 설정 해제)"""
+    client.cluster.put_settings(body={"transient": {SIZE_LIMIT_SETTING: value}})
+
+
+class PPLWorkloadBenchmark:
+    def __init__(self, client=None, sql_client=None, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP):
+        """벤치마크 설정 (client: DSL 실행 / 브레이커 조회, sql_client: PPL / SQL 실행)"""
+        self.client = client or get_client()
+        self.sql_client = sql_client or SQLStreamClient()
+        self.iterations = iterations
+        self.warmup = warmup
+
+    def executor(self, language, index_name, query):
+        """언어별 실행 함수"""
+        if language == "dsl":
+            return lambda: self.client.search(index=index_name, body=query, request_cache=False)
+        return lambda: self.sql_client.execute(query, language)
+
+    def measure(self, language, index_name, query):
+        """워밍업 후 반복 실행 → 지연 요약 + 오류 수 + 브레이커 차단 / 추정 사용량 최대값
+        
+        브레이커 차단 시 요청이 실패하므로 오류는 중단하지 않고 횟수만 셉니다.
+        """
+        execute = self.executor(language, index_name, query)
+        result = {"errors": 0}
+        before = breaker_snapshot(self.client)
+        peak = {}
+        
+        for _ in range(self.warmup):
+            try:
+                execute()
+            except Exception:
+                result["errors"] += 1
+        
+        latencies = []
+        response = None
+        for _ in range(self.iterations):
+            start_time = time.perf_counter()
+            try:
+                response = execute()
+                latencies.append((time.perf_counter() - start_time) * 1000)
+            except Exception as e:
+                result["errors"] += 1
+                result["last_error"] = str(e)[:200]
+            
+            for name, entry in breaker_snapshot(self.client).items():
+                peak[name] = max(peak.get(name, 0), entry["estimated_bytes"])
+        
+        after = breaker_snapshot(self.client)
+        result["breaker_trips"] = breaker_trips(before, after)
+        result["breaker_peak_bytes"] = peak
+        if latencies:
+            result.update(latency_summary(latencies))
+            rows = response_rows(language, response)
+            result["rows"] = len(rows)
+            result["_rows"] = rows
+        return result
+
+    def in_memory_operators(self, language, query):
+        """PPL / SQL 실행 계획의 메모리 처리 연산자 (v2 엔진이 아니거나 DSL 이면 빈 목록)"""
+        if language == "dsl":
+            return []
+        try:
+            plan = analyze_plan(self.sql_client.explain(query, language))
+        except Exception:
+            return []
+        return plan["in_memory_operators"] if plan["engine"] == "v2" else []
+
+    def run(self, workloads, languages=LANGUAGES, size_limit=DEFAULT_SIZE_LIMIT):
+        """분석 목록 실행 → [{"dataset", "name", "mismatch", "ppl": {...}, "sql": {...}, "dsl": {...}}]
+        
+        메모리 처리 연산자가 있고 인덱스 문서 수가 size_limit 보다 많으면 그 언어 결과에 truncated 표시,
+        잘리지 않은 첫 번째 성공 언어와 결과가 다른 언어는 mismatch 목록에 기록합니다.
+        """
+        results = []
+        for dataset, index_name, analyses in workloads:
+            doc_count = self.client.count(index=index_name)["count"]
+            print(f"\n📋 {dataset} ({index_name}, {doc_count:,}건, size_limit {size_limit:,})")
+            for analysis in analyses:
+                result = {"dataset": dataset, "index": index_name, "name": analysis["name"], "mismatch": []}
+                signatures = {}
+                for language in languages:
+                    measured = self.measure(language, index_name, analysis[language])
+                    operators = self.in_memory_operators(language, analysis[language])
+                    measured["in_memory_operators"] = operators
+                    measured["truncated"] = bool(operators) and doc_count > size_limit
+                    result[language] = measured
+                    if "_rows" in measured:
+                        signatures[language] = result_signature(measured.pop("_rows"), analysis.get("compare", "all"))
+                
+                # 잘리지 않은 첫 번째 언어의 결과를 기준으로 비교
+                complete = [language for language in signatures if not result[language]["truncated"]]
+                reference = signatures[complete[0]] if complete else None
+                result["mismatch"] = [
+                    language for language, signature in signatures.items()
+                    if reference is not None and signature != reference
+                ]
+                
+                for language in languages:
+                    measured = result[language]
+                    trips = sum(measured["breaker_trips"].values())
+                    flag = f" ⚠️ 브레이커 차단 {trips}회" if trips else ""
+                    if measured["truncated"]:
+                        flag += (f" ⚠️ 메모리 처리({', '.join(measured['in_memory_operators'])})"
+                                 f" - {size_limit:,}건만 스캔")
+                    if language in result["mismatch"]:
+                        flag += " ⚠️ 결과 불일치"
+                    if "p50_ms" in measured:
+                        print(f"   ✅ {analysis['name']} [{language.upper()}]: p50 {measured['p50_ms']:.1f}ms / "
+                              f"p95 {measured['p95_ms']:.1f}ms, {measured['rows']}행{flag}")
+                    else:
+                        print(f"   ❌ {analysis['name']} [{language.upper()}]: 전부 실패 "
+                              f"({measured.get('last_error', '')[:100]}){flag}")
+                results.append(result)
+        return results
+
+
+def print_ppl_benchmark_summary(results, languages=LANGUAGES):
+    """분석별 언어 간 p50 비교표와 브레이커 차단 목록 출력"""
+    print("\n" + "=" * 80)
+    print("📊 PPL vs SQL vs DSL 분석 비용 비교 (p50 ms)")
+    print("=" * 80)
+    header = "".join(f"{language.upper():>10}" for language in languages)
+    print(f"   {'분석':<24}{header}  가장 빠름")
+    
+    for result in results:
+        cells, timings = [], {}
+        for language in languages:
+            measured = result[language]
+            if "p50_ms" in measured:
+                mark = "*" if measured.get("truncated") else ("!" if language in result["mismatch"] else " ")
+                # 잘리거나 결과가 다른 언어는 같은 일을 한 것이 아니므로 속도 비교에서 제외
+                if mark == " ":
+                    timings[language] = measured["p50_ms"]
+                cells.append(f"{measured['p50_ms']:>9.1f}{mark}")
+            else:
+                cells.append(f"{'실패':>10}")
+        fastest = min(timings, key=timings.get).upper() if len(timings) > 1 else "-"
+        print(f"   {result['name']:<24}{''.join(cells)}  {fastest}")
+    print("   (* size_limit 으로 잘린 메모리 처리, ! 결과 불일치 - 속도 비교 제외)")
+    
+    tripped = [
+        (result["name"], language, result[language]["breaker_trips"])
+        for result in results for language in languages if result[language]["breaker_trips"]
+    ]
+    if tripped:
+        print(f"\n⚠️ 서킷 브레이커 차단 ({len(tripped)}건):")
+        for name, language, trips in tripped:
+            print(f"   • {name} [{language.upper()}]: {', '.join(f'{breaker} {count}회' for breaker, count in trips.items())}")
+    else:
+        print("\n✅ 서킷 브레이커 차단 없음")
+
+
+def parse_args(argv):
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="PPL 파이프라인 부하 벤치마크 (PPL vs SQL vs DSL)")
+    parser.add_argument("--index", default=SCALED_EMPLOYEES_INDEX, help="직원 데이터 인덱스")
+    parser.add_argument("--transactions-index", help="실시간 거래 인덱스 (지정 시 거래 분석 추가)")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--languages", nargs="+", choices=LANGUAGES, default=LANGUAGES)
+    parser.add_argument("--setup-rows", type=int, help="N 명 대용량 직원 데이터 생성 후 실행")
+    parser.add_argument("--departments", type=int, default=12)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--size-limit", type=int,
+                        help=f"실행 동안 {SIZE_LIMIT_SETTING} 값 (기본: 가장 큰 인덱스 문서 수, 0 이면 변경 안 함)")
+    parser.add_argument("--report-path", default="ppl_benchmark_report.json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """메인 실행 함수"""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    index_name = args.index
+    
+    print("⏱️ OpenSearch PPL 파이프라인 부하 벤치마크")
+    print("=" * 60)
+    try:
+        if args.setup_rows:
+            index_name = SQLPluginTester().create_scaled_test_data(args.setup_rows, args.departments, args.skew)
+        
+        workloads = [("직원", index_name, employee_workloads(index_name))]
+        if args.transactions_index:
+            workloads.append(("실시간 거래", args.transactions_index, transaction_workloads(args.transactions_index)))
+        
+        benchmark = PPLWorkloadBenchmark(iterations=args.iterations, warmup=args.warmup)
+        size_limit, previous = current_size_limit(benchmark.client)
+        target = args.size_limit
+        if target is None:
+            target = max(benchmark.client.count(index=index)["count"] for _, index, _ in workloads)
+        changed = bool(target) and target != size_limit
+        if changed:
+            set_size_limit(benchmark.client, target)
+            print(f"   {SIZE_LIMIT_SETTING}: {size_limit:,} → {target:,} (실행 후 복원)")
+            size_limit = target
+        
+        print(f"   반복 {args.iterations}회 (워밍업 {args.warmup}회), 언어: {args.languages}")
+        try:
+            results = benchmark.run(workloads, args.languages, size_limit)
+        finally:
+            if changed:
+                set_size_limit(benchmark.client, previous)
+    except Exception as e:
+        print(f"❌ 벤치마크 실패: {e}")
+        return 1
+    
+    print_ppl_benchmark_summary(results, args.languages)
+    
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "iterations": args.iterations,
+        "warmup": args.warmup,
+        "size_limit": size_limit,
+        "results": results
+    }
+    with open(args.report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 리포트 저장: {args.report_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+로컬 스트리밍 RCF (Random Cut Forest) 이상 점수기
+===============================================
+
+Anomaly Detection 플러그인과 같은 방식(shingle, 트리별 시간 감쇠 표본, 트리 수)으로
+시계열을 로컬에서 한 점씩 점수화합니다. 클러스터 왕복 없이 탐지기 설정을 실험하거나
+플러그인이 매긴 anomaly_grade 를 교차 검증할 때 사용합니다.
+
+- 트리: 표본 점을 삽입 / 삭제할 수 있는 동적 random cut tree (경계 상자 유지)
+- 표본: 트리마다 시간 감쇠 가중치 reservoir (sample_size 개 유지, 오래된 점일수록 교체)
+- 점수: 점을 삽입하기 전에 트리별 이상 점수(분리 확률 가중 깊이)를 구해 평균
+- 등급: 점수의 평균 + z_factor × 표준편차를 임계값으로 0~1 등급 변환
+- 기본값은 플러그인과 동일: shingle 8, 표본 256, 트리 30
+
+사용 예:
+    forest = RandomCutForest(shingle_size=4)
+    for features in rows:
+        result = forest.update(features)   # {"score", "grade", "ready", "threshold"}
+
+    python rcf.py --detector-name realtime_transaction_anomaly_detector --days 3 --compare
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import sys
+import json
+import math
+import heapq
+import argparse
+import datetime
+from collections import deque
+import numpy as np
+from opensearch_client import get_client
+from anomaly_historical import (
+    AD_BASE, HistoricalAnalysisRunner, find_detector_id, to_epoch_millis, format_millis
+)
+
+# Anomaly Detection 플러그인 기본값
+DEFAULT_SHINGLE_SIZE = 8
+DEFAULT_SAMPLE_SIZE = 256
+DEFAULT_NUM_TREES = 30
+DEFAULT_Z_FACTOR = 3.0
+SCORE_FLOOR = 1.0  # 이 점수 이하는 등급을 매기지 않음 (정상 점의 점수는 대략 1 안팎)
+INTERVAL_UNITS = {"Minutes": "m", "Hours": "h", "Days": "d"}
+SERIES_PAGE_SIZE = 1000
+
+
+class _Node:
+    __slots__ = ("parent", "left", "right", "dim", "cut", "low", "high", "mass", "point")
+
+    def __init__(self, low, high, mass, point=None, dim=None, cut=None):
+        """트리 노드 (point 가 있으면 리프, 없으면 dim / cut 으로 나뉜 내부 노드)"""
+        self.parent = None
+        self.left = None
+        self.right = None
+        self.dim = dim
+        self.cut = cut
+        self.low = low
+        self.high = high
+        self.mass = mass
+        self.point = point
+
+
+class RandomCutTree:
+    def __init__(self, rng):
+        """빈 트리 (rng: 절단 위치 샘플링용 numpy Generator)"""
+        self.rng = rng
+        self.root = None
+
+    @property
+    def mass(self):
+        """트리에 들어 있는 점 수 (중복 포함)"""
+        return self.root.mass if self.root is not None else 0
+
+    def insert(self, point):
+        """점 삽입 → 점이 들어간 리프 (같은 점이 이미 있으면 그 리프의 mass 증가)
+        
+        내려가면서 각 노드의 경계 상자에 점을 합쳐 절단을 새로 뽑고, 절단이 점과 기존 상자를
+        가르면 그 자리에 새 내부 노드를 만듭니다. 가르지 못하면 기존 절단을 따라 내려갑니다.
+        """
+        if self.root is None:
+            self.root = _Node(point, point, 1, point=point)
+            return self.root
+        
+        node = self.root
+        while True:
+            low = np.minimum(node.low, point)
+            high = np.maximum(node.high, point)
+            ranges = high - low
+            total = ranges.sum()
+            if total == 0:  # 같은 점의 리프
+                node.mass += 1
+                return node
+            
+            cumulative = np.cumsum(ranges)
+            r = self.rng.random() * total
+            dim = min(int(np.searchsorted(cumulative, r, side="right")), len(ranges) - 1)
+            cut = low[dim] + r - (cumulative[dim] - ranges[dim])
+            
+            if cut < node.low[dim] or cut >= node.high[dim]:
+                leaf = _Node(point, point, 1, point=point)
+                parent = _Node(low, high, node.mass + 1, dim=dim, cut=cut)
+                parent.left, parent.right = (leaf, node) if cut < node.low[dim] else (node, leaf)
+                self._replace(node, parent)
+                node.parent = leaf.parent = parent
+                return leaf
+            
+            node.low, node.high = low, high
+            node.mass += 1
+            node = node.left if point[node.dim] <= node.cut else node.right
+
+    def delete(self, leaf):
+        """리프 하나 제거 (중복 점이면 mass 만 감소) 후 조상의 경계 상자 / mass 갱신"""
+        if leaf.mass > 1:
+            node = leaf
+            while node is not None:
+                node.mass -= 1
+                node = node.parent
+            return
+        
+        parent = leaf.parent
+        if parent is None:
+            self.root = None
+            return
+        sibling = parent.left if parent.right is leaf else parent.right
+        self._replace(parent, sibling)
+        
+        node = sibling.parent
+        while node is not None:
+            node.mass -= 1
+            node.low = np.minimum(node.left.low, node.right.low)
+            node.high = np.maximum(node.left.high, node.right.high)
+            node = node.parent
+
+    def _replace(self, old, new):
+        """old 자리에 new 연결 (부모 포인터 포함)"""
+        parent = old.parent
+        new.parent = parent
+        if parent is None:
+            self.root = new
+        elif parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+
+    def score(self, point):
+        """점을 삽입하지 않고 이상 점수 계산 (RCF 라이브러리의 기본 점수)
+        
+        리프 깊이로 시작해 루트까지 올라가며, 각 노드에서 점이 경계 상자 밖으로 잘려 나갈
+        확률만큼 "그 깊이에서 분리됨" 점수를 섞습니다. 마지막에 log2(mass + 1) 로 정규화합니다.
+        """
+        if self.root is None:
+            return 0.0
+        
+        path = [self.root]
+        while path[-1].point is None:
+            node = path[-1]
+            path.append(node.left if point[node.dim] <= node.cut else node.right)
+        
+        leaf = path.pop()
+        depth = len(path)
+        if np.array_equal(leaf.point, point):
+            damp = 1.0 - leaf.mass / (2.0 * self.root.mass)
+            score = damp / (depth + math.log2(leaf.mass + 1))
+        else:
+            score = 1.0 / (depth + 1)
+        
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            box_range = (node.high - node.low).sum()
+            merged_range = (np.maximum(node.high, point) - np.minimum(node.low, point)).sum()
+            if merged_range > box_range:
+                probability = (merged_range - box_range) / merged_range
+                score = (1.0 - probability) * score + probability / (depth + 1)
+        
+        return score * math.log2(self.root.mass + 1)
+
+
+class RandomCutForest:
+    def __init__(self, shingle_size=DEFAULT_SHINGLE_SIZE, sample_size=DEFAULT_SAMPLE_SIZE,
+                 num_trees=DEFAULT_NUM_TREES, time_decay=None, output_after=None,
+                 z_factor=DEFAULT_Z_FACTOR, score_floor=SCORE_FLOOR, normalize=True, seed=42):
+        """스트리밍 RCF 초기화
+        
+        time_decay: 표본 시간 감쇠 (기본 1 / (10 × sample_size))
+        output_after: 이만큼 점이 쌓인 뒤부터 등급 산출 (기본 sample_size / 4)
+        score_floor: 등급 임계값 하한 (표본이 작은 forest 는 정상 점수도 낮으므로 낮춰서 사용)
+        normalize: 특성별 누적 평균 / 표준편차로 표준화 후 shingle 구성 (단위가 다른 특성 혼합용)
+        """
+        self.shingle_size = shingle_size
+        self.sample_size = sample_size
+        self.num_trees = num_trees
+        self.time_decay = time_decay if time_decay is not None else 1.0 / (10 * sample_size)
+        self.output_after = output_after if output_after is not None else sample_size // 4
+        self.z_factor = z_factor
+        self.score_floor = score_floor
+        self.normalize = normalize
+        
+        seeds = np.random.SeedSequence(seed).spawn(num_trees + 1)
+        self.rng = np.random.default_rng(seeds[0])
+        self.trees = [RandomCutTree(np.random.default_rng(tree_seed)) for tree_seed in seeds[1:]]
+        self.samples = [[] for _ in range(num_trees)]  # 트리별 (-가중치, 순번, 리프) 최대 힙
+        self.shingle = deque(maxlen=shingle_size)
+        self.updates = 0
+        
+        self.feature_count = 0
+        self.feature_mean = None
+        self.feature_m2 = None
+        self.score_count = 0
+        self.score_mean = 0.0
+        self.score_m2 = 0.0
+
+    def _transform(self, features):
+        """특성 벡터 표준화 (현재 점을 반영하기 전 통계 사용) 후 통계 갱신"""
+        values = np.asarray(features, dtype=float).ravel()
+        if not np.all(np.isfinite(values)):
+            raise ValueError(f"유한하지 않은 특성 값: {features}")
+        if not self.normalize:
+            return values
+        
+        if self.feature_mean is None:
+            self.feature_mean = np.zeros_like(values)
+            self.feature_m2 = np.zeros_like(values)
+        elif len(values) != len(self.feature_mean):
+            raise ValueError(f"특성 개수 불일치: {len(self.feature_mean)}개 → {len(values)}개")
+        
+        if self.feature_count > 1:
+            std = np.sqrt(self.feature_m2 / (self.feature_count - 1))
+            transformed = (values - self.feature_mean) / np.where(std > 0, std, 1.0)
+        else:
+            transformed = values - self.feature_mean if self.feature_count else np.zeros_like(values)
+        
+        self.feature_count += 1
+        delta = values - self.feature_mean
+        self.feature_mean = self.feature_mean + delta / self.feature_count
+        self.feature_m2 = self.feature_m2 + delta * (values - self.feature_mean)
+        return transformed
+
+    def _forest_score(self, point):
+        """트리별 점수 평균"""
+        return float(np.mean([tree.score(point) for tree in self.trees]))
+
+    def _score_bound(self):
+        """정상 점수 통계 기준 경계 (평균 + z_factor × 표준편차, 통계가 부족하면 무한대)"""
+        if self.score_count < 2:
+            return math.inf
+        std = math.sqrt(self.score_m2 / (self.score_count - 1))
+        return self.score_mean + self.z_factor * std
+
+    def threshold(self):
+        """현재 등급 임계값 (통계 경계와 score_floor 중 큰 값)"""
+        bound = self._score_bound()
+        return max(self.score_floor, bound) if math.isfinite(bound) else self.score_floor
+
+    def _grade(self, score):
+        """점수 → 0~1 등급 (임계값 이하면 0, 등급 산출 시작 후 첫 두 점수는 통계만 쌓음)
+        
+        통계 경계를 넘은 점수는 통계에 넣지 않아 이상 구간이 임계값을 끌어올리지 않게 하고,
+        score_floor 는 등급에만 적용해 하한이 낮아도 통계가 계속 쌓이게 합니다.
+        """
+        bound = self._score_bound()
+        threshold = self.threshold()
+        if score <= bound:
+            self.score_count += 1
+            delta = score - self.score_mean
+            self.score_mean += delta / self.score_count
+            self.score_m2 += delta * (score - self.score_mean)
+        
+        if not math.isfinite(bound):  # 정상 점수가 2개 쌓이기 전에는 등급 보류
+            return 0.0, threshold
+        grade = 1.0 - threshold / score if score > threshold else 0.0
+        return grade, threshold
+
+    def _sample(self, point):
+        """트리별 시간 감쇠 reservoir 에 점 반영 (가중치가 가장 큰 표본보다 작으면 교체)"""
+        for tree, heap, u in zip(self.trees, self.samples, self.rng.random(self.num_trees)):
+            weight = -self.time_decay * self.updates + math.log(-math.log(max(u, 1e-300)))
+            if len(heap) < self.sample_size:
+                heapq.heappush(heap, (-weight, self.updates, tree.insert(point)))
+            elif weight < -heap[0][0]:
+                _, _, evicted = heapq.heapreplace(heap, (-weight, self.updates, tree.insert(point)))
+                tree.delete(evicted)
+
+    def score(self, features):
+        """점을 반영하지 않고 현재 forest 로 점수만 계산 (shingle 이 덜 찼으면 None)"""
+        if len(self.shingle) < self.shingle_size - 1 or self.updates == 0:
+            return None
+        values = np.asarray(features, dtype=float).ravel()
+        if self.normalize and self.feature_count > 1:
+            std = np.sqrt(self.feature_m2 / (self.feature_count - 1))
+            values = (values - self.feature_mean) / np.where(std > 0, std, 1.0)
+        recent = list(self.shingle)[len(self.shingle) - (self.shingle_size - 1):] if self.shingle_size > 1 else []
+        return self._forest_score(np.concatenate(recent + [values]))
+
+    def update(self, features):
+        """점 하나 처리: 점수 계산 → 등급 → 표본 반영
+        
+        반환값: {"score", "grade", "threshold", "ready"} (ready: shingle 이 차고 output_after 를 넘었는지)
+        """
+        self.shingle.append(self._transform(features))
+        if len(self.shingle) < self.shingle_size:
+            return {"score": 0.0, "grade": 0.0, "threshold": None, "ready": False}
+        
+        point = np.concatenate(self.shingle)
+        score = self._forest_score(point) if self.updates else 0.0
+        ready = self.updates >= self.output_after
+        grade, threshold = self._grade(score) if ready else (0.0, None)
+        
+        self._sample(point)
+        self.updates += 1
+        return {"score": score, "grade": grade, "threshold": threshold, "ready": ready}
+
+    def process(self, rows):
+        """특성 벡터 목록을 순서대로 처리 → update 결과 목록"""
+        return [self.update(features) for features in rows]
+
+    def info(self):
+        """forest 상태 요약"""
+        return {
+            "shingle_size": self.shingle_size,
+            "sample_size": self.sample_size,
+            "num_trees": self.num_trees,
+            "updates": self.updates,
+            "tree_mass": [tree.mass for tree in self.trees],
+            "score_mean": self.score_mean,
+            "threshold": self.threshold()
+        }
+
+
+def enabled_features(detector):
+    """탐지기 설정의 활성 특성 → [(특성 이름, 집계 이름, 집계 본문)]"""
+    features = []
+    for feature in detector.get("feature_attributes", []):
+        if not feature.get("feature_enabled", True):
+            continue
+        (agg_name, agg_body), = feature["aggregation_query"].items()
+        features.append((feature.get("feature_name", feature.get("feature_id")), agg_name, agg_body))
+    return features
+
+
+def forest_for_detector(detector, **overrides):
+    """탐지기 설정(shingle_size)으로 RandomCutForest 생성 (표본 / 트리 수는 플러그인 기본값)"""
+    params = {"shingle_size": detector.get("shingle_size", DEFAULT_SHINGLE_SIZE)}
+    params.update({key: value for key, value in overrides.items() if value is not None})
+    return RandomCutForest(**params)
+
+
+def get_detector(client, detector_id):
+    """탐지기 설정 조회"""
+    response = client.transport.perform_request("GET", f"{AD_BASE}/{detector_id}")
+    return response["anomaly_detector"]
+
+
+def iter_feature_series(client, detector, start_time, end_time, page_size=SERIES_PAGE_SIZE):
+    """탐지기와 같은 간격 / 특성 집계로 시계열 구간을 composite 페이지 단위 스트리밍
+    
+    반환: {"time": 구간 시작 epoch ms, "features": [특성 값]} (값이 없는 특성이 있는 구간은 건너뜀)
+    """
+    period = detector["detection_interval"]["period"]
+    interval = f"{period['interval']}{INTERVAL_UNITS[period['unit']]}"
+    time_field = detector["time_field"]
+    features = enabled_features(detector)
+    
+    filters = [{"range": {time_field: {"gte": to_epoch_millis(start_time), "lt": to_epoch_millis(end_time),
+                                       "format": "epoch_millis"}}}]
+    if detector.get("filter_query"):
+        filters.append(detector["filter_query"])
+    
+    composite = {"size": page_size, "sources": [{"time": {"date_histogram": {"field": time_field, "fixed_interval": interval}}}]}
+    while True:
+        response = client.search(index=",".join(detector["indices"]), body={
+            "size": 0,
+            "query": {"bool": {"filter": filters}},
+            "aggs": {"series": {"composite": composite, "aggs": {agg_name: body for _, agg_name, body in features}}}
+        })
+        series = response["aggregations"]["series"]
+        for bucket in series["buckets"]:
+            values = [bucket[agg_name].get("value") for _, agg_name, _ in features]
+            if all(value is not None for value in values):
+                yield {"time": bucket["key"]["time"], "features": values}
+        
+        if "after_key" not in series or len(series["buckets"]) < page_size:
+            return
+        composite["after"] = series["after_key"]
+
+
+def compare_grades(local_results, plugin_records):
+    """로컬 등급과 플러그인 등급을 구간 시작 시각으로 맞춰 비교
+    
+    local_results: [{"time", "grade", ...}], plugin_records: anomaly_historical 결과 레코드 ({"start", "grade"})
+    반환값: {"matched", "both", "local_only", "plugin_only", "agreement", "grade_correlation"}
+    """
+    plugin_grades = {}
+    for record in plugin_records:
+        if record["entity"] is None:
+            plugin_grades[record["start"]] = max(plugin_grades.get(record["start"], 0.0), record["grade"])
+    
+    pairs = [(result["grade"], plugin_grades[result["time"]]) for result in local_results
+             if result.get("ready") and result["time"] in plugin_grades]
+    comparison = {
+        "matched": len(pairs),
+        "both": sum(1 for local, plugin in pairs if local > 0 and plugin > 0),
+        "local_only": sum(1 for local, plugin in pairs if local > 0 and plugin == 0),
+        "plugin_only": sum(1 for local, plugin in pairs if local == 0 and plugin > 0),
+        "agreement": None,
+        "grade_correlation": None
+    }
+    if pairs:
+        comparison["agreement"] = sum(1 for local, plugin in pairs if (local > 0) == (plugin > 0)) / len(pairs)
+        local, plugin = np.array(pairs).T
+        if local.std() > 0 and plugin.std() > 0:
+            comparison["grade_correlation"] = float(np.corrcoef(local, plugin)[0, 1])
+    return comparison
+
+
+def print_rcf_summary(results, forest, comparison=None, top=10):
+    """로컬 RCF 점수화 결과 요약 출력"""
+    ready = [result for result in results if result["ready"]]
+    anomalies = sorted((result for result in ready if result["grade"] > 0), key=lambda item: item["grade"], reverse=True)
+    info = forest.info()
+    
+    print("\n📋 로컬 RCF 점수화 결과")
+    print(f"   구간 {len(results):,}개 (등급 산출 {len(ready):,}개), 이상 {len(anomalies):,}개")
+    print(f"   shingle {info['shingle_size']}, 표본 {info['sample_size']}, 트리 {info['num_trees']}, "
+          f"임계 점수 {info['threshold']:.3f}")
+    for result in anomalies[:top]:
+        print(f"      - {format_millis(result['time'])}: 등급 {result['grade']:.3f} (점수 {result['score']:.3f})")
+    
+    if comparison is not None:
+        print(f"\n   🔁 플러그인 등급 비교: {comparison['matched']:,}개 구간 일치")
+        if comparison["matched"]:
+            print(f"      양쪽 이상 {comparison['both']}, 로컬만 {comparison['local_only']}, "
+                  f"플러그인만 {comparison['plugin_only']}, 판정 일치율 {comparison['agreement']:.1%}")
+            if comparison["grade_correlation"] is not None:
+                print(f"      등급 상관계수 {comparison['grade_correlation']:.3f}")
+
+
+def parse_args(argv):
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="탐지기 시계열 로컬 RCF 점수화 / 플러그인 등급 교차 검증")
+    parser.add_argument("--detector-id", help="탐지기 ID")
+    parser.add_argument("--detector-name", help="탐지기 이름")
+    parser.add_argument("--start", help="구간 시작 (YYYY-MM-DD[THH:MM:SS], 기본: --days 전)")
+    parser.add_argument("--end", help="구간 끝 (기본: 현재)")
+    parser.add_argument("--days", type=int, default=3)
+    parser.add_argument("--shingle-size", type=int, help="기본: 탐지기 설정")
+    parser.add_argument("--sample-size", type=int, default=DEFAULT_SAMPLE_SIZE)
+    parser.add_argument("--num-trees", type=int, default=DEFAULT_NUM_TREES)
+    parser.add_argument("--output-after", type=int)
+    parser.add_argument("--z-factor", type=float, default=DEFAULT_Z_FACTOR)
+    parser.add_argument("--compare", action="store_true", help="결과 인덱스의 플러그인 등급과 비교")
+    parser.add_argument("--output", help="구간별 점수를 JSONL 로 기록할 경로")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """탐지기 시계열을 로컬 RCF 로 점수화"""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    client = get_client()
+    
+    detector_id = args.detector_id
+    if detector_id is None and args.detector_name:
+        detector_id = find_detector_id(client, args.detector_name)
+    if detector_id is None:
+        print("❌ --detector-id 또는 --detector-name 으로 탐지기를 지정하세요")
+        return 1
+    
+    end_time = args.end or datetime.datetime.now(datetime.timezone.utc)
+    start_time = args.start or datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=args.days)
+    
+    try:
+        detector = get_detector(client, detector_id)
+        forest = forest_for_detector(
+            detector, shingle_size=args.shingle_size, sample_size=args.sample_size, num_trees=args.num_trees,
+            output_after=args.output_after, z_factor=args.z_factor
+        )
+        print(f"🌲 로컬 RCF: {detector['name']} ({format_millis(to_epoch_millis(start_time))} ~ "
+              f"{format_millis(to_epoch_millis(end_time))})")
+        
+        results = []
+        for point in iter_feature_series(client, detector, start_time, end_time):
+            result = forest.update(point["features"])
+            result["time"] = point["time"]
+            results.append(result)
+        
+        comparison = None
+        if args.compare:
+            records = HistoricalAnalysisRunner(client).iter_results(detector_id)
+            comparison = compare_grades(results, list(records))
+    except Exception as e:
+        print(f"❌ 로컬 RCF 점수화 실패: {e}")
+        return 1
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.writelines(json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+    
+    print_rcf_summary(results, forest, comparison)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
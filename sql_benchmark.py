@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+OpenSearch SQL / PPL 쿼리 지연 벤치마크
+======================================
+
+plugin_test_sql 의 기본 / 집계 / 고급 / 분석 / PPL 쿼리를 워밍업 후 N 회씩 실행하여
+p50 / p95 / p99 지연 시간을 기록하고, _explain 실행 계획을 함께 수집합니다.
+
+실행 계획에서 인덱스 스캔(OpenSearch 로 푸시다운된 요청)과 최종 투영(ProjectOperator) 외의
+연산자(SortOperator, AggregationOperator, FilterOperator 등)가 보이면 코디네이터 노드 메모리에서
+처리되는 쿼리로, 새 엔진이 지원하지 않아 레거시 엔진으로 넘어간 쿼리(서브쿼리 등)는 legacy 로 표시합니다.
+--translation-cache 를 주면 SQL 쿼리를 변환 캐시(sql_cache)로도 실행하여 지연을 함께 비교합니다.
+
+사용 예:
+    python sql_benchmark.py --iterations 50 --warmup 5
+    python sql_benchmark.py --index sql-test-employees --suites 고급 PPL --setup
+    python sql_benchmark.py --suites 기본 --translation-cache
+    python sql_benchmark.py --setup-rows 1000000 --departments 12 --skew 1.2 --hire-start 2005-01-01
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import sys
+import json
+import time
+import argparse
+import datetime
+import numpy as np
+from sql_client import SQLStreamClient, analyze_plan
+from sql_cache import SQLTranslationCache
+from plugin_test_sql import (
+    SQLPluginTester, SCALED_EMPLOYEES_INDEX, basic_sql_queries, aggregation_sql_queries,
+    advanced_sql_queries, business_sql_queries, ppl_queries
+)
+
+DEFAULT_INDEX = "sql-test-employees"
+DEFAULT_ITERATIONS = 30
+DEFAULT_WARMUP = 5
+
+
+def query_suites(index_name):
+    """벤치마크 대상 쿼리 묶음 {묶음 이름: [(쿼리 정의, 언어)]}"""
+    return {
+        "기본": [(query, "sql") for query in basic_sql_queries(index_name)],
+        "집계": [(query, "sql") for query in aggregation_sql_queries(index_name)],
+        "고급": [(query, "sql") for query in advanced_sql_queries(index_name)],
+        "분석": [(query, "sql") for query in business_sql_queries(index_name)],
+        "PPL": [(query, "ppl") for query in ppl_queries(index_name)]
+    }
+
+
+def latency_summary(latencies_ms):
+    """지연 시간 백분위 요약"""
+    values = np.asarray(latencies_ms)
+    return {
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max())
+    }
+
+
+def measure_latencies(execute, query, iterations, warmup):
+    """워밍업 후 반복 실행 지연(ms) 목록과 마지막 응답"""
+    for _ in range(warmup):
+        execute(query)
+    
+    latencies = []
+    for _ in range(iterations):
+        start_time = time.perf_counter()
+        response = execute(query)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return latencies, response
+
+
+def benchmark_query(client, query, language="sql", iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP, cache=None):
+    """단일 쿼리 실행 계획 수집 + 워밍업 후 반복 실행 지연 측정
+    
+    cache(SQLTranslationCache) 를 주면 SQL 쿼리를 캐시 경유로도 측정하여 result["cache"] 에 기록합니다.
+    """
+    result = {"language": language}
+    try:
+        result["plan"] = analyze_plan(client.explain(query, language))
+    except Exception as e:
+        result["plan"] = {"engine": "unknown", "operators": [], "in_memory_operators": [], "fallback": None}
+        result["explain_error"] = str(e)
+    
+    try:
+        latencies, response = measure_latencies(lambda q: client.execute(q, language), query, iterations, warmup)
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+    
+    result.update(latency_summary(latencies))
+    result["rows"] = len(response.get("datarows", []))
+    
+    if cache is not None and language == "sql":
+        try:
+            latencies, response = measure_latencies(cache.execute, query, iterations, warmup)
+            result["cache"] = dict(latency_summary(latencies), status=response["cache"],
+                                   reason=response.get("cache_reason"))
+        except Exception as e:
+            result["cache"] = {"status": "error", "reason": str(e)}
+    return result
+
+
+def run_sql_benchmark(index_name=DEFAULT_INDEX, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP,
+                      suites=None, client=None, cache=None):
+    """쿼리 묶음별 지연 / 실행 계획 벤치마크 리포트 반환 (cache: 변환 캐시 비교용)"""
+    client = client or SQLStreamClient()
+    all_suites = query_suites(index_name)
+    suites = suites or list(all_suites)
+    
+    print("⏱️ OpenSearch SQL / PPL 쿼리 지연 벤치마크")
+    print("=" * 60)
+    print(f"   인덱스: {index_name}, 반복 {iterations}회 (워밍업 {warmup}회), 묶음: {suites}")
+    
+    results = []
+    for suite in suites:
+        print(f"\n📋 {suite}")
+        for query, language in all_suites[suite]:
+            result = benchmark_query(client, query["query"], language, iterations, warmup, cache)
+            result.update(suite=suite, name=query["name"], query=" ".join(query["query"].split()))
+            results.append(result)
+            
+            if "error" in result:
+                print(f"   ❌ {query['name']}: {result['error'][:100]}")
+                continue
+            plan = result["plan"]
+            flag = ""
+            if plan["engine"] == "legacy":
+                flag = " ⚠️ 레거시 엔진"
+            elif plan["fallback"]:
+                flag = f" ⚠️ 메모리 처리: {', '.join(plan['in_memory_operators'])}"
+            print(f"   ✅ {query['name']}: p50 {result['p50_ms']:.1f}ms / p95 {result['p95_ms']:.1f}ms / "
+                  f"p99 {result['p99_ms']:.1f}ms{flag}")
+            if "cache" in result:
+                cached = result["cache"]
+                if cached["status"] == "hit":
+                    print(f"      🗄️ 변환 캐시: p50 {cached['p50_ms']:.1f}ms / p95 {cached['p95_ms']:.1f}ms")
+                else:
+                    print(f"      🗄️ 변환 캐시 미적용: {cached['reason']}")
+    
+    print_sql_benchmark_summary(results)
+    
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "index": index_name,
+        "iterations": iterations,
+        "warmup": warmup,
+        "results": results
+    }
+    if cache is not None:
+        report["cache"] = cache.info()
+    return report
+
+
+def print_sql_benchmark_summary(results):
+    """쿼리별 지연 표 및 부하 시 주의가 필요한 쿼리 목록 출력"""
+    print("\n" + "=" * 70)
+    print("📊 SQL / PPL 쿼리 지연 벤치마크 결과")
+    print("=" * 70)
+    print(f"   {'묶음':<4} {'쿼리':<20} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9}  실행 계획")
+    for result in results:
+        if "error" in result:
+            print(f"   {result['suite']:<4} {result['name']:<20} {'오류':>9}")
+            continue
+        plan = result["plan"]
+        plan_label = "legacy" if plan["engine"] == "legacy" else ("메모리 처리" if plan["fallback"] else "푸시다운")
+        if plan["engine"] == "unknown":
+            plan_label = "explain 실패"
+        print(f"   {result['suite']:<4} {result['name']:<20} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+              f"{result['p99_ms']:>9.1f}  {plan_label}")
+    
+    flagged = [result for result in results if result.get("plan", {}).get("fallback")]
+    if flagged:
+        print(f"\n⚠️ 부하 시 주의 쿼리 ({len(flagged)}개) - 코디네이터 메모리 처리 또는 레거시 엔진:")
+        for result in flagged:
+            operators = ", ".join(result["plan"]["in_memory_operators"]) or "레거시 엔진 실행"
+            print(f"   • [{result['suite']}] {result['name']}: {operators}")
+    
+    cached = [result for result in results if result.get("cache", {}).get("status") == "hit"]
+    if cached:
+        print(f"\n🗄️ 변환 캐시 적용 쿼리 ({len(cached)}개) - p50 SQL 플러그인 → 캐시:")
+        for result in cached:
+            print(f"   • [{result['suite']}] {result['name']}: {result['p50_ms']:.1f}ms → "
+                  f"{result['cache']['p50_ms']:.1f}ms ({result['p50_ms'] / result['cache']['p50_ms']:.1f}배)")
+
+
+def parse_args(argv):
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="OpenSearch SQL / PPL 쿼리 지연 벤치마크")
+    parser.add_argument("--index", default=DEFAULT_INDEX)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--suites", nargs="+", choices=list(query_suites(DEFAULT_INDEX)))
+    parser.add_argument("--setup", action="store_true", help="sql-test-employees 테스트 데이터 재생성")
+    parser.add_argument("--setup-rows", type=int, help=f"N 명 대용량 직원 데이터를 {SCALED_EMPLOYEES_INDEX} 에 생성")
+    parser.add_argument("--departments", type=int, default=4, help="대용량 데이터 부서 수")
+    parser.add_argument("--skew", type=float, default=0.0, help="부서 인원 쏠림 (Zipf 지수, 0: 균등)")
+    parser.add_argument("--hire-start", default="2010-01-01", help="입사일 범위 시작")
+    parser.add_argument("--hire-end", help="입사일 범위 끝 (기본: 오늘)")
+    parser.add_argument("--translation-cache", action="store_true", help="SQL 쿼리를 변환 캐시로도 실행하여 비교")
+    parser.add_argument("--report-path", default="sql_benchmark_report.json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """메인 실행 함수"""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    index_name = args.index
+    
+    try:
+        if args.setup_rows:
+            index_name = SQLPluginTester().create_scaled_test_data(
+                args.setup_rows, args.departments, args.skew, args.hire_start, args.hire_end
+            )
+        elif args.setup:
+            index_name = SQLPluginTester().create_test_data()
+        client = SQLStreamClient()
+        cache = SQLTranslationCache(sql_client=client) if args.translation_cache else None
+        report = run_sql_benchmark(index_name, args.iterations, args.warmup, args.suites, client, cache)
+    except Exception as e:
+        print(f"❌ 벤치마크 실패: {e}")
+        return 1
+    
+    with open(args.report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 리포트 저장: {args.report_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+OpenSearch SQL → DSL 변환 캐시
+==============================
+
+대시보드처럼 같은 모양의 SQL 을 값만 바꿔 수천 번 반복하는 경우, 매번 SQL 플러그인이
+파싱 / 계획을 다시 하지 않도록 변환 결과(DSL)를 클라이언트에서 캐시합니다.
+
+1. 비교 연산자 / IN (...) / BETWEEN ... AND ... 의 리터럴을 ? 로 바꾼 정규화 SQL 을 캐시 키로 사용
+2. 캐시 미스 시 리터럴 자리에 식별용 값(sentinel)을 넣어 _explain 을 한 번 호출하고,
+   인덱스 스캔에 푸시다운된 DSL(sourceBuilder)과 SQL 응답 스키마를 저장
+3. 이후 같은 키는 DSL 의 sentinel 을 실제 값으로 바꿔 _search 로 바로 실행
+4. LRU 로 최대 항목 수를 유지하고, 인덱스 매핑이 바뀌면 해당 인덱스의 항목을 폐기
+
+필터 / 정렬 / LIMIT / 투영이 모두 푸시다운되는 쿼리만 캐시합니다. 메모리 처리 연산자나 집계가
+남는 계획, 레거시 엔진으로 넘어가는 쿼리는 기존대로 SQL 플러그인에서 실행합니다.
+캐시 적중 시 값은 _source 에 저장된 그대로 반환되므로 날짜 형식 등은 SQL 플러그인 출력과 다를 수 있습니다.
+
+사용 예:
+    python sql_cache.py "SELECT name, salary FROM sql-test-employees WHERE salary >= 5000" --repeat 200
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from opensearch_client import get_client
+from sql_client import SQLStreamClient, analyze_plan
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAPPING_CHECK_INTERVAL = 30.0
+
+# 파라미터 자리 표시 값 (explain 결과 DSL 에서 위치를 찾기 위한 값, 정수는 int32 범위)
+INT_SENTINEL_BASE = 1987650000
+FLOAT_SENTINEL_BASE = 1987650000.25
+STRING_SENTINEL = "__sqlp{}__"
+
+COMPARISON_OPERATORS = {"=", "<>", "!=", "<", "<=", ">", ">="}
+
+_TOKEN = re.compile(r"""
+    (?P<string>'(?:[^'\\]|''|\\.)*')
+  | (?P<number>(?<![\w.])-?\d+(?:\.\d+)?(?![\w.]))
+  | (?P<quoted>`[^`]*`|"[^"]*")
+  | (?P<word>[A-Za-z_][\w.]*)
+  | (?P<op><>|!=|<=|>=|[=<>(),])
+  | (?P<space>\s+)
+  | (?P<other>.)
+""", re.X)
+_PLACEHOLDER = re.compile(r"'(?:[^'\\]|''|\\.)*'|`[^`]*`|\"[^\"]*\"|\?")
+_STRING_ESCAPE = re.compile(r"''|\\(.)", re.S)
+_INDEX_NAME = re.compile(r"indexName=([^,)]+)")
+_FROM_INDEX = re.compile(r"\bFROM\s+(`[^`]+`|\"[^\"]+\"|[\w.*-]+)", re.I)
+
+
+def query_index(template):
+    """SQL 의 FROM 인덱스 이름 (인용 부호 제거, 찾지 못하면 None)"""
+    match = _FROM_INDEX.search(template)
+    return match.group(1).strip('`"') if match else None
+
+
+def literal_value(text):
+    """SQL 리터럴 토큰 → 파이썬 값"""
+    if text.startswith("'"):
+        return _STRING_ESCAPE.sub(lambda match: match.group(1) or "'", text[1:-1])
+    return float(text) if "." in text else int(text)
+
+
+def sql_literal(value):
+    """파이썬 값 → SQL 리터럴 (문자열의 역슬래시 / 작은따옴표 이스케이프)"""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def normalize_sql(query):
+    """SQL 을 (정규화 템플릿, 파라미터 목록) 으로 분리
+    
+    비교 연산자 뒤, IN (...) 목록, BETWEEN ... AND ... 의 리터럴만 ? 로 바꾸고
+    LIMIT / LIKE 패턴 / 함수 인자처럼 계획 모양을 바꾸는 리터럴은 템플릿에 남깁니다.
+    """
+    parts, params = [], []
+    previous = ""
+    in_list = between = False
+    
+    for match in _TOKEN.finditer(query.strip()):
+        kind, text = match.lastgroup, match.group()
+        if kind == "space":
+            parts.append(" ")
+            continue
+        
+        if kind in ("string", "number"):
+            parameter = (
+                previous in COMPARISON_OPERATORS
+                or previous == "BETWEEN"
+                or (between and previous == "AND")
+                or (in_list and previous in ("(", ","))
+            )
+            if parameter:
+                between = previous == "BETWEEN"
+                params.append(literal_value(text))
+                text = "?"
+        elif text == "(" and previous == "IN":
+            in_list = True
+        elif text == ")":
+            in_list = False
+        
+        parts.append(text)
+        previous = text.upper() if kind == "word" else text
+    
+    return "".join(parts), params
+
+
+def render_sql(template, params):
+    """템플릿의 ? 자리에 파라미터를 SQL 리터럴로 채움 (따옴표 안의 ? 는 그대로)"""
+    placeholders = sum(1 for match in _PLACEHOLDER.finditer(template) if match.group() == "?")
+    if placeholders != len(params):
+        raise ValueError(f"파라미터 개수 불일치: 자리 {placeholders}개, 값 {len(params)}개")
+    
+    values = iter(params)
+    return _PLACEHOLDER.sub(lambda match: sql_literal(next(values)) if match.group() == "?" else match.group(), template)
+
+
+def sentinel_for(position, value):
+    """파라미터 위치 / 타입별 자리 표시 값"""
+    if not isinstance(value, (int, float)):
+        return STRING_SENTINEL.format(position)
+    return (FLOAT_SENTINEL_BASE if isinstance(value, float) else INT_SENTINEL_BASE) + position
+
+
+def find_scan_request(node):
+    """실행 계획 트리에서 인덱스 스캔 요청 문자열 찾기"""
+    request = node.get("description", {}).get("request")
+    if node.get("name", "").startswith("OpenSearch") and request:
+        return request
+    for child in node.get("children", []):
+        request = find_scan_request(child)
+        if request:
+            return request
+    return None
+
+
+def parse_scan_request(request):
+    """OpenSearchQueryRequest(indexName=..., sourceBuilder={...}, ...) → (인덱스, DSL)"""
+    index_match = _INDEX_NAME.search(request)
+    start = request.find("sourceBuilder=")
+    if not index_match or start < 0:
+        return None, None
+    dsl, _ = json.JSONDecoder().raw_decode(request, start + len("sourceBuilder="))
+    return index_match.group(1).strip(), dsl
+
+
+def _scalars(node):
+    """DSL 트리의 스칼라 값 목록"""
+    if isinstance(node, dict):
+        return [value for child in node.values() for value in _scalars(child)]
+    if isinstance(node, list):
+        return [value for child in node for value in _scalars(child)]
+    return [node]
+
+
+def _contains(scalars, sentinel):
+    """DSL 스칼라 중 sentinel 이 있는지 (숫자는 문자열로 표현된 경우 포함)"""
+    if isinstance(sentinel, str):
+        return any(isinstance(value, str) and sentinel in value for value in scalars)
+    return any(
+        (isinstance(value, (int, float)) and not isinstance(value, bool) and value == sentinel)
+        or value == str(sentinel)
+        for value in scalars
+    )
+
+
+def bind_dsl(node, bindings):
+    """DSL 트리의 sentinel 을 실제 값으로 치환한 복사본"""
+    if isinstance(node, dict):
+        return {key: bind_dsl(value, bindings) for key, value in node.items()}
+    if isinstance(node, list):
+        return [bind_dsl(value, bindings) for value in node]
+    if isinstance(node, bool) or node is None:
+        return node
+    if isinstance(node, str):
+        if node in bindings:
+            return bindings[node]
+        for sentinel, value in bindings.items():
+            if isinstance(sentinel, str) and sentinel in node:
+                node = node.replace(sentinel, str(value))
+        return node
+    return bindings.get(node, node)
+
+
+def computed_columns(dsl, schema):
+    """_source 필드를 그대로 읽지 않는(SELECT 에서 계산하는) 컬럼 이름 목록
+    
+    ProjectOperator 는 푸시다운으로 보지만 DATE_FORMAT / UPPER / salary * 2 같은 식은
+    SQL 플러그인이 메모리에서 계산하므로, DSL _source.includes 에 없는 컬럼은 캐시할 수 없습니다.
+    """
+    source = dsl.get("_source")
+    includes = source.get("includes") if isinstance(source, dict) else source
+    if not isinstance(includes, list):
+        return [column["name"] for column in schema]
+    return [column["name"] for column in schema if column["name"] not in includes]
+
+
+def source_value(source, field):
+    """_source 에서 필드 값 조회 (점 표기 중첩 필드 포함)"""
+    if field in source:
+        return source[field]
+    value = source
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class SQLTranslationCache:
+    def __init__(self, client=None, sql_client=None, max_entries=DEFAULT_MAX_ENTRIES,
+                 mapping_check_interval=DEFAULT_MAPPING_CHECK_INTERVAL):
+        """변환 캐시 초기화 (client: _search / 매핑 조회, sql_client: _explain / 폴백 실행)"""
+        self.client = client or get_client()
+        self.sql_client = sql_client or SQLStreamClient()
+        self.max_entries = max_entries
+        self.mapping_check_interval = mapping_check_interval
+        
+        self.entries = OrderedDict()
+        self.mappings = {}
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "bypass": 0, "evictions": 0, "invalidations": 0, "errors": 0}
+
+    def _mapping_fingerprint(self, index_name):
+        """인덱스 매핑 해시"""
+        mapping = self.client.indices.get_mapping(index=index_name)
+        return hashlib.sha1(json.dumps(mapping, sort_keys=True).encode()).hexdigest()
+
+    def _current_fingerprint(self, index_name):
+        """확인 주기 내에는 저장된 매핑 해시를, 지나면 다시 조회한 해시를 반환"""
+        fingerprint, checked_at = self.mappings.get(index_name, (None, 0.0))
+        if fingerprint is None or time.monotonic() - checked_at >= self.mapping_check_interval:
+            fingerprint = self._mapping_fingerprint(index_name)
+            self.mappings[index_name] = (fingerprint, time.monotonic())
+        return fingerprint
+
+    def _translate(self, template, params):
+        """sentinel 을 넣은 SQL 로 _explain 호출 → 캐시 항목
+        
+        캐시할 수 없으면 {"cacheable": False, "reason"} 을 반환해 같은 모양의 쿼리가
+        다시 explain 되지 않도록 합니다. index 는 SQL 의 FROM 에서 읽어 invalidate 로 폐기할 수 있게 하고,
+        explain 실패(타임아웃, 노드 재시작 등 일시 오류)는 "transient" 로 표시해 저장하지 않습니다.
+        """
+        query_index_name = query_index(template)
+        if any(value is None or isinstance(value, bool) for value in params):
+            return {"cacheable": False, "index": query_index_name, "reason": "NULL / 불리언 파라미터"}
+        
+        sentinels = [sentinel_for(i, value) for i, value in enumerate(params)]
+        try:
+            explain = self.sql_client.explain(render_sql(template, sentinels))
+        except Exception as e:
+            return {"cacheable": False, "index": query_index_name, "reason": f"explain 실패: {e}", "transient": True}
+        
+        plan = analyze_plan(explain)
+        if plan["engine"] == "legacy":
+            return {"cacheable": False, "index": query_index_name, "reason": "레거시 엔진 실행"}
+        if plan["fallback"]:
+            return {"cacheable": False, "index": query_index_name,
+                    "reason": f"메모리 처리: {', '.join(plan['in_memory_operators'])}"}
+        
+        request = find_scan_request(explain["root"])
+        index_name, dsl = parse_scan_request(request) if request else (None, None)
+        if dsl is None:
+            return {"cacheable": False, "index": index_name or query_index_name, "reason": "인덱스 스캔 DSL 없음"}
+        if "aggregations" in dsl:
+            return {"cacheable": False, "index": index_name, "reason": "집계 결과 변환 미지원"}
+        
+        scalars = _scalars(dsl)
+        missing = [i for i, sentinel in enumerate(sentinels) if not _contains(scalars, sentinel)]
+        if missing:
+            return {"cacheable": False, "index": index_name, "reason": f"DSL 에서 파라미터 {missing} 위치를 찾을 수 없음"}
+        
+        return {
+            "cacheable": True,
+            "index": index_name,
+            "dsl": dsl,
+            "sentinels": sentinels,
+            "schema": None,
+            "fingerprint": self._current_fingerprint(index_name)
+        }
+
+    def _lookup(self, key):
+        """캐시 항목 조회 (최근 사용으로 이동, 매핑이 바뀐 인덱스 항목은 폐기)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+        
+        if entry["cacheable"] and entry["fingerprint"] != self._current_fingerprint(entry["index"]):
+            self.invalidate(entry["index"])
+            return None
+        return entry
+
+    def _count(self, name):
+        """통계 카운터 증가 (_store / invalidate 와 같은 잠금 아래에서)"""
+        with self.lock:
+            self.stats[name] += 1
+
+    def _store(self, key, entry):
+        """캐시 항목 저장 (최대 항목 수 초과 시 가장 오래 사용하지 않은 항목 제거)"""
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _search(self, entry, params):
+        """캐시된 DSL 에 파라미터를 채워 _search 실행 → SQL 응답 형식"""
+        bindings = {}
+        for sentinel, value in zip(entry["sentinels"], params):
+            bindings[sentinel] = value
+            if not isinstance(sentinel, str):
+                bindings[str(sentinel)] = str(value)
+        
+        response = self.client.search(index=entry["index"], body=bind_dsl(entry["dsl"], bindings))
+        fields = [column["name"] for column in entry["schema"]]
+        rows = [[source_value(hit.get("_source", {}), field) for field in fields] for hit in response["hits"]["hits"]]
+        return {"schema": entry["schema"], "datarows": rows, "total": len(rows), "size": len(rows), "status": 200}
+
+    def execute(self, query):
+        """SQL 실행 (캐시 적중 시 _search, 아니면 SQL 플러그인)
+        
+        반환값: SQL 플러그인 응답 형식 + "cache" ("hit" / "miss" / "bypass"),
+            bypass 일 때는 "cache_reason" 포함
+        """
+        template, params = normalize_sql(query)
+        return self.execute_template(template, params)
+
+    def execute_template(self, template, params):
+        """정규화된 템플릿 + 파라미터로 실행"""
+        key = (template, tuple(type(value).__name__ for value in params))
+        entry = self._lookup(key)
+        
+        if entry is not None and entry["cacheable"]:
+            try:
+                result = self._search(entry, params)
+                self._count("hits")
+                result["cache"] = "hit"
+                return result
+            except Exception as e:
+                print(f"   ⚠️ 캐시 DSL 실행 실패, SQL 플러그인으로 재실행: {e}")
+                with self.lock:
+                    self.stats["errors"] += 1
+                    self.entries.pop(key, None)
+                entry = None
+        
+        if entry is None:
+            self._count("misses")
+            entry = self._translate(template, params)
+            result = self.sql_client.execute(render_sql(template, params))
+            if entry["cacheable"]:
+                schema = result.get("schema", [])
+                computed = computed_columns(entry["dsl"], schema)
+                if computed:
+                    entry = {"cacheable": False, "index": entry["index"], "reason": f"계산 컬럼: {', '.join(computed)}"}
+                else:
+                    entry["schema"] = schema
+            if not entry.get("transient"):
+                self._store(key, entry)
+            result["cache"] = "miss"
+            if not entry["cacheable"]:
+                result["cache_reason"] = entry["reason"]
+            return result
+        
+        self._count("bypass")
+        result = self.sql_client.execute(render_sql(template, params))
+        result["cache"] = "bypass"
+        result["cache_reason"] = entry["reason"]
+        return result
+
+    def invalidate(self, index_name=None):
+        """인덱스(없으면 전체)의 캐시 항목 폐기 → 폐기한 항목 수"""
+        with self.lock:
+            keys = [key for key, entry in self.entries.items() if index_name is None or entry["index"] == index_name]
+            for key in keys:
+                del self.entries[key]
+            if index_name is None:
+                self.mappings.clear()
+            else:
+                self.mappings.pop(index_name, None)
+            self.stats["invalidations"] += len(keys)
+        return len(keys)
+
+    def info(self):
+        """캐시 상태 요약"""
+        with self.lock:
+            cacheable = sum(1 for entry in self.entries.values() if entry["cacheable"])
+            lookups = self.stats["hits"] + self.stats["misses"] + self.stats["bypass"]
+            return dict(
+                self.stats,
+                entries=len(self.entries),
+                cacheable_entries=cacheable,
+                hit_rate=self.stats["hits"] / lookups if lookups else 0.0
+            )
+
+
+def parse_args(argv):
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="SQL → DSL 변환 캐시 지연 비교")
+    parser.add_argument("query", help="SELECT 쿼리")
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--max-entries", type=int, default=DEFAULT_MAX_ENTRIES)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """같은 쿼리를 SQL 플러그인 / 변환 캐시로 반복 실행하여 평균 지연 비교"""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    sql_client = SQLStreamClient()
+    cache = SQLTranslationCache(sql_client=sql_client, max_entries=args.max_entries)
+    
+    try:
+        first = cache.execute(args.query)
+        if first["cache"] == "miss" and "cache_reason" in first:
+            print(f"⚠️ 캐시 불가 쿼리: {first['cache_reason']}")
+            return 1
+        
+        timings = {}
+        for label, execute in [("SQL 플러그인", sql_client.execute), ("변환 캐시", cache.execute)]:
+            start_time = time.perf_counter()
+            for _ in range(args.repeat):
+                execute(args.query)
+            timings[label] = (time.perf_counter() - start_time) * 1000 / args.repeat
+    except Exception as e:
+        print(f"❌ 실행 실패: {e}")
+        return 1
+    
+    print(f"🗄️ 변환 캐시 지연 비교 ({args.repeat}회, 결과 {len(first['datarows'])}행)")
+    for label, elapsed in timings.items():
+        print(f"   {label}: 평균 {elapsed:.2f}ms")
+    print(f"   캐시 상태: {cache.info()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+OpenSearch SQL 커서 스트리밍 클라이언트
+======================================
+
+/_plugins/_sql 의 fetch_size 커서로 결과를 페이지 단위로 받아 제너레이터로 반환하고,
+다 읽었거나 중간에 중단되면 커서를 닫습니다. 전체 datarows 를 한 번에 메모리에 올리지 않으므로
+수백만 행도 CSV / JSONL / Parquet 파일로 점진적으로 내보낼 수 있습니다.
+
+사용 예:
+    python sql_client.py "SELECT * FROM financial-realtime-transactions" --output transactions.csv
+    python sql_client.py "SELECT customer_id, amount FROM financial-realtime-transactions" \\
+        --output transactions.parquet --fetch-size 5000
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+from opensearch_client import get_session, BASE_URL
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 선택 의존성 (Parquet 내보내기 시에만 필요)
+    pa = None
+    pq = None
+
+DEFAULT_FETCH_SIZE = 1000
+DEFAULT_TIMEOUT = 60
+EXPORT_FORMATS = ["csv", "jsonl", "parquet"]
+
+# SQL 스키마 타입 → Arrow 타입 이름 (그 외 타입은 문자열)
+ARROW_TYPES = {
+    "byte": "int64", "short": "int64", "integer": "int64", "long": "int64",
+    "float": "float64", "half_float": "float64", "scaled_float": "float64", "double": "float64",
+    "boolean": "bool_"
+}
+
+
+class SQLQueryError(Exception):
+    """SQL 플러그인 요청 실패 (HTTP 상태 코드와 응답 본문 포함)"""
+
+    def __init__(self, status_code, message):
+        super().__init__(f"{status_code}: {message[:200]}")
+        self.status_code = status_code
+        self.message = message
+
+
+def column_names(schema):
+    """스키마 목록에서 컬럼명 추출 (별칭 우선)"""
+    return [column.get("alias") or column["name"] for column in schema]
+
+
+# 이름이 OpenSearch 로 시작하는 인덱스 스캔 외에 메모리 처리로 보지 않는 연산자
+# (Project 의 계산식 컬럼은 DSL 로 표현되지 않으므로 sql_cache.computed_columns 에서 따로 거름)
+PUSHDOWN_OPERATORS = {"ProjectOperator"}
+
+
+def plan_operators(node):
+    """v2 엔진 실행 계획 트리의 연산자 이름 목록 (깊이 우선)"""
+    operators = [node.get("name", "?")]
+    for child in node.get("children", []):
+        operators.extend(plan_operators(child))
+    return operators
+
+
+def analyze_plan(explain):
+    """실행 계획 분석 → {"engine", "operators", "in_memory_operators", "fallback"}
+    
+    v2 엔진은 {"root": {...}} 트리를 반환하고, 레거시 엔진으로 넘어간 쿼리는
+    OpenSearch DSL(또는 조인 계획)을 그대로 반환하므로 root 가 없습니다.
+    """
+    root = explain.get("root")
+    if root is None:
+        return {"engine": "legacy", "operators": [], "in_memory_operators": [], "fallback": True}
+    
+    operators = plan_operators(root)
+    in_memory = [
+        operator for operator in operators
+        if operator not in PUSHDOWN_OPERATORS and not operator.startswith("OpenSearch")
+    ]
+    return {"engine": "v2", "operators": operators, "in_memory_operators": in_memory, "fallback": bool(in_memory)}
+
+
+class SQLStreamClient:
+    def __init__(self, session=None, base_url=BASE_URL, fetch_size=DEFAULT_FETCH_SIZE, timeout=DEFAULT_TIMEOUT):
+        """공유 keep-alive 세션으로 SQL 플러그인 클라이언트 초기화"""
+        self.session = session or get_session()
+        self.base_url = base_url
+        self.fetch_size = fetch_size
+        self.timeout = timeout
+
+    def _post(self, path, payload):
+        """SQL 플러그인 POST 요청 → 응답 JSON (200 이 아니면 SQLQueryError)"""
+        response = self.session.post(
+            f"{self.base_url}{path}",
+            headers={"Content-Type": "application/json"},
+            data=json.dumps(payload),
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise SQLQueryError(response.status_code, response.text)
+        return response.json()
+
+    def execute(self, query, language="sql"):
+        """커서 없이 단일 요청으로 실행 (작은 결과 / 집계 쿼리용, language: sql / ppl)"""
+        return self._post(f"/_plugins/_{language}", {"query": query})
+
+    def explain(self, query, language="sql"):
+        """실행 계획 조회 (/_plugins/_sql/_explain, /_plugins/_ppl/_explain)"""
+        return self._post(f"/_plugins/_{language}/_explain", {"query": query})
+
+    def close_cursor(self, cursor):
+        """서버 측 커서 컨텍스트 해제"""
+        return self._post("/_plugins/_sql/close", {"cursor": cursor}).get("succeeded", False)
+
+    def iter_pages(self, query, fetch_size=None):
+        """(스키마, 행 목록) 을 페이지 단위로 반환
+        
+        커서 응답에는 첫 페이지에만 스키마가 있으므로 이후 페이지에도 같은 스키마를 전달합니다.
+        첫 페이지는 결과가 없어도 반환하고(파일 헤더/스키마 기록용), 집계 / 조인처럼
+        커서를 지원하지 않는 쿼리는 한 페이지로 끝납니다.
+        소비자가 중간에 멈추거나 오류가 나도 열린 커서는 finally 에서 닫습니다.
+        """
+        result = self._post("/_plugins/_sql", {"query": query, "fetch_size": fetch_size or self.fetch_size})
+        schema = result.get("schema", [])
+        cursor = result.get("cursor")
+        
+        first_page = True
+        try:
+            while True:
+                rows = result.get("datarows", [])
+                if rows or first_page:
+                    yield schema, rows
+                first_page = False
+                if not cursor:
+                    break
+                
+                result = self._post("/_plugins/_sql", {"cursor": cursor})
+                cursor = result.get("cursor")
+        finally:
+            if cursor:
+                try:
+                    self.close_cursor(cursor)
+                except Exception as e:
+                    print(f"   ⚠️ 커서 해제 실패: {e}")
+
+    def iter_rows(self, query, fetch_size=None):
+        """결과 행(list)을 하나씩 반환"""
+        for _, rows in self.iter_pages(query, fetch_size):
+            yield from rows
+
+    def iter_dicts(self, query, fetch_size=None):
+        """결과 행을 {컬럼명: 값} dict 로 하나씩 반환"""
+        for schema, rows in self.iter_pages(query, fetch_size):
+            names = column_names(schema)
+            for row in rows:
+                yield dict(zip(names, row))
+
+    def export(self, query, path, output_format=None, fetch_size=None, progress_every=None):
+        """쿼리 결과를 페이지 단위로 파일에 기록 (형식은 확장자 또는 output_format)
+        
+        반환값: {"rows", "pages", "bytes", "elapsed", "rows_per_sec"}
+        """
+        output_format = output_format or os.path.splitext(path)[1].lstrip(".").lower()
+        if output_format not in EXPORT_FORMATS:
+            raise ValueError(f"지원하지 않는 내보내기 형식: {output_format} ({', '.join(EXPORT_FORMATS)})")
+        if output_format == "parquet" and pa is None:
+            raise ImportError("Parquet 내보내기에는 pyarrow 가 필요합니다 (pip install pyarrow)")
+        
+        writer = {"csv": _CSVWriter, "jsonl": _JSONLWriter, "parquet": _ParquetWriter}[output_format](path)
+        result = {"rows": 0, "pages": 0}
+        start_time = time.time()
+        
+        try:
+            for schema, rows in self.iter_pages(query, fetch_size):
+                writer.write(schema, rows)
+                result["rows"] += len(rows)
+                result["pages"] += 1
+                if progress_every and result["pages"] % progress_every == 0:
+                    print(f"   ... {result['rows']:,}행 ({result['pages']:,}페이지)")
+        finally:
+            writer.close()
+        
+        result["bytes"] = os.path.getsize(path)
+        result["elapsed"] = time.time() - start_time
+        result["rows_per_sec"] = result["rows"] / result["elapsed"] if result["elapsed"] > 0 else 0
+        return result
+
+
+class _CSVWriter:
+    def __init__(self, path):
+        """CSV 파일 열기 (헤더는 첫 페이지에서 기록)"""
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.header_written = False
+
+    def write(self, schema, rows):
+        """페이지 행 기록"""
+        if not self.header_written:
+            self.writer.writerow(column_names(schema))
+            self.header_written = True
+        self.writer.writerows(rows)
+
+    def close(self):
+        """파일 닫기"""
+        self.file.close()
+
+
+class _JSONLWriter:
+    def __init__(self, path):
+        """JSONL 파일 열기"""
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, schema, rows):
+        """페이지 행을 한 줄에 하나의 JSON 객체로 기록"""
+        names = column_names(schema)
+        self.file.writelines(json.dumps(dict(zip(names, row)), ensure_ascii=False) + "\n" for row in rows)
+
+    def close(self):
+        """파일 닫기"""
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path):
+        """Parquet 파일 경로 저장 (Arrow 스키마는 첫 페이지의 SQL 스키마로 결정)"""
+        self.path = path
+        self.writer = None
+        self.arrow_schema = None
+
+    def write(self, schema, rows):
+        """페이지를 하나의 row group 으로 기록"""
+        if self.writer is None:
+            self.arrow_schema = pa.schema([
+                (name, getattr(pa, ARROW_TYPES.get(column["type"], "string"))())
+                for name, column in zip(column_names(schema), schema)
+            ])
+            self.writer = pq.ParquetWriter(self.path, self.arrow_schema)
+        
+        columns = [list(values) for values in zip(*rows)] if rows else [[] for _ in self.arrow_schema]
+        for i, field in enumerate(self.arrow_schema):
+            if pa.types.is_string(field.type):
+                columns[i] = [value if value is None or isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+                              for value in columns[i]]
+        self.writer.write_table(pa.Table.from_arrays(columns, schema=self.arrow_schema))
+
+    def close(self):
+        """ParquetWriter 종료"""
+        if self.writer is not None:
+            self.writer.close()
+
+
+def parse_args(argv):
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="OpenSearch SQL 결과 커서 스트리밍 내보내기")
+    parser.add_argument("query", help="SELECT 쿼리")
+    parser.add_argument("--output", required=True, help="출력 파일 (.csv / .jsonl / .parquet)")
+    parser.add_argument("--format", dest="output_format", choices=EXPORT_FORMATS, help="확장자 대신 형식 지정")
+    parser.add_argument("--fetch-size", type=int, default=DEFAULT_FETCH_SIZE)
+    parser.add_argument("--progress-every", type=int, default=100, help="N 페이지마다 진행 상황 출력")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """쿼리 결과를 파일로 스트리밍 내보내기"""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    client = SQLStreamClient(fetch_size=args.fetch_size)
+    
+    print(f"📤 SQL 결과 내보내기 → {args.output} (fetch_size={args.fetch_size})")
+    try:
+        result = client.export(args.query, args.output, args.output_format, progress_every=args.progress_every)
+    except Exception as e:
+        print(f"❌ 내보내기 실패: {e}")
+        return 1
+    
+    print(f"✅ {result['rows']:,}행 / {result['pages']:,}페이지, {result['bytes'] / 1024 ** 2:,.1f}MB, "
+          f"{result['elapsed']:.1f}초 ({result['rows_per_sec']:,.0f}행/초)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+OpenSearch SQL 준비된 쿼리 (prepared statement 스타일 바인딩)
+===========================================================
+
+f-string 으로 인덱스 이름과 값을 직접 끼워 넣는 대신, 템플릿을 한 번 파싱해 두고
+값은 검증 / 이스케이프 후 바인딩합니다.
+
+- 값 자리: ? (위치) 또는 :name (이름) - 한 템플릿에서 섞어 쓸 수 없음
+- 식별자 자리: {name} - 준비 시점에 인덱스 / 컬럼 이름을 검증해 백틱으로 감쌈
+- 리스트 / 튜플 값은 IN (:departments) 처럼 쉼표로 펼침
+- 변환 캐시(sql_cache)를 주면 바인딩된 값을 SQL 문자열 재파싱 없이 캐시 템플릿으로 바로 전달
+
+사용 예:
+    query = prepare("SELECT name, salary FROM {index} WHERE department = :department AND salary >= :min_salary",
+                    index="sql-test-employees")
+    query.execute(department="IT", min_salary=5000)
+    query.execute_many([{"department": "HR", "min_salary": 4000}, {"department": "IT", "min_salary": 6000}])
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import re
+import math
+import numbers
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from sql_client import SQLStreamClient
+from sql_cache import render_sql
+
+# 따옴표 / 백틱 안은 건너뛰고 ?, :name, {name} 자리만 찾음
+_SLOT = re.compile(r"""
+    '(?:[^'\\]|''|\\.)*' | `[^`]*` | "[^"]*"
+  | (?P<positional>\?)
+  | (?<![:\w]):(?P<named>[A-Za-z_]\w*)
+  | \{(?P<identifier>[A-Za-z_]\w*)\}
+""", re.X)
+
+# 인덱스 이름(소문자, 와일드카드 / 점 허용) 및 컬럼 이름
+IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.\-*]*$")
+
+
+def quote_identifier(name):
+    """식별자 검증 후 백틱으로 감싸기"""
+    if not isinstance(name, str) or not IDENTIFIER_PATTERN.match(name):
+        raise ValueError(f"허용되지 않는 식별자: {name!r}")
+    return f"`{name}`"
+
+
+def validate_value(value):
+    """바인딩 값 검증 / 정규화 (SQL 리터럴로 표현 가능한 타입만 허용)"""
+    if value is None or isinstance(value, (bool, str)):
+        if isinstance(value, str) and "\x00" in value:
+            raise ValueError("문자열 값에 NUL 문자를 포함할 수 없습니다")
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        value = float(value)
+        if not math.isfinite(value):
+            raise ValueError(f"유한하지 않은 실수 값: {value}")
+        return value
+    if isinstance(value, datetime.datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    raise TypeError(f"바인딩할 수 없는 값 타입: {type(value).__name__}")
+
+
+class PreparedQuery:
+    def __init__(self, sql, identifiers=None, cache=None, sql_client=None):
+        """템플릿 파싱 (식별자는 이 시점에 채우고, 값 자리 순서를 기록)
+        
+        cache: SQLTranslationCache (있으면 캐시 경유 실행), sql_client: 캐시가 없을 때 실행 클라이언트
+        """
+        self.sql = sql
+        self.cache = cache
+        self.sql_client = sql_client or (cache.sql_client if cache is not None else SQLStreamClient())
+        identifiers = identifiers or {}
+        
+        self.parts = []
+        self.slots = []
+        current, position = "", 0
+        for match in _SLOT.finditer(sql):
+            if match.lastgroup is None:
+                continue
+            current += sql[position:match.start()]
+            position = match.end()
+            if match.lastgroup == "identifier":
+                name = match.group("identifier")
+                if name not in identifiers:
+                    raise ValueError(f"식별자 값 누락: {{{name}}}")
+                current += quote_identifier(identifiers[name])
+            else:
+                self.parts.append(current)
+                self.slots.append(match.group("named"))
+                current = ""
+        self.parts.append(current + sql[position:])
+        
+        named = [slot for slot in self.slots if slot is not None]
+        if named and len(named) != len(self.slots):
+            raise ValueError("? 와 :name 자리는 한 템플릿에서 함께 쓸 수 없습니다")
+        self.named = bool(named)
+        self.templates = {}
+
+    def template_for(self, sizes):
+        """값 자리별 펼침 크기(스칼라는 None)에 맞는 ? 템플릿 (같은 모양은 재사용)"""
+        template = self.templates.get(sizes)
+        if template is None:
+            pieces = [self.parts[0]]
+            for size, part in zip(sizes, self.parts[1:]):
+                pieces.append("?" if size is None else ", ".join(["?"] * size))
+                pieces.append(part)
+            template = self.templates[sizes] = "".join(pieces)
+        return template
+
+    def bind(self, *args, **kwargs):
+        """파라미터 검증 → (템플릿, 펼친 값 목록)"""
+        if self.named:
+            if args:
+                raise ValueError("이름 자리 템플릿에는 키워드 인자로 값을 전달하세요")
+            missing = sorted({slot for slot in self.slots if slot not in kwargs})
+            unknown = sorted(set(kwargs) - set(self.slots))
+            if missing or unknown:
+                raise ValueError(f"파라미터 불일치: 누락 {missing}, 알 수 없음 {unknown}")
+            values = [kwargs[slot] for slot in self.slots]
+        else:
+            if kwargs:
+                raise ValueError("? 자리 템플릿에는 위치 인자로 값을 전달하세요")
+            if len(args) != len(self.slots):
+                raise ValueError(f"파라미터 개수 불일치: 자리 {len(self.slots)}개, 값 {len(args)}개")
+            values = list(args)
+        
+        sizes, params = [], []
+        for value in values:
+            if isinstance(value, (list, tuple, set, frozenset)):
+                if not value:
+                    raise ValueError("빈 목록은 바인딩할 수 없습니다")
+                sizes.append(len(value))
+                params.extend(validate_value(item) for item in value)
+            else:
+                sizes.append(None)
+                params.append(validate_value(value))
+        return self.template_for(tuple(sizes)), params
+
+    def render(self, *args, **kwargs):
+        """값을 바인딩한 SQL 문자열"""
+        return render_sql(*self.bind(*args, **kwargs))
+
+    def execute(self, *args, **kwargs):
+        """바인딩 후 실행 (캐시가 있으면 SQL 문자열을 다시 파싱하지 않고 캐시 템플릿으로 실행)"""
+        template, params = self.bind(*args, **kwargs)
+        if self.cache is not None:
+            return self.cache.execute_template(template, params)
+        return self.sql_client.execute(render_sql(template, params))
+
+    def execute_many(self, param_sets, workers=1):
+        """같은 템플릿을 여러 파라미터 묶음으로 실행 (dict: 이름 자리, 시퀀스: 위치 자리)
+        
+        반환값: 입력 순서대로 응답 목록 (실패한 묶음은 {"error": 메시지})
+        """
+        def run(params):
+            try:
+                if isinstance(params, dict):
+                    return self.execute(**params)
+                return self.execute(*params)
+            except Exception as e:
+                return {"error": str(e)}
+        
+        if workers <= 1:
+            return [run(params) for params in param_sets]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, param_sets))
+
+
+def prepare(sql, cache=None, sql_client=None, **identifiers):
+    """준비된 쿼리 생성 ({name} 식별자는 키워드 인자로 지정)"""
+    return PreparedQuery(sql, identifiers, cache, sql_client)
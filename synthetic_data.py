@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+벡터화된 금융 거래 합성 데이터 생성기
+====================================
+
+시간 단위로 금액, 업종, 지역, 이상 점수, 타임스탬프를 NumPy 배열로 한 번에
+생성한 뒤 열(column) 배열에서 문서를 만들어 냅니다. scale 파라미터로 거래량을
+배수 조정하여 부하 테스트용 수천만 건 데이터셋도 빠르게 생성할 수 있습니다.
+
+SQL 플러그인 부하 테스트용 직원 데이터(sql-test-employees 와 같은 스키마)도 같은 방식으로
+행 수 / 부서 수 / 부서 쏠림(skew) / 입사일 범위를 지정해 생성합니다.
+
+다중 엔티티(category_field) 탐지기 벤치마크용으로 고객 수만 명의 탐지 구간별 거래도 생성합니다.
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import sys
+import time
+import datetime
+import numpy as np
+
+MERCHANT_TYPES = np.array([
+    "restaurant", "grocery", "gas_station", "retail",
+    "online", "pharmacy", "entertainment"
+])
+LOCATIONS = np.array([
+    "Seoul_Gangnam", "Seoul_Jongno", "Busan_Haeundae",
+    "Incheon_Airport", "Daegu_Central"
+])
+
+
+def _hourly_profile(hour):
+    """시간대별 거래 건수 (기본값, 포아송 평균) - plugin_test_anomaly_detection 과 동일한 분포"""
+    if 6 <= hour <= 9:  # 출근 시간
+        return 200, 50
+    elif 12 <= hour <= 14:  # 점심 시간
+        return 300, 80
+    elif 18 <= hour <= 22:  # 퇴근/저녁 시간
+        return 250, 70
+    return 100, 30  # 기타 시간
+
+
+_HOURLY_PROFILE = np.array([_hourly_profile(hour) for hour in range(24)])
+HOURLY_BASE = _HOURLY_PROFILE[:, 0]
+HOURLY_LAMBDA = _HOURLY_PROFILE[:, 1]
+
+ANOMALY_RATE = 0.02
+WEEKEND_FACTOR = 0.7
+
+
+def hourly_transaction_counts(rng, is_weekend, scale=1.0):
+    """하루 24시간의 시간당 거래 건수 배열 생성"""
+    counts = HOURLY_BASE + rng.poisson(HOURLY_LAMBDA)
+    if is_weekend:
+        counts = (counts * WEEKEND_FACTOR).astype(np.int64)
+    return np.round(counts * scale).astype(np.int64)
+
+
+def generate_transaction_columns(rng, hour_start, hour, count):
+    """한 시간 구간의 거래를 열 배열(dict of ndarray)로 생성
+    
+    hour_start: 해당 시간의 시작 시각 (np.datetime64, 초 단위)
+    """
+    is_normal = rng.random(count) > ANOMALY_RATE
+    
+    # 정상: 업무시간 lognormal(log 100, 0.8) / 비업무시간 lognormal(log 50, 0.6)
+    # 이상: lognormal(log 1000, 1.2)
+    if 9 <= hour <= 17:
+        normal_mean, normal_sigma = np.log(100), 0.8
+    else:
+        normal_mean, normal_sigma = np.log(50), 0.6
+    mean = np.where(is_normal, normal_mean, np.log(1000))
+    sigma = np.where(is_normal, normal_sigma, 1.2)
+    amount = rng.lognormal(mean, sigma)
+    
+    # 정상: U(0, 0.3) / 이상: U(0.7, 1.0)
+    anomaly_score = rng.uniform(
+        np.where(is_normal, 0.0, 0.7),
+        np.where(is_normal, 0.3, 1.0)
+    )
+    
+    offsets = rng.integers(0, 60, count) * 60 + rng.integers(0, 60, count)
+    timestamps = hour_start + offsets.astype("timedelta64[s]")
+    
+    return {
+        "@timestamp": np.datetime_as_string(timestamps, unit="s"),
+        "txn_suffix": rng.integers(1000, 9999, count),
+        "customer_num": rng.integers(1, 1001, count),
+        "amount": amount,
+        "merchant_type": MERCHANT_TYPES[rng.integers(0, len(MERCHANT_TYPES), count)],
+        "location": LOCATIONS[rng.integers(0, len(LOCATIONS), count)],
+        "anomaly_score": anomaly_score
+    }
+
+
+def iter_transaction_columns(days=3, scale=1.0, seed=42, end_date=None):
+    """최근 N일을 시간 단위 열 배열 묶음으로 생성
+    
+    (day_offset, hour, is_weekend, columns) 튜플을 순서대로 반환합니다.
+    """
+    rng = np.random.default_rng(seed)
+    end_date = end_date or datetime.datetime.now()
+    
+    for day_offset in range(days):
+        current_date = (end_date - datetime.timedelta(days=day_offset)).date()
+        is_weekend = current_date.weekday() >= 5
+        day_start = np.datetime64(current_date, "s")
+        counts = hourly_transaction_counts(rng, is_weekend, scale)
+        
+        for hour in range(24):
+            hour_start = day_start + np.timedelta64(hour, "h")
+            columns = generate_transaction_columns(rng, hour_start, hour, int(counts[hour]))
+            yield day_offset, hour, is_weekend, columns
+
+
+def generate_realtime_transactions(days=3, scale=1.0, seed=42, end_date=None):
+    """financial-realtime-transactions 문서 제너레이터 (벡터화 버전)"""
+    for day_offset, hour, is_weekend, columns in iter_transaction_columns(days, scale, seed, end_date):
+        txn_prefix = f"TXN_{day_offset:02d}{hour:02d}"
+        
+        # tolist() 로 한 번에 파이썬 기본 타입으로 변환 (직렬화 비용 절감)
+        for timestamp, suffix, customer, amount, merchant, location, score in zip(
+            columns["@timestamp"].tolist(),
+            columns["txn_suffix"].tolist(),
+            columns["customer_num"].tolist(),
+            columns["amount"].tolist(),
+            columns["merchant_type"].tolist(),
+            columns["location"].tolist(),
+            columns["anomaly_score"].tolist()
+        ):
+            yield {
+                "@timestamp": timestamp,
+                "transaction_id": f"{txn_prefix}{suffix}",
+                "customer_id": f"CUST_{customer:04d}",
+                "amount": amount,
+                "merchant_type": merchant,
+                "location": location,
+                "is_weekend": is_weekend,
+                "hour_of_day": hour,
+                "anomaly_score": score
+            }
+
+
+def estimate_row_count(days=3, scale=1.0):
+    """scale 적용 시 예상 거래 건수 (포아송 평균 기준)"""
+    return int((HOURLY_BASE + HOURLY_LAMBDA).sum() * scale * days)
+
+
+# 직원 데이터 (sql-test-employees 스키마, 연봉 단위: 만원)
+DEPARTMENTS = np.array([
+    "IT", "HR", "Finance", "Marketing", "Sales", "Operations",
+    "Legal", "Research", "Support", "Strategy", "Design", "Security"
+])
+POSITION_LEVELS = np.array(["사원", "대리", "과장", "차장", "부장", "팀장"])
+LEVEL_BASE_SALARY = np.array([3800, 4500, 5300, 6200, 7200, 8000])
+SURNAMES = np.array(["김", "이", "박", "최", "정", "강", "조", "윤", "장", "임", "한", "오", "서", "신", "권"])
+GIVEN_NAMES = np.array([
+    "철수", "영희", "민수", "은지", "호영", "수정", "태현", "소영", "성민", "미래",
+    "지훈", "서연", "도윤", "하은", "예준", "지우", "시우", "수아", "주원", "지아"
+])
+EMPLOYEE_BATCH_SIZE = 100000
+
+
+def department_names(count):
+    """부서 이름 배열 (기본 목록보다 많으면 Dept013 형식으로 추가)"""
+    if count <= len(DEPARTMENTS):
+        return DEPARTMENTS[:count]
+    extra = np.array([f"Dept{i:03d}" for i in range(len(DEPARTMENTS) + 1, count + 1)])
+    return np.concatenate([DEPARTMENTS, extra])
+
+
+def department_weights(count, skew=0.0):
+    """부서별 인원 비율 (Zipf: rank^-skew, skew=0 이면 균등)"""
+    weights = np.arange(1, count + 1, dtype=np.float64) ** -skew
+    return weights / weights.sum()
+
+
+def generate_employee_columns(rng, start_id, count, departments, weights, start_date, end_date):
+    """직원 count 명을 열 배열(dict of ndarray)로 생성
+    
+    입사일은 [start_date, end_date] 균등 분포이고, 근속 연수에 따라 직급 / 연봉 / 나이가 올라갑니다.
+    """
+    start_day = np.datetime64(start_date, "D")
+    span_days = int((np.datetime64(end_date, "D") - start_day).astype(np.int64)) + 1
+    hire_offsets = rng.integers(0, span_days, count)
+    hire_dates = start_day + hire_offsets.astype("timedelta64[D]")
+    tenure_years = (span_days - 1 - hire_offsets) / 365.25
+    
+    level = np.clip((tenure_years // 3).astype(np.int64) + rng.integers(-1, 2, count), 0, len(POSITION_LEVELS) - 1)
+    department_index = rng.choice(len(departments), size=count, p=weights)
+    
+    # IT / Finance 연봉 가산, 직급 기본급에 정규 잡음
+    department_factor = np.where(department_index == 0, 1.1, np.where(department_index == 2, 1.05, 1.0))
+    salary = np.round(LEVEL_BASE_SALARY[level] * department_factor + rng.normal(0, 300, count), -1)
+    
+    return {
+        "employee_num": np.arange(start_id, start_id + count),
+        "name_surname": SURNAMES[rng.integers(0, len(SURNAMES), count)],
+        "name_given": GIVEN_NAMES[rng.integers(0, len(GIVEN_NAMES), count)],
+        "department": departments[department_index],
+        "position": POSITION_LEVELS[level],
+        "salary": np.maximum(salary, 2400).astype(np.int64),
+        "hire_date": np.datetime_as_string(hire_dates, unit="D"),
+        "age": (24 + tenure_years + rng.integers(0, 12, count)).astype(np.int64),
+        "performance_score": np.round(np.clip(rng.normal(4.0, 0.45, count), 1.0, 5.0), 1)
+    }
+
+
+def iter_employee_columns(rows, departments=4, skew=0.0, start_date="2010-01-01", end_date=None,
+                          seed=42, batch_size=EMPLOYEE_BATCH_SIZE):
+    """직원 rows 명을 batch_size 단위 열 배열 묶음으로 생성"""
+    rng = np.random.default_rng(seed)
+    end_date = end_date or datetime.date.today().isoformat()
+    names = department_names(departments)
+    weights = department_weights(departments, skew)
+    
+    for start in range(0, rows, batch_size):
+        count = min(batch_size, rows - start)
+        yield generate_employee_columns(rng, start + 1, count, names, weights, start_date, end_date)
+
+
+def generate_employees(rows, departments=4, skew=0.0, start_date="2010-01-01", end_date=None, seed=42):
+    """sql-test-employees 스키마 직원 문서 제너레이터 (벡터화 버전)"""
+    for columns in iter_employee_columns(rows, departments, skew, start_date, end_date, seed):
+        for number, surname, given, department, position, salary, hire_date, age, score in zip(
+            columns["employee_num"].tolist(),
+            columns["name_surname"].tolist(),
+            columns["name_given"].tolist(),
+            columns["department"].tolist(),
+            columns["position"].tolist(),
+            columns["salary"].tolist(),
+            columns["hire_date"].tolist(),
+            columns["age"].tolist(),
+            columns["performance_score"].tolist()
+        ):
+            yield {
+                "employee_id": f"EMP{number:07d}",
+                "name": surname + given,
+                "department": department,
+                "position": position,
+                "salary": salary,
+                "hire_date": hire_date,
+                "age": age,
+                "email": f"emp{number:07d}@company.com",
+                "performance_score": score
+            }
+
+
+# 다중 엔티티(category_field) 탐지기용 고객별 거래 (financial-realtime-transactions 스키마)
+ENTITY_ANOMALY_RATE = 0.001
+ENTITY_ANOMALY_FACTOR = 12.0
+
+
+def entity_profiles(rng, entities):
+    """고객(엔티티)별 고정 속성: 주 업종 / 지역, 평소 거래 금액 수준, 거래 빈도 배수"""
+    return {
+        "merchant_index": rng.integers(0, len(MERCHANT_TYPES), entities),
+        "location_index": rng.integers(0, len(LOCATIONS), entities),
+        "base_amount": rng.lognormal(np.log(80), 0.7, entities),
+        "rate_factor": rng.gamma(4.0, 0.25, entities)
+    }
+
+
+def generate_entity_columns(rng, profiles, interval_start, interval_seconds, rate, anomaly_rate=ENTITY_ANOMALY_RATE):
+    """한 탐지 구간의 엔티티별 거래를 열 배열(dict of ndarray)로 생성
+    
+    엔티티마다 포아송(rate × 빈도 배수) 건을 만들고, anomaly_rate 비율의 엔티티에는
+    거래 건수 급증 + 평소 금액의 ENTITY_ANOMALY_FACTOR 배 거래를 주입합니다.
+    """
+    entities = len(profiles["base_amount"])
+    counts = rng.poisson(rate * profiles["rate_factor"])
+    is_anomalous = rng.random(entities) < anomaly_rate
+    counts[is_anomalous] += rng.poisson(rate * 10, int(is_anomalous.sum())) + 3
+    
+    entity_index = np.repeat(np.arange(entities), counts)
+    anomalous_rows = is_anomalous[entity_index]
+    count = len(entity_index)
+    amount = profiles["base_amount"][entity_index] * rng.lognormal(0.0, 0.3, count)
+    amount[anomalous_rows] *= ENTITY_ANOMALY_FACTOR
+    
+    # 업종은 80% 주 업종, 20% 임의 업종 (위치는 엔티티 고정)
+    merchant_index = np.where(
+        rng.random(count) < 0.8, profiles["merchant_index"][entity_index],
+        rng.integers(0, len(MERCHANT_TYPES), count)
+    )
+    timestamps = interval_start + rng.integers(0, interval_seconds, count).astype("timedelta64[s]")
+    seconds = timestamps.astype(np.int64)
+    
+    return {
+        "@timestamp": np.datetime_as_string(timestamps, unit="s"),
+        "entity_num": entity_index,
+        "amount": amount,
+        "merchant_type": MERCHANT_TYPES[merchant_index],
+        "location": LOCATIONS[profiles["location_index"][entity_index]],
+        "anomaly_score": np.where(anomalous_rows, rng.uniform(0.7, 1.0, count), rng.uniform(0.0, 0.3, count)),
+        "is_weekend": (seconds // 86400 + 3) % 7 >= 5,  # 1970-01-01 은 목요일
+        "hour_of_day": seconds % 86400 // 3600,
+        "is_anomalous_entity": anomalous_rows
+    }
+
+
+def iter_entity_columns(entities=10000, intervals=64, interval_minutes=1, rate=0.5, end_time=None,
+                        anomaly_rate=ENTITY_ANOMALY_RATE, seed=42):
+    """end_time(기본: 현재, 구간 경계로 내림) 직전 intervals 개 탐지 구간을 열 배열 묶음으로 생성
+    
+    (구간 시작 np.datetime64, columns) 튜플을 시간 순서대로 반환합니다.
+    엔티티 속성은 seed 로만 정해지고 거래는 (seed, end_time) 으로 정해지므로, 실시간 관찰 중에
+    구간 하나씩 이어서 생성해도 같은 고객이 같은 패턴으로 새 거래를 만듭니다.
+    """
+    profiles = entity_profiles(np.random.default_rng(seed), entities)
+    interval_seconds = interval_minutes * 60
+    end_time = end_time or datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    end = np.datetime64(end_time, "s")
+    end -= np.timedelta64(int(end.astype(np.int64) % interval_seconds), "s")
+    rng = np.random.default_rng([seed, int(end.astype(np.int64))])
+    
+    for i in range(intervals, 0, -1):
+        interval_start = end - np.timedelta64(i * interval_seconds, "s")
+        yield interval_start, generate_entity_columns(rng, profiles, interval_start, interval_seconds, rate, anomaly_rate)
+
+
+def generate_entity_transactions(entities=10000, intervals=64, interval_minutes=1, rate=0.5, end_time=None,
+                                 anomaly_rate=ENTITY_ANOMALY_RATE, seed=42):
+    """고객 entities 명의 구간별 거래 문서 제너레이터 (customer_id / merchant_type / location 다중 엔티티용)"""
+    for interval_start, columns in iter_entity_columns(entities, intervals, interval_minutes, rate, end_time,
+                                                       anomaly_rate, seed):
+        txn_prefix = f"HC_{interval_start.astype(np.int64) // 60:010d}"
+        for row, (timestamp, entity, amount, merchant, location, score, is_weekend, hour) in enumerate(zip(
+            columns["@timestamp"].tolist(),
+            columns["entity_num"].tolist(),
+            columns["amount"].tolist(),
+            columns["merchant_type"].tolist(),
+            columns["location"].tolist(),
+            columns["anomaly_score"].tolist(),
+            columns["is_weekend"].tolist(),
+            columns["hour_of_day"].tolist()
+        )):
+            yield {
+                "@timestamp": timestamp,
+                "transaction_id": f"{txn_prefix}_{row:07d}",
+                "customer_id": f"CUST_{entity + 1:06d}",
+                "amount": amount,
+                "merchant_type": merchant,
+                "location": location,
+                "is_weekend": is_weekend,
+                "hour_of_day": hour,
+                "anomaly_score": score
+            }
+
+
+def main():
+    """생성 처리량 측정: python synthetic_data.py [scale] [days]"""
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    
+    print(f"🏭 합성 거래 데이터 생성 (scale={scale}, days={days})")
+    print(f"   예상 건수: 약 {estimate_row_count(days, scale):,}건")
+    
+    start_time = time.time()
+    rows = 0
+    for _, _, _, columns in iter_transaction_columns(days, scale):
+        rows += len(columns["amount"])
+    column_elapsed = time.time() - start_time
+    print(f"✅ 열 배열 생성: {rows:,}건, {column_elapsed:.2f}초 ({rows / max(column_elapsed, 1e-9):,.0f}건/초)")
+    
+    start_time = time.time()
+    docs = sum(1 for _ in generate_realtime_transactions(days, scale))
+    doc_elapsed = time.time() - start_time
+    print(f"✅ 문서 생성: {docs:,}건, {doc_elapsed:.2f}초 ({docs / max(doc_elapsed, 1e-9):,.0f}건/초)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+실시간 거래 리플레이 스트리머
+==========================
+
+setup_financial_data 는 실시간 거래를 과거 문서로 한 번에 적재합니다. 이 모듈은 생성(또는 기록된)
+거래를 현재 시각 타임스탬프로 financial-realtime-transactions 에 초당 지정 건수로 계속 흘려 넣어
+실시간 이상 탐지기와 알림 모니터를 지속 적재 부하 아래에서 장시간(soak) 검증할 수 있게 합니다.
+
+일일 메트릭의 5 / 12 / 20일차 이상 패턴을 같은 배수로 거래 흐름에 주입합니다.
+- failure   (5일차 시스템 장애): 거래량 ×0.3, 거래액 ×0.3 → 건당 금액 유지
+- promotion (12일차 프로모션): 거래량 ×2.5, 거래액 ×3.0 → 건당 금액 ×1.2, 온라인 쏠림
+- attack    (20일차 외부 공격): 거래량 ×1.8, 거래액 ×0.7 → 소액 다건, 소수 계좌 집중, 이상 점수 상승
+
+틱(기본 1초)이 끝날 때마다 그 구간에 속한 타임스탬프의 거래를 전송하므로 미래 시각 문서는 없고,
+전송이 밀리면 지연(lag)을 기록한 채 다음 틱을 바로 따라잡습니다. 주입 구간의 시작 / 끝 시각은
+보고서에 남고, --detector-name 을 주면 구간별 탐지기 이상 결과 수를 함께 집계합니다.
+
+사용 예:
+    python transaction_replay.py --rate 50 --duration 1800
+    python transaction_replay.py --rate 20 --schedule normal:600,attack:180 --loop --diurnal
+    python transaction_replay.py --source-index financial-realtime-transactions --rate 100 --duration 600
+    python transaction_replay.py --input recorded.jsonl --detector-name realtime_transaction_anomaly_detector
+
+작성자: KCB IT AI 추진단
+날짜: 2025-08-12
+"""
+
+import sys
+import json
+import time
+import argparse
+import datetime
+import numpy as np
+from opensearchpy import helpers
+from opensearch_client import get_client
+from index_helpers import stream_bulk
+from anomaly_historical import AD_BASE, find_detector_id, format_millis
+from synthetic_data import MERCHANT_TYPES, LOCATIONS, HOURLY_BASE, HOURLY_LAMBDA, ANOMALY_RATE
+
+REALTIME_INDEX = "financial-realtime-transactions"
+DEFAULT_RATE = 20.0  # 초당 평균 거래 수 (정상 패턴 기준)
+DEFAULT_TICK_SECONDS = 1.0
+# 1분 탐지 구간 + shingle 4 기준으로 정상 구간은 충분히 길게, 이상 구간은 2~3 구간 이상 지속
+DEFAULT_SCHEDULE = "normal:600,failure:180,normal:600,promotion:180,normal:600,attack:180"
+ONLINE_INDEX = int(np.flatnonzero(MERCHANT_TYPES == "online")[0])
+
+# 패턴별 배수 - plugin_test_anomaly_detection.generate_daily_metrics 의 5 / 12 / 20일차와 동일
+# (anomaly_amount: 이상 거래 금액 lognormal 중앙값, 공격은 고액 대신 소액 카드 테스트)
+PATTERNS = {
+    "normal": {
+        "description": "정상",
+        "rate": 1.0, "amount": 1.0, "anomaly_rate": ANOMALY_RATE, "anomaly_amount": 1000,
+        "online_share": None, "customers": 1000
+    },
+    "failure": {
+        "description": "시스템 장애 (5일차)",
+        "rate": 0.3, "amount": 0.3 / 0.3, "anomaly_rate": ANOMALY_RATE, "anomaly_amount": 1000,
+        "online_share": None, "customers": 1000
+    },
+    "promotion": {
+        "description": "프로모션 이벤트 (12일차)",
+        "rate": 2.5, "amount": 3.0 / 2.5, "anomaly_rate": ANOMALY_RATE, "anomaly_amount": 1000,
+        "online_share": 0.6, "customers": 1000
+    },
+    "attack": {
+        "description": "외부 공격 (20일차)",
+        "rate": 1.8, "amount": 0.7 / 1.8, "anomaly_rate": 0.3, "anomaly_amount": 5,
+        "online_share": 0.8, "customers": 50
+    }
+}
+
+
+def parse_schedule(text):
+    """"normal:600,attack:180" → [("normal", 600.0), ("attack", 180.0)]"""
+    schedule = []
+    for item in text.split(","):
+        name, _, seconds = item.strip().partition(":")
+        if name not in PATTERNS:
+            raise argparse.ArgumentTypeError(f"알 수 없는 패턴: {name} (가능: {', '.join(PATTERNS)})")
+        try:
+            seconds = float(seconds)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"패턴 지속 시간(초)이 필요합니다: {item}")
+        if seconds <= 0:
+            raise argparse.ArgumentTypeError(f"패턴 지속 시간은 양수여야 합니다: {item}")
+        schedule.append((name, seconds))
+    return schedule
+
+
+def pattern_at(schedule, elapsed, loop=False):
+    """경과 시간(초)에 해당하는 패턴 이름 (스케줄이 끝났고 반복하지 않으면 None)"""
+    cycle = sum(seconds for _, seconds in schedule)
+    if elapsed >= cycle:
+        if not loop:
+            return None
+        elapsed %= cycle
+    for name, seconds in schedule:
+        if elapsed < seconds:
+            return name
+        elapsed -= seconds
+    return schedule[-1][0]
+
+
+def diurnal_factor(epoch_seconds):
+    """현재 시각(UTC) 시간대의 거래량 배수 - synthetic_data 시간대 분포를 평균 1로 정규화"""
+    profile = HOURLY_BASE + HOURLY_LAMBDA
+    return profile[int(epoch_seconds // 3600 % 24)] / profile.mean()
+
+
+def generate_replay_columns(rng, start_seconds, seconds, count, pattern):
+    """[start_seconds, start_seconds + seconds) 틱 구간의 거래를 열 배열로 생성
+    
+    금액 / 이상 점수 분포는 synthetic_data.generate_transaction_columns 와 같고,
+    패턴 배수(건당 금액, 이상 비율, 온라인 쏠림, 계좌 집중)만 추가로 적용합니다.
+    """
+    hour = int(start_seconds // 3600 % 24)
+    is_normal = rng.random(count) > pattern["anomaly_rate"]
+    
+    if 9 <= hour <= 17:
+        normal_mean, normal_sigma = np.log(100), 0.8
+    else:
+        normal_mean, normal_sigma = np.log(50), 0.6
+    mean = np.where(is_normal, normal_mean, np.log(pattern["anomaly_amount"]))
+    sigma = np.where(is_normal, normal_sigma, 1.2)
+    amount = rng.lognormal(mean, sigma) * pattern["amount"]
+    
+    anomaly_score = rng.uniform(
+        np.where(is_normal, 0.0, 0.7),
+        np.where(is_normal, 0.3, 1.0)
+    )
+    
+    merchant = rng.integers(0, len(MERCHANT_TYPES), count)
+    if pattern["online_share"]:
+        merchant = np.where(rng.random(count) < pattern["online_share"], ONLINE_INDEX, merchant)
+    
+    millis = np.int64(start_seconds * 1000) + np.sort(rng.integers(0, int(seconds * 1000), count))
+    timestamps = millis.astype("datetime64[ms]")
+    return {
+        "@timestamp": np.datetime_as_string(timestamps, unit="ms"),
+        "customer_num": rng.integers(1, pattern["customers"] + 1, count),
+        "amount": amount,
+        "merchant_type": MERCHANT_TYPES[merchant],
+        "location": LOCATIONS[rng.integers(0, len(LOCATIONS), count)],
+        "anomaly_score": anomaly_score,
+        "is_weekend": (millis // 86400000 + 3) % 7 >= 5,  # 1970-01-01 은 목요일
+        "hour_of_day": millis // 3600000 % 24
+    }
+
+
+def iter_recorded_file(path):
+    """기록된 거래 JSONL 파일 문서 (끝나면 처음부터 반복)"""
+    while True:
+        found = False
+        with open(path, encoding="utf-8") as recorded:
+            for line in recorded:
+                if line.strip():
+                    found = True
+                    yield json.loads(line)
+        if not found:
+            raise ValueError(f"기록된 거래가 없습니다: {path}")
+
+
+def iter_recorded_index(client, index_name):
+    """인덱스에 적재된 거래를 시간순으로 (끝나면 처음부터 반복)
+    
+    대상 인덱스와 같은 인덱스를 읽어도 이미 리플레이한 문서(replay_pattern 있음)는 제외하므로
+    반복할 때마다 패턴 금액 배수가 누적되지 않습니다.
+    """
+    query = {
+        "query": {"bool": {"must_not": [{"exists": {"field": "replay_pattern"}}]}},
+        "sort": [{"@timestamp": "asc"}]
+    }
+    while True:
+        found = False
+        for hit in helpers.scan(client, index=index_name, query=query, preserve_order=True, size=1000):
+            found = True
+            yield hit["_source"]
+        if not found:
+            raise ValueError(f"기록된 거래가 없습니다: {index_name}")
+
+
+class TransactionReplayer:
+    def __init__(self, client=None, index_name=REALTIME_INDEX, rate=DEFAULT_RATE, tick_seconds=DEFAULT_TICK_SECONDS,
+                 diurnal=False, recorded=None, seed=42):
+        """리플레이 설정 (recorded: 기록된 거래 문서 이터레이터, 없으면 합성 거래 생성)"""
+        self.client = client or get_client()
+        self.index_name = index_name
+        self.rate = rate
+        self.tick_seconds = tick_seconds
+        self.diurnal = diurnal
+        self.recorded = recorded
+        self.rng = np.random.default_rng(seed)
+        self.sequence = 0
+
+    def tick_documents(self, start_seconds, count, pattern_name):
+        """틱 구간 하나의 거래 문서 목록 (타임스탬프는 구간 안의 실제 시각)"""
+        pattern = PATTERNS[pattern_name]
+        if self.recorded is not None:
+            return self._recorded_documents(start_seconds, count, pattern_name, pattern)
+        
+        columns = generate_replay_columns(self.rng, start_seconds, self.tick_seconds, count, pattern)
+        documents = []
+        for timestamp, customer, amount, merchant, location, score, is_weekend, hour in zip(
+            columns["@timestamp"].tolist(),
+            columns["customer_num"].tolist(),
+            columns["amount"].tolist(),
+            columns["merchant_type"].tolist(),
+            columns["location"].tolist(),
+            columns["anomaly_score"].tolist(),
+            columns["is_weekend"].tolist(),
+            columns["hour_of_day"].tolist()
+        ):
+            self.sequence += 1
+            documents.append({
+                "@timestamp": timestamp,
+                "transaction_id": f"RPL_{self.sequence:010d}",
+                "customer_id": f"CUST_{customer:04d}",
+                "amount": amount,
+                "merchant_type": merchant,
+                "location": location,
+                "is_weekend": is_weekend,
+                "hour_of_day": hour,
+                "anomaly_score": score,
+                "replay_pattern": pattern_name
+            })
+        return documents
+
+    def _recorded_documents(self, start_seconds, count, pattern_name, pattern):
+        """기록된 거래를 현재 시각으로 다시 찍고 패턴의 건당 금액 배수 적용"""
+        offsets = np.sort(self.rng.integers(0, int(self.tick_seconds * 1000), count))
+        documents = []
+        for offset in offsets.tolist():
+            self.sequence += 1
+            doc = dict(next(self.recorded))
+            moment = datetime.datetime.fromtimestamp(start_seconds + offset / 1000, datetime.timezone.utc)
+            doc["@timestamp"] = moment.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+            doc["transaction_id"] = f"RPL_{self.sequence:010d}"
+            doc["amount"] = doc.get("amount", 0.0) * pattern["amount"]
+            doc["is_weekend"] = moment.weekday() >= 5
+            doc["hour_of_day"] = moment.hour
+            doc["replay_pattern"] = pattern_name
+            documents.append(doc)
+        return documents
+
+    def run(self, schedule, duration=None, loop=False, progress_every=30):
+        """스케줄대로 거래 전송 (duration 초 또는 스케줄 종료 / Ctrl+C 까지)
+        
+        반환값: {"windows": [{"pattern", "start", "end", "docs"}], "sent", "failed", "elapsed",
+                 "docs_per_sec", "max_lag", "behind_ticks"}
+        """
+        report = {"sent": 0, "failed": 0, "max_lag": 0.0, "behind_ticks": 0, "windows": [], "errors": []}
+        start = time.time()
+        last_progress = start
+        tick = 0
+        try:
+            while True:
+                tick_start = start + tick * self.tick_seconds
+                tick_end = tick_start + self.tick_seconds
+                elapsed = tick_start - start
+                pattern_name = pattern_at(schedule, elapsed, loop)
+                if pattern_name is None or (duration and elapsed >= duration):
+                    break
+                
+                # 틱이 끝난 뒤 전송해야 타임스탬프가 미래가 되지 않음
+                wait = tick_end - time.time()
+                if wait > 0:
+                    time.sleep(wait)
+                lag = time.time() - tick_end
+                report["max_lag"] = max(report["max_lag"], lag)
+                if lag > self.tick_seconds:
+                    report["behind_ticks"] += 1
+                
+                expected = self.rate * PATTERNS[pattern_name]["rate"] * self.tick_seconds
+                if self.diurnal:
+                    expected *= diurnal_factor(tick_start)
+                count = int(self.rng.poisson(expected))
+                
+                windows = report["windows"]
+                if not windows or windows[-1]["pattern"] != pattern_name:
+                    if windows:
+                        windows[-1]["end"] = int(tick_start * 1000)
+                    windows.append({"pattern": pattern_name, "start": int(tick_start * 1000), "end": None, "docs": 0})
+                    print(f"   🎬 {format_millis(tick_start * 1000)} {PATTERNS[pattern_name]['description']} 패턴 시작")
+                
+                if count:
+                    result = stream_bulk(self.client, self.index_name, self.tick_documents(tick_start, count, pattern_name),
+                                         thread_count=1, refresh=False)
+                    report["sent"] += result["success"]
+                    report["failed"] += result["failed"]
+                    report["errors"] = (report["errors"] + result["errors"])[:10]
+                    windows[-1]["docs"] += result["success"]
+                
+                if progress_every and time.time() - last_progress >= progress_every:
+                    last_progress = time.time()
+                    print(f"   ⏳ {last_progress - start:6.0f}초: {report['sent']:,}건 전송 "
+                          f"({report['sent'] / (last_progress - start):,.1f}건/초, 최대 지연 {report['max_lag']:.2f}초)")
+                tick += 1
+        except KeyboardInterrupt:
+            print("\n⏹️ 리플레이 중단")
+        
+        report["elapsed"] = time.time() - start
+        report["docs_per_sec"] = report["sent"] / report["elapsed"] if report["elapsed"] > 0 else 0
+        if report["windows"]:
+            report["windows"][-1]["end"] = int(min(time.time(), start + tick * self.tick_seconds) * 1000)
+        return report
+
+
+def detector_window_hits(client, detector_id, windows):
+    """주입 구간별 탐지기 결과 수 / 이상 결과 수 / 최대 이상 등급 (window["detector"] 에 기록)"""
+    for window in windows:
+        response = client.transport.perform_request("POST", f"{AD_BASE}/results/_search", body={
+            "size": 0,
+            "query": {"bool": {"filter": [
+                {"term": {"detector_id": detector_id}},
+                {"range": {"data_start_time": {"gte": window["start"], "lt": window["end"], "format": "epoch_millis"}}}
+            ]}},
+            "aggs": {
+                "anomalies": {"filter": {"range": {"anomaly_grade": {"gt": 0}}}},
+                "max_grade": {"max": {"field": "anomaly_grade"}}
+            }
+        })
+        window["detector"] = {
+            "results": response["hits"]["total"]["value"],
+            "anomalies": response["aggregations"]["anomalies"]["doc_count"],
+            "max_grade": response["aggregations"]["max_grade"]["value"]
+        }
+    return windows
+
+
+def print_replay_report(report):
+    """리플레이 요약 및 주입 구간별 탐지 결과 출력"""
+    print("\n" + "=" * 65)
+    print("📋 실시간 거래 리플레이 결과")
+    print("=" * 65)
+    print(f"   📤 전송 {report['sent']:,}건 (실패 {report['failed']:,}건), {report['elapsed']:.0f}초, "
+          f"{report['docs_per_sec']:,.1f}건/초")
+    print(f"   ⏱️ 최대 지연 {report['max_lag']:.2f}초, 밀린 틱 {report['behind_ticks']:,}개")
+    for error in report["errors"]:
+        print(f"      - [{error['status']}] {error['op']}: {str(error['error'])[:120]}")
+    
+    print("   🎬 주입 구간:")
+    for window in report["windows"]:
+        line = (f"      {format_millis(window['start'])} ~ {format_millis(window['end'])} "
+                f"{PATTERNS[window['pattern']]['description']}: {window['docs']:,}건")
+        detector = window.get("detector")
+        if detector:
+            grade = f", 최대 등급 {detector['max_grade']:.2f}" if detector["max_grade"] else ""
+            mark = "🚨" if detector["anomalies"] else ("⚠️" if window["pattern"] != "normal" else "✅")
+            line += f" → {mark} 이상 {detector['anomalies']}/{detector['results']}개 구간{grade}"
+        print(line)
+
+
+def parse_args(argv):
+    """명령행 인자 파싱"""
+    parser = argparse.ArgumentParser(description="실시간 거래 리플레이 (이상 탐지기 / 알림 모니터 soak 테스트)")
+    parser.add_argument("--index", default=REALTIME_INDEX, help="전송 대상 인덱스")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="정상 패턴 초당 평균 거래 수")
+    parser.add_argument("--tick-seconds", type=float, default=DEFAULT_TICK_SECONDS, help="전송 주기 (초)")
+    parser.add_argument("--schedule", type=parse_schedule, default=parse_schedule(DEFAULT_SCHEDULE),
+                        help=f"패턴:초 목록 (기본: {DEFAULT_SCHEDULE})")
+    parser.add_argument("--loop", action="store_true", help="스케줄을 반복 (--duration 또는 Ctrl+C 까지)")
+    parser.add_argument("--duration", type=float, help="최대 실행 시간 (초)")
+    parser.add_argument("--diurnal", action="store_true", help="시간대별 거래량 분포 적용")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--input", help="기록된 거래 JSONL 파일 (없으면 합성 거래 생성)")
+    source.add_argument("--source-index", help="기록된 거래를 읽어 올 인덱스")
+    parser.add_argument("--detector-name", help="종료 후 주입 구간별 이상 결과를 집계할 탐지기 이름")
+    parser.add_argument("--settle", type=int, default=180, help="탐지 결과 집계 전 대기 시간 (초, window_delay + 탐지 구간)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--report-path", default="replay_report.json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """실시간 거래 리플레이 실행"""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    client = get_client()
+    if args.input:
+        recorded = iter_recorded_file(args.input)
+    elif args.source_index:
+        recorded = iter_recorded_index(client, args.source_index)
+    else:
+        recorded = None
+    
+    replayer = TransactionReplayer(client, args.index, args.rate, args.tick_seconds, args.diurnal, recorded, args.seed)
+    print(f"🎞️ 실시간 거래 리플레이 → {args.index} (초당 {args.rate:g}건, "
+          f"{'기록된 거래' if recorded is not None else '합성 거래'})")
+    try:
+        report = replayer.run(args.schedule, args.duration, args.loop)
+        if args.detector_name:
+            detector_id = find_detector_id(client, args.detector_name)
+            if detector_id:
+                print(f"\n⏳ 탐지 결과 대기 ({args.settle}초)")
+                time.sleep(args.settle)
+                detector_window_hits(client, detector_id, report["windows"])
+            else:
+                print(f"⚠️ 탐지기를 찾을 수 없습니다: {args.detector_name}")
+    except Exception as e:
+        print(f"❌ 실시간 거래 리플레이 실패: {e}")
+        return 1
+    
+    print_replay_report(report)
+    with open(args.report_path, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, ensure_ascii=False, indent=2)
+    print(f"\n💾 보고서 저장: {args.report_path}")
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())